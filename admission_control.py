@@ -0,0 +1,153 @@
+"""
+Admission Control for the Hospital Analytics API
+Every route belongs to a class: critical, standard or expensive. Each class
+has three limits:
+
+- a cap on concurrent executions
+- a queue deadline: how long a request may wait for a slot
+- a MySQL statement timeout (MAX_EXECUTION_TIME) for its read queries
+
+Requests that cannot get a slot in time, or whose query runs out of time,
+are answered 503 with Retry-After.
+
+Slots are lock files held with flock, so a limit counts across every gunicorn
+worker process and thread (and the async backend) on a host. A crashed worker
+releases its slots with its file descriptors.
+
+Critical routes (alerts, health, census, ingest) are never capped or queued,
+so expensive comparisons cannot starve them. A request queued for a slot still
+occupies a sync gunicorn worker. Keep the standard and expensive caps below the
+worker count, or run gthread workers or the async backend.
+
+Limits per class come from LIMIT_<CLASS>_CONCURRENCY, LIMIT_<CLASS>_QUEUE_SECONDS
+and LIMIT_<CLASS>_STATEMENT_MS (0 disables that limit).
+"""
+
+import asyncio
+import fcntl
+import math
+import os
+import tempfile
+import time
+
+# class -> (max concurrent executions, queue deadline in seconds, statement timeout in ms)
+DEFAULT_LIMITS = {
+    'critical': (0, 0, 2000),
+    'standard': (8, 5.0, 5000),
+    'expensive': (2, 2.0, 10000),
+}
+
+EXPENSIVE_ROUTES = {
+    '/api/kpis/summary', '/api/departments/comparison', '/api/branches/comparison',
+    '/api/doctor-utilization', '/api/forecast/departments', '/api/export/monthly-report',
+    '/api/reports/period',
+}
+CRITICAL_PREFIXES = ('/api/alerts/', '/api/health', '/api/census', '/api/ingest/')
+
+POLL_INTERVAL = 0.02        # seconds between slot attempts while queued
+
+# MySQL error raised when MAX_EXECUTION_TIME interrupts a statement
+ER_QUERY_TIMEOUT = 3024
+
+
+def route_class(path, approximate=False):
+    """
+    Admission class of a request path (None for non-API paths, which are never
+    limited). Approximate requests read the admission sample and run as standard.
+    """
+    if path in EXPENSIVE_ROUTES:
+        return 'standard' if approximate else 'expensive'
+    if path.startswith(CRITICAL_PREFIXES):
+        return 'critical'
+    if path.startswith('/api/'):
+        return 'standard'
+    return None
+
+
+def load_limits():
+    limits = {}
+    for name, (concurrency, queue_seconds, statement_ms) in DEFAULT_LIMITS.items():
+        prefix = f"LIMIT_{name.upper()}_"
+        limits[name] = (int(os.getenv(prefix + 'CONCURRENCY', concurrency)),
+                        float(os.getenv(prefix + 'QUEUE_SECONDS', queue_seconds)),
+                        int(os.getenv(prefix + 'STATEMENT_MS', statement_ms)))
+    return limits
+
+
+def is_query_timeout(error):
+    """MAX_EXECUTION_TIME interrupted the statement (mysql-connector errno or PyMySQL args[0])"""
+    code = getattr(error, 'errno', None) or (error.args[0] if error.args else None)
+    return code == ER_QUERY_TIMEOUT
+
+
+class Overloaded(Exception):
+    """No slot freed up before the queue deadline (HTTP 503)"""
+
+    def __init__(self, route_class, retry_after):
+        super().__init__(f"Server busy: too many concurrent {route_class} requests, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Slot:
+    """A held execution slot (an flock'ed file descriptor); release() is idempotent"""
+
+    def __init__(self, fd=None):
+        self.fd = fd
+
+    def release(self):
+        if self.fd is not None:
+            os.close(self.fd)     # closing drops the flock
+            self.fd = None
+
+
+class AdmissionController:
+    """Per-class slot pools on the local filesystem"""
+
+    def __init__(self, limits=None, slot_dir=None):
+        self.limits = limits or load_limits()
+        self.slot_dir = slot_dir or os.getenv('ADMISSION_SLOT_DIR',
+                                              os.path.join(tempfile.gettempdir(), 'hospital-analytics-slots'))
+        os.makedirs(self.slot_dir, exist_ok=True)
+
+    def statement_ms(self, route_class):
+        """MAX_EXECUTION_TIME for the class's queries (0 = none)"""
+        return self.limits[route_class][2] if route_class else 0
+
+    def retry_after(self, route_class):
+        return max(1, math.ceil(self.limits[route_class][1]))
+
+    def try_acquire(self, route_class):
+        """A free slot of the class without waiting, or None"""
+        concurrency = self.limits[route_class][0]
+        if not concurrency:
+            return Slot()
+        for index in range(concurrency):
+            fd = os.open(os.path.join(self.slot_dir, f"{route_class}.{index}.lock"), os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return Slot(fd)
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def acquire(self, route_class):
+        """Wait up to the class's queue deadline for a slot; raises Overloaded"""
+        deadline = time.monotonic() + self.limits[route_class][1]
+        while True:
+            slot = self.try_acquire(route_class)
+            if slot is not None:
+                return slot
+            if time.monotonic() >= deadline:
+                raise Overloaded(route_class, self.retry_after(route_class))
+            time.sleep(POLL_INTERVAL)
+
+    async def acquire_async(self, route_class):
+        """acquire() for the event loop: waits without blocking other requests"""
+        deadline = time.monotonic() + self.limits[route_class][1]
+        while True:
+            slot = self.try_acquire(route_class)
+            if slot is not None:
+                return slot
+            if time.monotonic() >= deadline:
+                raise Overloaded(route_class, self.retry_after(route_class))
+            await asyncio.sleep(POLL_INTERVAL)
@@ -0,0 +1,275 @@
+"""
+Stratified Admission Sample for Approximate Analytics
+admission_sample keeps a fixed share of every month's admissions per branch
+and department (at least MIN_STRATUM_SAMPLE, or the whole stratum when it is
+smaller). Within a stratum, rows are chosen by CRC32 of the admission id, so a
+refresh is repeatable. admission_sample_strata records the population and
+sample size of each stratum.
+
+Approximate KPIs and comparisons (`approximate=true`) weight each stratum by
+population / sample size and report 95% confidence intervals from the
+within-stratum variances, with ratio estimates (ALOS, readmission rate, cost
+per patient) linearized. A multi-year request reads a few percent of the
+admissions, without joining billing, procedures or readmissions, and each
+sample query is capped at APPROXIMATE_BUDGET_MS.
+
+    python admission_sample.py refresh --from 2023-01 --to 2024-12 [--rate 0.02]
+
+Refresh recent months on the same schedule as period_reports.py, so discharges,
+bills and readmissions of sampled stays are picked up.
+"""
+
+import argparse
+import math
+import os
+from collections import namedtuple
+from datetime import date, datetime
+
+import mysql.connector
+
+from downsampling import parse_day
+from period_reports import add_months
+
+SAMPLE_RATE = 0.02          # share of each stratum kept
+MIN_STRATUM_SAMPLE = 50     # smaller strata are kept whole
+CONFIDENCE_LEVEL = 0.95
+Z_SCORE = 1.959964          # two-sided normal quantile of CONFIDENCE_LEVEL
+
+LATENCY_BUDGET_MS = int(os.getenv('APPROXIMATE_BUDGET_MS', 1000))
+
+# Per-admission variables summed over the sample: name -> SQL over admission_sample s
+SAMPLE_VARIABLES = {
+    'admissions': "1",
+    'discharges': "s.discharge_date IS NOT NULL",
+    'active': "s.discharge_date IS NULL",
+    'emergency': "s.emergency",
+    'scheduled': "NOT s.emergency",
+    'los_days': "DATEDIFF(COALESCE(s.discharge_date, CURRENT_DATE), s.admission_date)",
+    'procedures': "s.procedures",
+    'readmissions': "s.discharge_date IS NOT NULL AND s.readmitted_30d",
+    'billed': "s.billed",
+    'revenue': "s.total_amount",
+}
+
+# Database Configuration from Environment Variables (same variables as the API)
+DB_CONFIG = {
+    'host': os.getenv('MYSQLHOST', 'localhost'),
+    'port': int(os.getenv('MYSQLPORT', 3306)),
+    'database': os.getenv('MYSQLDATABASE', 'hospital_analytics'),
+    'user': os.getenv('MYSQLUSER', 'root'),
+    'password': os.getenv('MYSQLPASSWORD', ''),
+}
+
+
+def approximate_requested(args):
+    """True when the request opts into sample-based answers (approximate=true)"""
+    return str(args.get('approximate', '')).lower() in ('1', 'true', 'yes')
+
+
+# ============== MAINTENANCE ==============
+
+def refresh_sample_month(cursor, month, rate=SAMPLE_RATE):
+    """Redraw the sample of one month for every branch and department; returns the rows sampled"""
+    month_start = date(month.year, month.month, 1)
+    month_end = add_months(month_start, 1)
+
+    cursor.execute("DELETE FROM admission_sample WHERE sample_month = %s", (month_start,))
+    cursor.execute("DELETE FROM admission_sample_strata WHERE sample_month = %s", (month_start,))
+    cursor.execute("""
+        INSERT INTO admission_sample_strata (sample_month, branch_id, dept_id, population, sampled)
+        SELECT %s, branch_id, dept_id, COUNT(*), LEAST(COUNT(*), GREATEST(%s, CEIL(COUNT(*) * %s)))
+        FROM admissions
+        WHERE admission_date >= %s AND admission_date < %s
+        GROUP BY branch_id, dept_id
+    """, (month_start, MIN_STRATUM_SAMPLE, rate, month_start, month_end))
+
+    # The `sampled` lowest CRC32 draws of each stratum; billing and admission_gaps are one row per admission
+    cursor.execute("""
+        INSERT INTO admission_sample
+        (sample_month, branch_id, dept_id, admission_id, admission_date, discharge_date,
+         emergency, procedures, billed, total_amount, readmitted_30d)
+        SELECT %s, r.branch_id, r.dept_id, r.admission_id, r.admission_date, r.discharge_date,
+               r.admission_type = 'Emergency',
+               (SELECT COUNT(*) FROM patient_procedures pp WHERE pp.admission_id = r.admission_id),
+               b.admission_id IS NOT NULL,
+               COALESCE(b.total_amount, 0),
+               COALESCE(g.readmitted_30d, FALSE)
+        FROM (
+            SELECT a.admission_id, a.branch_id, a.dept_id, a.admission_date, a.discharge_date, a.admission_type,
+                   ROW_NUMBER() OVER (PARTITION BY a.branch_id, a.dept_id
+                                      ORDER BY CRC32(a.admission_id), a.admission_id) as draw
+            FROM admissions a
+            WHERE a.admission_date >= %s AND a.admission_date < %s
+        ) r
+        JOIN admission_sample_strata st
+            ON st.sample_month = %s AND st.branch_id = r.branch_id AND st.dept_id = r.dept_id
+        LEFT JOIN billing b ON b.admission_id = r.admission_id
+        LEFT JOIN admission_gaps g ON g.admission_id = r.admission_id
+        WHERE r.draw <= st.sampled
+    """, (month_start, month_start, month_end, month_start))
+    return cursor.rowcount
+
+
+# ============== ESTIMATION ==============
+
+def strata_query(args):
+    """
+    (sql, params) of per-stratum sample sums and sums of squares under the
+    branch_id, dept_id, start_date and end_date filters of a request
+    """
+    start_date, end_date = args.get('start_date'), args.get('end_date')
+    in_range, range_params = [], []
+    conditions, params = [], []
+    if start_date:
+        conditions.append("s.sample_month >= %s")
+        params.append(parse_day(start_date[:10], 'start_date').replace(day=1))
+        in_range.append("s.admission_date >= %s")
+        range_params.append(start_date)
+    if end_date:
+        conditions.append("s.sample_month <= %s")
+        params.append(parse_day(end_date[:10], 'end_date').replace(day=1))
+        in_range.append("s.admission_date <= %s")
+        range_params.append(end_date)
+    for column in ('branch_id', 'dept_id'):
+        if args.get(column):
+            conditions.append(f"s.{column} = %s")
+            params.append(args.get(column))
+
+    # d marks sampled admissions inside the date range; months at the range ends are only partly in it
+    sums = ",\n            ".join(
+        f"SUM(s.d * ({expr})) as {name}_sum, SUM(s.d * POW({expr}, 2)) as {name}_sq"
+        for name, expr in SAMPLE_VARIABLES.items()
+    )
+    where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
+    sql = f"""
+        SELECT /*+ MAX_EXECUTION_TIME({LATENCY_BUDGET_MS}) */
+            st.branch_id, st.dept_id, st.population, st.sampled,
+            {sums}
+        FROM (
+            SELECT s.*, ({" AND ".join(in_range) or "1"}) as d
+            FROM admission_sample s
+            {where_clause}
+        ) s
+        JOIN admission_sample_strata st
+            ON st.sample_month = s.sample_month AND st.branch_id = s.branch_id AND st.dept_id = s.dept_id
+        GROUP BY st.sample_month, st.branch_id, st.dept_id, st.population, st.sampled
+    """
+    return sql, range_params + params
+
+
+class Estimate(namedtuple('Estimate', 'value low high')):
+    """A point estimate with its confidence interval (all None when undefined)"""
+
+    @classmethod
+    def of(cls, value, variance, digits):
+        half_width = Z_SCORE * math.sqrt(variance)
+        low, high = max(value - half_width, 0.0), value + half_width
+        if digits:
+            return cls(round(value, digits), round(low, digits), round(high, digits))
+        return cls(int(round(value)), int(round(low)), int(round(high)))
+
+
+class SampleEstimator:
+    """Stratified expansion estimates from strata_query rows"""
+
+    def __init__(self, strata):
+        self.strata = [row for row in strata if row['sampled']]
+
+    @classmethod
+    def groups(cls, strata, key):
+        """One estimator per value of `key` (e.g. dept_id)"""
+        grouped = {}
+        for row in strata:
+            grouped.setdefault(row[key], []).append(row)
+        return {value: cls(rows) for value, rows in grouped.items()}
+
+    def _expand(self, moments):
+        """Estimated population total of a variable and its variance; moments(row) -> (sum, sum of squares)"""
+        total = variance = 0.0
+        for row in self.strata:
+            population, sampled = row['population'], row['sampled']
+            first, second = moments(row)
+            total += population / sampled * first
+            if 1 < sampled < population:
+                spread = max(second - first * first / sampled, 0.0) / (sampled - 1)
+                variance += population * (population - sampled) * spread / sampled
+        return total, variance
+
+    @staticmethod
+    def _sums(row, name):
+        return float(row[name + '_sum'] or 0), float(row[name + '_sq'] or 0)
+
+    def total(self, name, digits=0):
+        total, variance = self._expand(lambda row: self._sums(row, name))
+        return Estimate.of(total, variance, digits)
+
+    def ratio(self, numerator, indicator, scale=1, digits=2):
+        """
+        Ratio of two totals, e.g. stay days per admission. The denominator is a
+        0/1 indicator that is 1 wherever the numerator is non-zero, so the
+        cross products of the linearized variance equal the numerator's sums.
+        """
+        numerator_total, _ = self._expand(lambda row: self._sums(row, numerator))
+        indicator_total, _ = self._expand(lambda row: self._sums(row, indicator))
+        if not indicator_total:
+            return Estimate(None, None, None)
+        estimate = numerator_total / indicator_total
+
+        def residual(row):
+            first, second = self._sums(row, numerator)
+            count = self._sums(row, indicator)[0]
+            return first - estimate * count, second - 2 * estimate * first + estimate * estimate * count
+
+        _, variance = self._expand(residual)
+        return Estimate.of(estimate * scale, variance * scale * scale / indicator_total ** 2, digits)
+
+    def describe(self):
+        """Sample metadata for a response"""
+        return {
+            'confidence_level': CONFIDENCE_LEVEL,
+            'strata': len(self.strata),
+            'sampled_admissions': sum(row['sampled'] for row in self.strata),
+            'strata_population': sum(row['population'] for row in self.strata),
+            'latency_budget_ms': LATENCY_BUDGET_MS,
+        }
+
+
+def approximate_fields(estimates, missing=None):
+    """Payload fields for {field: Estimate} plus their confidence intervals"""
+    fields = {name: missing if estimate.value is None else estimate.value for name, estimate in estimates.items()}
+    fields['confidence_intervals'] = {
+        name: [estimate.low, estimate.high] for name, estimate in estimates.items() if estimate.value is not None
+    }
+    return fields
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Maintain the stratified admission sample for approximate queries")
+    commands = parser.add_subparsers(dest='command', required=True)
+    refresh = commands.add_parser('refresh', help="redraw the sample for a month range")
+    refresh.add_argument('--from', dest='start', required=True,
+                         type=lambda value: datetime.strptime(value, '%Y-%m').date(), help="YYYY-MM")
+    refresh.add_argument('--to', dest='end',
+                         type=lambda value: datetime.strptime(value, '%Y-%m').date(), help="YYYY-MM (default: --from)")
+    refresh.add_argument('--rate', type=float, default=SAMPLE_RATE, help="share of each stratum to keep")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    try:
+        month = args.start
+        while month <= (args.end or args.start):
+            started = datetime.now()
+            rows = refresh_sample_month(cursor, month, args.rate)
+            conn.commit()
+            print(f"{month.strftime('%Y-%m')}: {rows} sampled admissions "
+                  f"in {(datetime.now() - started).total_seconds():.1f}s")
+            month = add_months(month, 1)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Incremental Resource Alert Engine for Hospital Analytics
+Evaluates per-branch/department thresholds as occupancy and admission events arrive
+"""
+
+import threading
+from datetime import datetime
+
+from mysql.connector import Error
+
+# Used when no row in alert_thresholds covers a branch/department
+DEFAULT_THRESHOLDS = {
+    'max_occupancy_rate': 90.0,
+    'min_free_icu_beds': 2,
+    'max_patients_per_doctor': 8.0,
+}
+
+# How far a metric must recover past its threshold before an alert auto-resolves
+RESOLVE_MARGIN = {
+    'High_Occupancy': 2.0,      # percentage points below max_occupancy_rate
+    'Bed_Shortage': 1,          # ICU beds above min_free_icu_beds
+    'Staff_Shortage': 0.5,      # patients per doctor below the limit
+}
+
+
+def alert_key(alert_type, branch_id, dept_id):
+    """Stable identity of an alert condition, used for de-duplication"""
+    return f"{alert_type}:{branch_id}:{dept_id if dept_id is not None else '-'}"
+
+
+def occupancy_severity(rate, limit):
+    """Severity for an occupancy rate above its limit"""
+    excess = rate - limit
+    if excess >= 8:
+        return 'Critical'
+    if excess >= 5:
+        return 'High'
+    if excess >= 2:
+        return 'Medium'
+    return 'Low'
+
+
+def icu_severity(free_beds, minimum):
+    """Severity for too few free ICU beds"""
+    if free_beds <= 0:
+        return 'Critical'
+    if free_beds <= minimum / 2:
+        return 'High'
+    return 'Medium'
+
+
+def staffing_severity(ratio, limit):
+    """Severity for a patients-per-doctor ratio above its limit"""
+    if ratio >= limit * 1.5:
+        return 'Critical'
+    if ratio >= limit * 1.25:
+        return 'High'
+    if ratio >= limit * 1.1:
+        return 'Medium'
+    return 'Low'
+
+
+class AlertEngine:
+    """
+    Keeps the latest occupancy, active-patient and staffing figures per
+    (branch, department) in memory and re-evaluates only the scope touched by
+    each event. Active-patient counts are re-read from the branch's shard on
+    every admission or discharge, so they stay correct across worker processes.
+    Open alerts are de-duplicated by alert_key (enforced in MySQL by
+    uq_open_alert_key) and resolved automatically once the metric recovers.
+    Whether an alert is open is read from its resource_alerts row at each
+    evaluation, since another worker may have raised or resolved it.
+    """
+
+    def __init__(self, connection_factory, connections_factory):
+        self.connection_factory = connection_factory      # branch_id -> connection to the branch's shard
+        self.connections_factory = connections_factory    # () -> [connection per shard], home database first
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.thresholds = {}        # (branch_id, dept_id or None) -> dict
+        self.icu_beds = {}          # branch_id -> ICU bed capacity
+        self.occupancy = {}         # (branch_id, dept_id or None) -> (occupied, total, icu_occupied)
+        self.active_patients = {}   # (branch_id, dept_id) -> count
+        self.doctors = {}           # (branch_id, dept_id) -> count
+        self.open_alerts = {}       # alert_key -> severity, as last read or written by this process
+
+    def load(self):
+        """Seed in-memory state: rules and reference tables from the home database, live figures from every shard"""
+        try:
+            connections = self.connections_factory()
+        except Error as e:
+            print(f"Alert state load failed: {e}")
+            return False
+        active, occupancy, open_alerts = {}, {}, {}
+        try:
+            cursor = connections[0].cursor()
+            try:
+                cursor.execute("""
+                    SELECT branch_id, dept_id, max_occupancy_rate, min_free_icu_beds, max_patients_per_doctor
+                    FROM alert_thresholds
+                """)
+                thresholds = {}
+                for branch_id, dept_id, max_occ, min_icu, max_ratio in cursor.fetchall():
+                    thresholds[(branch_id, dept_id)] = {
+                        'max_occupancy_rate': float(max_occ),
+                        'min_free_icu_beds': int(min_icu),
+                        'max_patients_per_doctor': float(max_ratio),
+                    }
+
+                cursor.execute("SELECT branch_id, icu_beds FROM branches")
+                icu_beds = dict(cursor.fetchall())
+
+                cursor.execute("""
+                    SELECT branch_id, dept_id, COUNT(*)
+                    FROM doctors
+                    GROUP BY branch_id, dept_id
+                """)
+                doctors = {(b, d): n for b, d, n in cursor.fetchall()}
+            finally:
+                cursor.close()
+
+            # A branch's admissions, snapshots and alerts live on its own shard
+            for conn in connections:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("""
+                        SELECT branch_id, dept_id, COUNT(*)
+                        FROM admissions
+                        WHERE status = 'Active'
+                        GROUP BY branch_id, dept_id
+                    """)
+                    active.update(((b, d), n) for b, d, n in cursor.fetchall())
+
+                    # Latest snapshot per scope
+                    cursor.execute("""
+                        SELECT bod.branch_id, bod.dept_id, bod.occupied_beds, bod.total_beds, bod.icu_occupied
+                        FROM bed_occupancy_daily bod
+                        JOIN (
+                            SELECT branch_id, dept_id, MAX(record_id) as record_id
+                            FROM bed_occupancy_daily
+                            WHERE snapshot_date >= DATE_SUB(CURRENT_DATE, INTERVAL 1 DAY)
+                            GROUP BY branch_id, dept_id
+                        ) latest ON bod.record_id = latest.record_id
+                    """)
+                    occupancy.update(((b, d), (occ, total, icu)) for b, d, occ, total, icu in cursor.fetchall())
+
+                    cursor.execute("""
+                        SELECT alert_key, severity
+                        FROM resource_alerts
+                        WHERE resolved = FALSE AND alert_key IS NOT NULL
+                    """)
+                    open_alerts.update(cursor.fetchall())
+                finally:
+                    cursor.close()
+        except Error as e:
+            print(f"Alert state load failed: {e}")
+            return False
+        finally:
+            for conn in connections:
+                conn.close()
+
+        with self.lock:
+            self.thresholds = thresholds
+            self.icu_beds = icu_beds
+            self.doctors = doctors
+            self.active_patients = active
+            self.occupancy = occupancy
+            self.open_alerts = open_alerts
+            self.loaded = True
+        return True
+
+    def ensure_loaded(self):
+        """Load state on first use"""
+        if not self.loaded:
+            self.load()
+
+    def thresholds_for(self, branch_id, dept_id):
+        """Most specific threshold set for a scope"""
+        return (self.thresholds.get((branch_id, dept_id))
+                or self.thresholds.get((branch_id, None))
+                or DEFAULT_THRESHOLDS)
+
+    # ============== EVENT HANDLERS ==============
+
+    def on_occupancy(self, branch_id, dept_id, occupied_beds, total_beds, icu_occupied=None):
+        """Record an occupancy snapshot and evaluate the rules it affects"""
+        self.ensure_loaded()
+        with self.lock:
+            self.occupancy[(branch_id, dept_id)] = (occupied_beds, total_beds, icu_occupied)
+            changes = [self._evaluate_occupancy(branch_id, dept_id)]
+            if dept_id is None:
+                changes.append(self._evaluate_icu(branch_id))
+        return self._apply(branch_id, changes)
+
+    def on_admission(self, branch_id, dept_id):
+        """Count a new active patient and evaluate the staffing rule"""
+        return self._on_census_change(branch_id, dept_id, 1)
+
+    def on_discharge(self, branch_id, dept_id):
+        """Release an active patient and evaluate the staffing rule"""
+        return self._on_census_change(branch_id, dept_id, -1)
+
+    def _on_census_change(self, branch_id, dept_id, delta):
+        """Re-read the scope's active patients (other workers ingest too) and evaluate the staffing rule"""
+        self.ensure_loaded()
+        active = self._count_active(branch_id, dept_id)
+        with self.lock:
+            key = (branch_id, dept_id)
+            if active is None:      # database unreachable: fall back to this process's own count
+                active = max(0, self.active_patients.get(key, 0) + delta)
+            self.active_patients[key] = active
+            changes = [self._evaluate_staffing(branch_id, dept_id)]
+        return self._apply(branch_id, changes)
+
+    def _count_active(self, branch_id, dept_id):
+        """Active admissions of a branch/department on its shard, or None without a connection"""
+        conn = self.connection_factory(branch_id)
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM admissions
+                WHERE status = 'Active' AND branch_id = %s AND dept_id = %s
+            """, (branch_id, dept_id))
+            return cursor.fetchone()[0]
+        except Error as e:
+            print(f"Active patient count failed: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    # ============== RULES ==============
+    # Each rule returns (alert_key, verdict) where verdict is 'hold' when the
+    # metric is unknown, or (breached, clear, alert) with alert being
+    # (alert_type, severity, message, branch_id, dept_id). _apply turns a
+    # verdict into a transition against the alert's current database row.
+
+    def _evaluate_occupancy(self, branch_id, dept_id):
+        occupied, total, _ = self.occupancy[(branch_id, dept_id)]
+        limit = self.thresholds_for(branch_id, dept_id)['max_occupancy_rate']
+        rate = (occupied / total * 100) if total else 0
+        key = alert_key('High_Occupancy', branch_id, dept_id)
+        scope = 'Department' if dept_id is not None else 'Branch'
+        alert = ('High_Occupancy', occupancy_severity(rate, limit),
+                 f"{scope} occupancy at {rate:.1f}% exceeds {limit:.0f}% threshold",
+                 branch_id, dept_id)
+        return key, (rate > limit,
+                     rate <= limit - RESOLVE_MARGIN['High_Occupancy'], alert)
+
+    def _evaluate_icu(self, branch_id):
+        _, _, icu_occupied = self.occupancy[(branch_id, None)]
+        capacity = self.icu_beds.get(branch_id)
+        key = alert_key('Bed_Shortage', branch_id, None)
+        if icu_occupied is None or capacity is None:
+            return key, 'hold'
+        minimum = self.thresholds_for(branch_id, None)['min_free_icu_beds']
+        free = capacity - icu_occupied
+        alert = ('Bed_Shortage', icu_severity(free, minimum),
+                 f"ICU beds running low - only {max(free, 0)} available",
+                 branch_id, None)
+        return key, (free < minimum,
+                     free >= minimum + RESOLVE_MARGIN['Bed_Shortage'], alert)
+
+    def _evaluate_staffing(self, branch_id, dept_id):
+        key = alert_key('Staff_Shortage', branch_id, dept_id)
+        doctors = self.doctors.get((branch_id, dept_id), 0)
+        if not doctors:
+            return key, 'hold'
+        limit = self.thresholds_for(branch_id, dept_id)['max_patients_per_doctor']
+        ratio = self.active_patients.get((branch_id, dept_id), 0) / doctors
+        alert = ('Staff_Shortage', staffing_severity(ratio, limit),
+                 f"{ratio:.1f} active patients per doctor exceeds limit of {limit:.1f}",
+                 branch_id, dept_id)
+        return key, (ratio > limit,
+                     ratio <= limit - RESOLVE_MARGIN['Staff_Shortage'], alert)
+
+    # ============== PERSISTENCE ==============
+
+    def _apply(self, branch_id, changes):
+        """
+        Write only state transitions (raise, escalate/de-escalate, or resolve) to
+        the branch's shard. Hysteresis reads the open alerts from the database in
+        the same transaction, and in-memory state changes only once the write
+        is committed, so a failed write is retried by the next event.
+        """
+        changes = [(key, verdict) for key, verdict in changes if verdict != 'hold']
+        if not changes:
+            return {'raised': [], 'resolved': []}
+
+        conn = self.connection_factory(branch_id)
+        if not conn:
+            return {'raised': [], 'resolved': []}
+        cursor = conn.cursor()
+        raised, resolved = [], []
+        try:
+            conn.start_transaction()
+            keys = [key for key, _ in changes]
+            cursor.execute(f"""
+                SELECT open_alert_key, severity
+                FROM resource_alerts
+                WHERE open_alert_key IN ({', '.join(['%s'] * len(keys))})
+                FOR UPDATE
+            """, keys)
+            current = dict(cursor.fetchall())
+
+            now = datetime.now()
+            for key, (breached, clear, alert) in changes:
+                if breached and current.get(key) != alert[1]:
+                    alert_type, severity, message, alert_branch, dept_id = alert
+                    cursor.execute("""
+                        INSERT INTO resource_alerts
+                        (branch_id, dept_id, alert_type, severity, alert_message, alert_date, resolved, alert_key)
+                        VALUES (%s, %s, %s, %s, %s, %s, FALSE, %s)
+                        ON DUPLICATE KEY UPDATE
+                            severity = VALUES(severity),
+                            alert_message = VALUES(alert_message)
+                    """, (alert_branch, dept_id, alert_type, severity, message, now, key))
+                    raised.append((key, severity))
+                elif not breached and clear and key in current:
+                    cursor.execute("""
+                        UPDATE resource_alerts
+                        SET resolved = TRUE, resolved_at = %s
+                        WHERE open_alert_key = %s
+                    """, (now, key))
+                    resolved.append(key)
+            conn.commit()
+        except Error as e:
+            conn.rollback()
+            print(f"Alert write failed: {e}")
+            return {'raised': [], 'resolved': []}
+        finally:
+            cursor.close()
+            conn.close()
+
+        with self.lock:
+            for key, _ in changes:
+                if key in current:
+                    self.open_alerts[key] = current[key]
+                else:
+                    self.open_alerts.pop(key, None)
+            self.open_alerts.update(raised)
+            for key in resolved:
+                self.open_alerts.pop(key, None)
+        return {'raised': [key for key, _ in raised], 'resolved': resolved}
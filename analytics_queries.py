@@ -0,0 +1,1031 @@
+"""
+Analytics API Query Plans for Hospital Analytics
+SQL and payload shaping for every read endpoint, shared by the Flask (sync)
+and Quart (async) servers through query_plan drivers
+"""
+
+from datetime import datetime, timedelta
+
+from admission_sample import Estimate, SampleEstimator, approximate_fields, strata_query
+from downsampling import GRANULARITIES, downsample, parse_day, trend_window
+from los_sketch import LOSSketch
+from patient_sketch import RELATIVE_ERROR, PatientSketch
+from period_reports import PARTIAL_TYPES, PERIODS, assemble_period, partial_query, period_bounds
+from query_plan import Query, BadRequest, Scatter, concat_partials, merge_rows, merge_sums, ratio
+from result_mapping import ColumnTypes, FLOAT, INT
+
+
+def days_ago(days):
+    """Window start as a bind parameter, so range predicates can prune partitions"""
+    return datetime.now().date() - timedelta(days=days)
+
+def month_range(month):
+    """Return [first day, first day of next month) for a YYYY-MM string"""
+    start = datetime.strptime(month, '%Y-%m').date()
+    end = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start, end
+
+# Column types per query: DECIMAL averages and sums become floats column-wise
+ADMISSION_TREND_TYPES = ColumnTypes(emergency_admissions=INT, scheduled_admissions=INT)
+BED_OCCUPANCY_PARTIAL_TYPES = ColumnTypes(occupancy_sum=FLOAT, icu_sum=INT, general_sum=INT)
+DEPARTMENT_PARTIAL_TYPES = ColumnTypes(los_days=INT, emergency_cases=INT, cost_sum=FLOAT)
+BRANCH_PARTIAL_TYPES = ColumnTypes.floats('los_days', 'occupancy_sum', 'total_revenue')
+DOCTOR_PARTIAL_TYPES = ColumnTypes(duration_sum=INT)
+REPORT_SUMMARY_TYPES = ColumnTypes.floats('los_days', 'total_revenue')
+REPORT_BREAKDOWN_TYPES = ColumnTypes.floats('los_days', 'revenue')
+LOS_BUCKET_TYPES = ColumnTypes(stays=INT)
+KPI_COUNT_TYPES = ColumnTypes(total_discharges=INT, active_patients=INT, los_days=INT)
+OCCUPANCY_SUM_TYPES = ColumnTypes(occupancy_sum=FLOAT)
+READMISSION_TYPES = ColumnTypes(readmissions=INT)
+COST_SUM_TYPES = ColumnTypes(cost_sum=FLOAT)
+
+# Length-of-stay grouping: (group key, group label) columns of los_sketch_daily joins
+LOS_GROUPS = {
+    'department': ("s.dept_id", "d.dept_name"),
+    'branch': ("s.branch_id", "b.branch_name"),
+    'day': ("DATE_FORMAT(s.discharge_day, '%Y-%m-%d')", "DATE_FORMAT(s.discharge_day, '%Y-%m-%d')"),
+}
+
+# Active alerts listed, most severe first
+ALERT_SEVERITIES = ('Critical', 'High', 'Medium', 'Low')
+ACTIVE_ALERT_LIMIT = 50
+
+# Unique-patient grouping: (group key, group label) columns of patient_hll_daily joins
+PATIENT_GROUPS = {
+    'branch': ("h.branch_id", "b.branch_name"),
+    'department': ("h.dept_id", "d.dept_name"),
+}
+
+# ============== CORE KPI PLANS ==============
+
+def patient_registers(args, first_day=None, last_day=None, group_by=None):
+    """Query for the merged HyperLogLog registers (per group) of patients admitted between two days"""
+    where_conditions = []
+    params = []
+
+    if first_day:
+        where_conditions.append("h.admission_day >= %s")
+        params.append(first_day)
+    if last_day:
+        where_conditions.append("h.admission_day <= %s")
+        params.append(last_day)
+    for column in ('branch_id', 'dept_id'):
+        if args.get(column):
+            where_conditions.append(f"h.{column} = %s")
+            params.append(args.get(column))
+
+    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    if group_by is None:
+        return Query(f"""
+            SELECT h.register_index, MAX(h.max_rank) as max_rank
+            FROM patient_hll_daily h
+            {where_clause}
+            GROUP BY h.register_index
+        """, params)
+
+    group_key, group_label = PATIENT_GROUPS[group_by]
+    return Query(f"""
+        SELECT
+            {group_key} as group_key,
+            {group_label} as group_label,
+            h.register_index,
+            MAX(h.max_rank) as max_rank
+        FROM patient_hll_daily h
+        JOIN branches b ON h.branch_id = b.branch_id
+        JOIN departments d ON h.dept_id = d.dept_id
+        {where_clause}
+        GROUP BY group_key, group_label, h.register_index
+    """, params)
+
+def kpi_patient_registers(args):
+    """patient_registers() under the KPI start_date and end_date filters"""
+    start_date, end_date = args.get('start_date'), args.get('end_date')
+    return patient_registers(args,
+                             parse_day(start_date[:10], 'start_date') if start_date else None,
+                             parse_day(end_date[:10], 'end_date') if end_date else None)
+
+def current_occupancy(branch_id=None):
+    """Sum and count of today's occupancy snapshots"""
+    if branch_id:
+        return Query("""
+            SELECT SUM(occupancy_rate) as occupancy_sum, COUNT(occupancy_rate) as occupancy_count
+            FROM bed_occupancy_daily
+            WHERE branch_id = %s AND snapshot_date = CURRENT_DATE
+        """, (branch_id,), one=True, types=OCCUPANCY_SUM_TYPES)
+    return Query("""
+        SELECT SUM(occupancy_rate) as occupancy_sum, COUNT(occupancy_rate) as occupancy_count
+        FROM bed_occupancy_daily
+        WHERE snapshot_date = CURRENT_DATE
+    """, one=True, types=OCCUPANCY_SUM_TYPES)
+
+def kpi_partials(args):
+    """KPI sums and counts for one database; averages are formed after merging"""
+    branch_id = args.get('branch_id')
+    dept_id = args.get('dept_id')
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+
+    # Build WHERE clause
+    where_conditions = []
+    params = []
+
+    if branch_id:
+        where_conditions.append("a.branch_id = %s")
+        params.append(branch_id)
+    if dept_id:
+        where_conditions.append("a.dept_id = %s")
+        params.append(dept_id)
+    if start_date:
+        where_conditions.append("a.admission_date >= %s")
+        params.append(start_date)
+    if end_date:
+        where_conditions.append("a.admission_date <= %s")
+        params.append(end_date)
+
+    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    discharged_clause = "WHERE " + " AND ".join(where_conditions + ["a.discharge_date IS NOT NULL"])
+
+    # Child rows never predate their admission, so the window's lower bound
+    # can be repeated on them to prune their partitions too
+    procedure_where = where_clause + (" AND pp.procedure_date >= %s" if start_date else "")
+    procedure_params = params + ([start_date] if start_date else [])
+
+    # Patient Counts and total stay days for the Average Length of Stay (ALOS)
+    counts = yield Query(f"""
+        SELECT
+            COUNT(*) as total_admissions,
+            SUM(CASE WHEN status = 'Discharged' THEN 1 ELSE 0 END) as total_discharges,
+            SUM(CASE WHEN status = 'Active' THEN 1 ELSE 0 END) as active_patients,
+            SUM(DATEDIFF(COALESCE(discharge_date, CURRENT_DATE), admission_date)) as los_days
+        FROM admissions a
+        {where_clause}
+    """, params, one=True, types=KPI_COUNT_TYPES)
+
+    # Bed Occupancy Rate (current)
+    occupancy = yield current_occupancy(branch_id)
+
+    # Readmissions (30-day), derived from patient admission sequences (readmissions.py);
+    # admission_gaps carries the admission's branch, department and date, so the same filters apply
+    readmission_data = yield Query(f"""
+        SELECT
+            COUNT(*) as discharged,
+            SUM(CASE WHEN a.readmitted_30d THEN 1 ELSE 0 END) as readmissions
+        FROM admission_gaps a
+        {discharged_clause}
+    """, params, one=True, types=READMISSION_TYPES)
+
+    # Procedure Volume
+    procedure_result = yield Query(f"""
+        SELECT COUNT(*) as procedure_volume
+        FROM patient_procedures pp
+        JOIN admissions a ON pp.admission_id = a.admission_id
+        {procedure_where}
+    """, procedure_params, one=True)
+
+    # Emergency vs Scheduled
+    rows = yield Query(f"""
+        SELECT
+            admission_type,
+            COUNT(*) as count
+        FROM admissions a
+        {where_clause}
+        GROUP BY admission_type
+    """, params)
+
+    # Cost per Patient
+    cost_result = yield Query(f"""
+        SELECT SUM(b.total_amount) as cost_sum, COUNT(b.total_amount) as cost_count
+        FROM billing b
+        JOIN admissions a ON b.admission_id = a.admission_id
+        {where_clause}
+    """, params, one=True, types=COST_SUM_TYPES)
+
+    # Unique patients, merged from the daily HyperLogLog sketches (patient_sketch.py);
+    # per-shard register lists are concatenated by the merge and maxed in kpi_finish
+    registers = yield kpi_patient_registers(args)
+
+    return dict(counts, **occupancy, **readmission_data, **procedure_result, **cost_result,
+                admission_types={row['admission_type']: row['count'] for row in rows},
+                patient_registers=registers)
+
+def kpi_finish(partial, args):
+    """KPI payload from (merged) sums and counts"""
+    discharged = partial['discharged']
+    readmission_rate = (partial['readmissions'] / discharged * 100) if discharged > 0 else 0
+    admission_types = partial['admission_types']
+
+    return {
+        'alos': round(ratio(partial['los_days'], partial['total_admissions']) or 0, 2),
+        'bed_occupancy_rate': round(ratio(partial['occupancy_sum'], partial['occupancy_count']) or 0, 2),
+        'total_admissions': partial['total_admissions'],
+        'total_discharges': partial['total_discharges'],
+        'active_patients': partial['active_patients'],
+        'readmission_rate': round(readmission_rate, 2),
+        'procedure_volume': partial['procedure_volume'],
+        'emergency_cases': admission_types.get('Emergency', 0),
+        'scheduled_cases': admission_types.get('Scheduled', 0),
+        'avg_cost_per_patient': round(ratio(partial['cost_sum'], partial['cost_count']) or 0, 2),
+        'unique_patients': PatientSketch.from_rows(partial['patient_registers']).count()
+    }
+
+# Overall KPI summary with filters
+kpi_summary = Scatter(kpi_partials, merge_sums, kpi_finish)
+
+def admission_trend_partials(args):
+    """Admission counts per period for one database"""
+    start, end, granularity, _ = trend_window(args, 90)
+    branch_id = args.get('branch_id')
+    dept_id = args.get('dept_id')
+    bucket, label, _ = GRANULARITIES[granularity]
+
+    where_conditions = ["admission_date >= %s", "admission_date < %s"]
+    params = [start, end]
+
+    if branch_id:
+        where_conditions.append("branch_id = %s")
+        params.append(branch_id)
+    if dept_id:
+        where_conditions.append("dept_id = %s")
+        params.append(dept_id)
+
+    where_clause = "WHERE " + " AND ".join(where_conditions)
+
+    results = yield Query(f"""
+        SELECT
+            DATE_FORMAT({bucket.format(column='admission_date')}, '{label}') as period,
+            COUNT(*) as total_admissions,
+            SUM(CASE WHEN admission_type = 'Emergency' THEN 1 ELSE 0 END) as emergency_admissions,
+            SUM(CASE WHEN admission_type = 'Scheduled' THEN 1 ELSE 0 END) as scheduled_admissions
+        FROM admissions
+        {where_clause}
+        GROUP BY period
+    """, params, types=ADMISSION_TREND_TYPES)
+
+    return results.records()
+
+def merge_admission_periods(partials):
+    """A period spans every shard: add its counts"""
+    return merge_rows(partials, 'period')
+
+def admission_trend_finish(rows, args):
+    """Periods in order, downsampled to the point budget"""
+    points = trend_window(args, 90)[3]
+    return downsample(sorted(rows, key=lambda row: row['period']), points, 'total_admissions')
+
+# Admission trends over any date range, bucketed and downsampled to the point budget
+admission_trends = Scatter(admission_trend_partials, merge_admission_periods, admission_trend_finish)
+
+def bed_occupancy_partials(args):
+    """Occupancy sums and counts per period for one database"""
+    start, end, granularity, _ = trend_window(args, 30)
+    branch_id = args.get('branch_id')
+    dept_id = args.get('dept_id')
+    bucket, label, _ = GRANULARITIES[granularity]
+
+    where_conditions = ["snapshot_date >= %s", "snapshot_date < %s"]
+    params = [start, end]
+
+    if branch_id:
+        where_conditions.append("branch_id = %s")
+        params.append(branch_id)
+    if dept_id:
+        where_conditions.append("dept_id = %s")
+        params.append(dept_id)
+
+    where_clause = "WHERE " + " AND ".join(where_conditions)
+
+    results = yield Query(f"""
+        SELECT
+            DATE_FORMAT({bucket.format(column='snapshot_date')}, '{label}') as date,
+            SUM(occupancy_rate) as occupancy_sum,
+            COUNT(occupancy_rate) as occupancy_count,
+            SUM(icu_occupied) as icu_sum,
+            COUNT(icu_occupied) as icu_count,
+            SUM(general_occupied) as general_sum,
+            COUNT(general_occupied) as general_count
+        FROM bed_occupancy_daily
+        {where_clause}
+        GROUP BY date
+    """, params, types=BED_OCCUPANCY_PARTIAL_TYPES)
+
+    return results.records()
+
+def merge_occupancy_periods(partials):
+    """A period spans every shard: add its sums and counts"""
+    return merge_rows(partials, 'date')
+
+def bed_occupancy_finish(rows, args):
+    """Period averages in order, downsampled to the point budget"""
+    points = trend_window(args, 30)[3]
+    records = [
+        {
+            'date': row['date'],
+            'avg_occupancy': ratio(row['occupancy_sum'], row['occupancy_count']),
+            'avg_icu_occupied': ratio(row['icu_sum'], row['icu_count']),
+            'avg_general_occupied': ratio(row['general_sum'], row['general_count'])
+        }
+        for row in sorted(rows, key=lambda row: row['date'])
+    ]
+    return downsample(records, points, 'avg_occupancy')
+
+# Bed occupancy trends over any date range, bucketed and downsampled to the point budget
+bed_occupancy_trends = Scatter(bed_occupancy_partials, merge_occupancy_periods, bed_occupancy_finish)
+
+def department_forecast(args, forecast_cache, max_horizon):
+    """Next-week bed occupancy and admission forecast for every department"""
+    branch_id = args.get('branch_id', type=int)
+    horizon = min(max(args.get('horizon', 7, type=int), 1), max_horizon)
+
+    model = yield from forecast_cache.plan(branch_id)
+
+    return {
+        'branch_id': branch_id,
+        'trained_through': model.last_day.isoformat(),
+        'horizon_days': horizon,
+        'departments': model.predict(horizon)
+    }
+
+def department_partials(args):
+    """Per-department sums and counts, and each department's distinct procedures, for one database"""
+    branch_id = args.get('branch_id')
+
+    where_clause = "WHERE d.branch_id = %s" if branch_id else ""
+    params = [branch_id] if branch_id else []
+
+    # Sums and counts over the same joined rows as the single-database AVGs
+    departments = yield Query(f"""
+        SELECT
+            d.dept_id,
+            d.dept_name,
+            COUNT(DISTINCT a.admission_id) as total_admissions,
+            SUM(DATEDIFF(COALESCE(a.discharge_date, CURRENT_DATE), a.admission_date)) as los_days,
+            COUNT(a.admission_id) as los_count,
+            SUM(CASE WHEN a.admission_type = 'Emergency' THEN 1 ELSE 0 END) as emergency_cases,
+            SUM(b.total_amount) as cost_sum,
+            COUNT(b.total_amount) as cost_count
+        FROM departments d
+        LEFT JOIN admissions a ON d.dept_id = a.dept_id
+        LEFT JOIN patient_procedures pp ON a.admission_id = pp.admission_id
+        LEFT JOIN billing b ON a.admission_id = b.admission_id
+        {where_clause}
+        GROUP BY d.dept_id, d.dept_name
+    """, params, types=DEPARTMENT_PARTIAL_TYPES)
+
+    # Distinct procedure counts do not add up across shards, so the (department, procedure) pairs are merged
+    procedures = yield Query(f"""
+        SELECT DISTINCT d.dept_id, pp.procedure_id
+        FROM departments d
+        JOIN admissions a ON d.dept_id = a.dept_id
+        JOIN patient_procedures pp ON a.admission_id = pp.admission_id
+        {where_clause}
+    """, params)
+
+    return {'departments': departments.records(), 'procedures': procedures}
+
+def merge_department_partials(partials):
+    """Every shard reports every (replicated) department: add the sums and pool the procedure pairs"""
+    return {
+        'departments': merge_rows([partial['departments'] for partial in partials], 'dept_id', keep=('dept_name',)),
+        'procedures': concat_partials([partial['procedures'] for partial in partials]),
+    }
+
+def department_finish(partial, args):
+    """Department comparison payload, most admissions first"""
+    procedures = {}
+    for row in partial['procedures']:
+        procedures.setdefault(row['dept_id'], set()).add(row['procedure_id'])
+
+    rows = sorted(partial['departments'], key=lambda row: row['total_admissions'], reverse=True)
+    return [
+        {
+            'dept_name': row['dept_name'],
+            'total_admissions': row['total_admissions'],
+            'avg_los': ratio(row['los_days'], row['los_count']),
+            'total_procedures': len(procedures.get(row['dept_id'], ())),
+            'emergency_cases': row['emergency_cases'],
+            'avg_cost': ratio(row['cost_sum'], row['cost_count'])
+        }
+        for row in rows
+    ]
+
+# Metrics compared across departments
+department_comparison = Scatter(department_partials, merge_department_partials, department_finish)
+
+def branch_partials(args):
+    """Per-branch sums and counts for one database"""
+    results = yield Query("""
+        SELECT
+            b.branch_id,
+            b.branch_name,
+            b.total_beds,
+            COUNT(DISTINCT a.admission_id) as total_admissions,
+            SUM(DATEDIFF(COALESCE(a.discharge_date, CURRENT_DATE), a.admission_date)) as los_days,
+            COUNT(a.admission_id) as los_count,
+            SUM(bod.occupancy_rate) as occupancy_sum,
+            COUNT(bod.occupancy_rate) as occupancy_count,
+            SUM(bil.total_amount) as total_revenue,
+            COUNT(bil.total_amount) as billed_count
+        FROM branches b
+        LEFT JOIN admissions a ON b.branch_id = a.branch_id
+        LEFT JOIN bed_occupancy_daily bod ON b.branch_id = bod.branch_id
+            AND bod.snapshot_date >= %s
+        LEFT JOIN billing bil ON a.admission_id = bil.admission_id
+        GROUP BY b.branch_id, b.branch_name, b.total_beds
+    """, (days_ago(30),), types=BRANCH_PARTIAL_TYPES)
+
+    return results.records()
+
+def merge_branch_partials(partials):
+    """Every shard reports every (replicated) branch; only the owning shard has non-zero sums"""
+    return merge_rows(partials, 'branch_id', keep=('branch_name', 'total_beds'))
+
+def branch_finish(rows, args):
+    """Branch comparison payload, most admissions first"""
+    rows = sorted(rows, key=lambda row: row['total_admissions'], reverse=True)
+    return [
+        {
+            'branch_name': row['branch_name'],
+            'total_beds': row['total_beds'],
+            'total_admissions': row['total_admissions'],
+            'avg_los': ratio(row['los_days'], row['los_count']),
+            'avg_occupancy': ratio(row['occupancy_sum'], row['occupancy_count']),
+            'total_revenue': row['total_revenue'],
+            'avg_revenue_per_patient': ratio(row['total_revenue'], row['billed_count'])
+        }
+        for row in rows
+    ]
+
+# Metrics compared across hospital branches
+branch_comparison = Scatter(branch_partials, merge_branch_partials, branch_finish)
+
+def doctor_partials(args):
+    """Per-doctor counts and procedure duration sums, and each doctor's distinct procedures, for one database"""
+    dept_id = args.get('dept_id')
+    branch_id = args.get('branch_id')
+
+    where_conditions = []
+    params = []
+
+    if dept_id:
+        where_conditions.append("doc.dept_id = %s")
+        params.append(dept_id)
+    if branch_id:
+        where_conditions.append("doc.branch_id = %s")
+        params.append(branch_id)
+
+    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+
+    doctors = yield Query(f"""
+        SELECT
+            doc.doctor_id,
+            doc.doctor_name,
+            dep.dept_name,
+            doc.working_hours_per_week,
+            COUNT(DISTINCT a.admission_id) as patients_handled,
+            SUM(pp.duration_minutes) as duration_sum,
+            COUNT(pp.duration_minutes) as duration_count
+        FROM doctors doc
+        LEFT JOIN departments dep ON doc.dept_id = dep.dept_id
+        LEFT JOIN admissions a ON doc.doctor_id = a.doctor_id
+            AND a.admission_date >= %s
+        LEFT JOIN patient_procedures pp ON doc.doctor_id = pp.doctor_id
+            AND pp.procedure_date >= %s
+        {where_clause}
+        GROUP BY doc.doctor_id, doc.doctor_name, dep.dept_name, doc.working_hours_per_week
+    """, [days_ago(30), days_ago(30)] + params, types=DOCTOR_PARTIAL_TYPES)
+
+    procedures = yield Query(f"""
+        SELECT DISTINCT doc.doctor_id, pp.procedure_id
+        FROM doctors doc
+        JOIN patient_procedures pp ON doc.doctor_id = pp.doctor_id
+            AND pp.procedure_date >= %s
+        {where_clause}
+    """, [days_ago(30)] + params)
+
+    return {'doctors': doctors.records(), 'procedures': procedures}
+
+def merge_doctor_partials(partials):
+    """Every shard reports every (replicated) doctor: add the counts and pool the procedure pairs"""
+    return {
+        'doctors': merge_rows([partial['doctors'] for partial in partials], 'doctor_id',
+                              keep=('doctor_name', 'dept_name', 'working_hours_per_week')),
+        'procedures': concat_partials([partial['procedures'] for partial in partials]),
+    }
+
+def doctor_finish(partial, args):
+    """Doctor utilization payload, busiest doctors first"""
+    procedures = {}
+    for row in partial['procedures']:
+        procedures.setdefault(row['doctor_id'], set()).add(row['procedure_id'])
+
+    results = []
+    for row in sorted(partial['doctors'], key=lambda row: row['patients_handled'], reverse=True):
+        patients = row['patients_handled']
+        performed = len(procedures.get(row['doctor_id'], ()))
+        results.append({
+            'doctor_name': row['doctor_name'],
+            'dept_name': row['dept_name'],
+            'working_hours_per_week': row['working_hours_per_week'],
+            'patients_handled': patients,
+            'procedures_performed': performed,
+            'avg_procedure_duration': ratio(row['duration_sum'], row['duration_count']),
+            'utilization_percentage': min(100, round(((patients * 0.5 + performed * 1.5)
+                                                      / row['working_hours_per_week'] * 100), 2))
+        })
+    return results
+
+# Doctor utilization statistics
+doctor_utilization = Scatter(doctor_partials, merge_doctor_partials, doctor_finish)
+
+def outcome_partials(args):
+    """Outcome counts per type for one database"""
+    branch_id = args.get('branch_id')
+    dept_id = args.get('dept_id')
+
+    where_conditions = []
+    params = []
+
+    if branch_id:
+        where_conditions.append("a.branch_id = %s")
+        params.append(branch_id)
+    if dept_id:
+        where_conditions.append("a.dept_id = %s")
+        params.append(dept_id)
+
+    where_conditions.append("o.outcome_date >= %s")
+    params.append(days_ago(90))
+
+    where_clause = "WHERE " + " AND ".join(where_conditions)
+
+    results = yield Query(f"""
+        SELECT
+            o.outcome_type,
+            COUNT(*) as count
+        FROM outcomes o
+        JOIN admissions a ON o.admission_id = a.admission_id
+        {where_clause}
+        GROUP BY o.outcome_type
+    """, params)
+
+    return results
+
+def merge_outcome_partials(partials):
+    """Add the counts of each outcome type across shards"""
+    return merge_rows(partials, 'outcome_type')
+
+def outcome_finish(rows, args):
+    """Outcome counts, most frequent first"""
+    return sorted(rows, key=lambda row: row['count'], reverse=True)
+
+# Patient outcome statistics
+outcomes_summary = Scatter(outcome_partials, merge_outcome_partials, outcome_finish)
+
+def los_partials(args):
+    """Length-of-stay sketch buckets per group for one database"""
+    branch_id = args.get('branch_id')
+    dept_id = args.get('dept_id')
+    group_by = args.get('group_by', 'department')
+    if group_by not in LOS_GROUPS:
+        raise BadRequest(f"group_by must be one of: {', '.join(LOS_GROUPS)}")
+
+    where_conditions = ["s.discharge_day >= %s", "s.discharge_day <= %s"]
+    params = [args.get('start_date') or days_ago(90), args.get('end_date') or datetime.now().date()]
+
+    if branch_id:
+        where_conditions.append("s.branch_id = %s")
+        params.append(branch_id)
+    if dept_id:
+        where_conditions.append("s.dept_id = %s")
+        params.append(dept_id)
+
+    where_clause = "WHERE " + " AND ".join(where_conditions)
+    group_key, group_label = LOS_GROUPS[group_by]
+
+    results = yield Query(f"""
+        SELECT
+            {group_key} as group_key,
+            {group_label} as group_label,
+            s.bucket,
+            SUM(s.stays) as stays
+        FROM los_sketch_daily s
+        JOIN branches b ON s.branch_id = b.branch_id
+        JOIN departments d ON s.dept_id = d.dept_id
+        {where_clause}
+        GROUP BY group_key, group_label, s.bucket
+    """, params, types=LOS_BUCKET_TYPES)
+
+    return results.records()
+
+def los_finish(rows, args):
+    """Median/p90/p99 and histogram overall and per group from merged sketches"""
+    overall = LOSSketch()
+    groups = {}
+    for row in rows:
+        overall.add_bucket(row['bucket'], row['stays'])
+        if row['group_key'] not in groups:
+            groups[row['group_key']] = (row['group_label'], LOSSketch())
+        groups[row['group_key']][1].add_bucket(row['bucket'], row['stays'])
+
+    return {
+        'group_by': args.get('group_by', 'department'),
+        'start_date': str(args.get('start_date') or days_ago(90)),
+        'end_date': str(args.get('end_date') or datetime.now().date()),
+        'overall': overall.stats(),
+        'groups': [
+            dict(key=key, label=label, **sketch.stats())
+            for key, (label, sketch) in sorted(groups.items())
+        ]
+    }
+
+# Length-of-stay distribution (median, p90, p99, histogram) for any date range
+los_distribution = Scatter(los_partials, concat_partials, los_finish)
+
+def unique_patient_partials(args):
+    """Merged HyperLogLog registers, per group when asked, for one database"""
+    group_by = args.get('group_by')
+    if group_by and group_by not in PATIENT_GROUPS:
+        raise BadRequest(f"group_by must be one of: {', '.join(PATIENT_GROUPS)}")
+    first_day = parse_day(args['start_date'], 'start_date') if args.get('start_date') else days_ago(90)
+    last_day = parse_day(args['end_date'], 'end_date') if args.get('end_date') else datetime.now().date()
+
+    results = yield patient_registers(args, first_day, last_day, group_by or None)
+    return results
+
+def unique_patient_finish(rows, args):
+    """Unique patients overall and per group; a patient seen by several groups counts once overall"""
+    overall = PatientSketch.from_rows(rows)
+    groups = {}
+    for row in rows if args.get('group_by') else ():
+        if row['group_key'] not in groups:
+            groups[row['group_key']] = (row['group_label'], PatientSketch())
+        groups[row['group_key']][1].add_register(row['register_index'], row['max_rank'])
+
+    payload = {
+        'start_date': args.get('start_date') or days_ago(90).isoformat(),
+        'end_date': args.get('end_date') or datetime.now().date().isoformat(),
+        'unique_patients': overall.count(),
+        'relative_error': round(RELATIVE_ERROR, 4),
+    }
+    if args.get('group_by'):
+        payload['group_by'] = args['group_by']
+        payload['groups'] = [
+            {'key': key, 'label': label, 'unique_patients': sketch.count()}
+            for key, (label, sketch) in sorted(groups.items())
+        ]
+    return payload
+
+# Unique patients for any date range and filter, merged from daily HyperLogLog sketches
+unique_patients = Scatter(unique_patient_partials, concat_partials, unique_patient_finish)
+
+def alert_partials(args):
+    """The most urgent active resource alerts of one database"""
+    branch_id = args.get('branch_id')
+
+    where_conditions = ["resolved = FALSE"]
+    params = []
+
+    if branch_id:
+        where_conditions.append("ra.branch_id = %s")
+        params.append(branch_id)
+
+    where_clause = "WHERE " + " AND ".join(where_conditions)
+
+    results = yield Query(f"""
+        SELECT
+            ra.alert_id,
+            ra.alert_type,
+            ra.severity,
+            ra.alert_message,
+            ra.alert_date,
+            b.branch_name,
+            d.dept_name
+        FROM resource_alerts ra
+        JOIN branches b ON ra.branch_id = b.branch_id
+        LEFT JOIN departments d ON ra.dept_id = d.dept_id
+        {where_clause}
+        ORDER BY
+            FIELD(ra.severity, 'Critical', 'High', 'Medium', 'Low'),
+            ra.alert_date DESC
+        LIMIT {ACTIVE_ALERT_LIMIT}
+    """, params)
+
+    return results
+
+def alert_finish(rows, args):
+    """Most severe first, newest first within a severity; the overall top is within each shard's top"""
+    rows = sorted(rows, key=lambda row: row['alert_date'] or datetime.min, reverse=True)
+    rows.sort(key=lambda row: ALERT_SEVERITIES.index(row['severity']))
+    return rows[:ACTIVE_ALERT_LIMIT]
+
+# Active resource alerts (each is stored on its branch's shard)
+active_alerts = Scatter(alert_partials, concat_partials, alert_finish)
+
+def peak_hour_partials(args):
+    """Admission counts per hour of day and day of week for one database"""
+    branch_id = args.get('branch_id')
+
+    where_conditions = ["admission_date >= %s"]
+    params = [days_ago(90)]
+
+    if branch_id:
+        where_conditions.append("branch_id = %s")
+        params.append(branch_id)
+
+    where_clause = "WHERE " + " AND ".join(where_conditions)
+
+    # Every hour is returned, since a shard's top ten is not the overall top ten
+    peak_hours = yield Query(f"""
+        SELECT
+            HOUR(admission_date) as hour,
+            COUNT(*) as admission_count
+        FROM admissions
+        {where_clause}
+        GROUP BY HOUR(admission_date)
+    """, params)
+
+    peak_days = yield Query(f"""
+        SELECT
+            DAYNAME(admission_date) as day_name,
+            DAYOFWEEK(admission_date) as day_number,
+            COUNT(*) as admission_count
+        FROM admissions
+        {where_clause}
+        GROUP BY DAYOFWEEK(admission_date), DAYNAME(admission_date)
+    """, params)
+
+    return {
+        'peak_hours': peak_hours,
+        'peak_days': peak_days
+    }
+
+def merge_peak_partials(partials):
+    """Add the counts of each hour and day across shards"""
+    return {
+        'peak_hours': merge_rows([partial['peak_hours'] for partial in partials], 'hour'),
+        'peak_days': merge_rows([partial['peak_days'] for partial in partials], 'day_number', keep=('day_name',)),
+    }
+
+def peak_finish(partial, args):
+    """Ten busiest hours and every day, busiest first"""
+    def busiest(rows):
+        return sorted(rows, key=lambda row: row['admission_count'], reverse=True)
+
+    return {
+        'peak_hours': busiest(partial['peak_hours'])[:10],
+        'peak_days': busiest(partial['peak_days'])
+    }
+
+# Peak admission hours/days for staffing optimization
+peak_hours = Scatter(peak_hour_partials, merge_peak_partials, peak_finish)
+
+def filter_options(args):
+    """Available filter options (branches, departments)"""
+    branches = yield Query("SELECT branch_id, branch_name, location FROM branches ORDER BY branch_name")
+
+    departments = yield Query("SELECT dept_id, dept_name, dept_type, branch_id FROM departments ORDER BY dept_name")
+
+    rows = yield Query("SELECT DISTINCT diagnosis_category FROM admissions WHERE diagnosis_category IS NOT NULL")
+    diagnoses = [row['diagnosis_category'] for row in rows]
+
+    rows = yield Query("SELECT DISTINCT insurance_type FROM patients")
+    insurance_types = [row['insurance_type'] for row in rows]
+
+    return {
+        'branches': branches,
+        'departments': departments,
+        'diagnoses': diagnoses,
+        'insurance_types': insurance_types
+    }
+
+def report_partials(args):
+    """Monthly report sums and counts for one database"""
+    month = args.get('month')
+    branch_id = args.get('branch_id')
+
+    if not month:
+        raise BadRequest('Month parameter required (format: YYYY-MM)')
+    try:
+        month_start, month_end = month_range(month)
+    except ValueError:
+        raise BadRequest('Month parameter required (format: YYYY-MM)')
+
+    where_conditions = ["a.admission_date >= %s AND a.admission_date < %s"]
+    params = [month_start, month_end]
+
+    if branch_id:
+        where_conditions.append("a.branch_id = %s")
+        params.append(branch_id)
+
+    where_clause = "WHERE " + " AND ".join(where_conditions)
+
+    summary = yield Query(f"""
+        SELECT
+            COUNT(DISTINCT a.admission_id) as total_admissions,
+            COUNT(DISTINCT CASE WHEN a.status = 'Discharged' THEN a.admission_id END) as total_discharges,
+            SUM(DATEDIFF(COALESCE(a.discharge_date, CURRENT_DATE), a.admission_date)) as los_days,
+            COUNT(a.admission_id) as los_count,
+            SUM(b.total_amount) as total_revenue,
+            COUNT(b.total_amount) as billed_count,
+            COUNT(DISTINCT pp.procedure_id) as total_procedures
+        FROM admissions a
+        LEFT JOIN billing b ON a.admission_id = b.admission_id
+        LEFT JOIN patient_procedures pp ON a.admission_id = pp.admission_id
+            AND pp.procedure_date >= %s
+        {where_clause}
+    """, [month_start] + params, one=True, types=REPORT_SUMMARY_TYPES)
+
+    dept_breakdown = yield Query(f"""
+        SELECT
+            d.dept_id,
+            d.dept_name,
+            COUNT(DISTINCT a.admission_id) as admissions,
+            SUM(DATEDIFF(COALESCE(a.discharge_date, CURRENT_DATE), a.admission_date)) as los_days,
+            COUNT(a.admission_id) as los_count,
+            SUM(b.total_amount) as revenue
+        FROM departments d
+        LEFT JOIN admissions a ON d.dept_id = a.dept_id AND {where_conditions[0]}
+        LEFT JOIN billing b ON a.admission_id = b.admission_id
+        {'WHERE a.branch_id = %s' if branch_id else ''}
+        GROUP BY d.dept_id, d.dept_name
+    """, params, types=REPORT_BREAKDOWN_TYPES)
+
+    return {'summary': summary, 'department_breakdown': dept_breakdown.records()}
+
+def merge_report_partials(partials):
+    """Admissions are disjoint across shards, so distinct counts add up too"""
+    return {
+        'summary': merge_sums([partial['summary'] for partial in partials]),
+        'department_breakdown': merge_rows([partial['department_breakdown'] for partial in partials],
+                                           'dept_id', keep=('dept_name',))
+    }
+
+def report_finish(partial, args):
+    """Monthly report payload from (merged) sums and counts"""
+    summary = partial['summary']
+    rows = sorted(partial['department_breakdown'], key=lambda row: row['admissions'], reverse=True)
+
+    return {
+        'month': args.get('month'),
+        'summary': {
+            'total_admissions': summary['total_admissions'],
+            'total_discharges': summary['total_discharges'],
+            'avg_los': ratio(summary['los_days'], summary['los_count']),
+            'total_revenue': summary['total_revenue'],
+            'avg_cost_per_patient': ratio(summary['total_revenue'], summary['billed_count']),
+            'total_procedures': summary['total_procedures']
+        },
+        'department_breakdown': [
+            {
+                'dept_name': row['dept_name'],
+                'admissions': row['admissions'],
+                'avg_los': ratio(row['los_days'], row['los_count']),
+                'revenue': row['revenue']
+            }
+            for row in rows
+        ],
+        'generated_at': datetime.now().isoformat()
+    }
+
+# Monthly performance report data
+monthly_report = Scatter(report_partials, merge_report_partials, report_finish)
+
+def requested_period(args):
+    """(period, first month, last month) from ?period=month|quarter|ytd|ttm&month=YYYY-MM"""
+    period = args.get('period', 'quarter')
+    if period not in PERIODS:
+        raise BadRequest(f"period must be one of: {', '.join(PERIODS)}")
+    try:
+        month = month_range(args['month'])[0] if args.get('month') else datetime.now().date()
+    except ValueError:
+        raise BadRequest('Month parameter format: YYYY-MM')
+    return (period,) + period_bounds(period, month)
+
+def period_partials(args):
+    """Stored monthly partials of the requested period for one database"""
+    period, first_month, last_month = requested_period(args)
+    sql, params = partial_query(first_month, last_month, args.get('branch_id'))
+    results = yield Query(sql, params, types=PARTIAL_TYPES)
+    return results.records()
+
+def period_finish(rows, args):
+    """Quarter / YTD / trailing-12-month report assembled from monthly partials"""
+    period, first_month, last_month = requested_period(args)
+    return dict(period=period, branch_id=args.get('branch_id'),
+                **assemble_period(rows, first_month, last_month),
+                generated_at=datetime.now().isoformat())
+
+# Multi-month period report from mergeable monthly partials
+period_report = Scatter(period_partials, concat_partials, period_finish)
+
+# ============== APPROXIMATE PLANS (stratified sample, see admission_sample.py) ==============
+
+def approximate_kpi_partials(args):
+    """Per-stratum sample sums and today's occupancy for one database"""
+    strata = yield Query(*strata_query(args))
+    occupancy = yield current_occupancy(args.get('branch_id'))
+    registers = yield kpi_patient_registers(args)
+    return dict(occupancy, strata=strata, patient_registers=registers)
+
+def approximate_kpi_finish(partial, args):
+    """KPI payload estimated from the merged strata, with confidence intervals"""
+    sample = SampleEstimator(partial['strata'])
+    estimates = {
+        'alos': sample.ratio('los_days', 'admissions'),
+        'total_admissions': sample.total('admissions'),
+        'total_discharges': sample.total('discharges'),
+        'active_patients': sample.total('active'),
+        'readmission_rate': sample.ratio('readmissions', 'discharges', scale=100),
+        'procedure_volume': sample.total('procedures'),
+        'emergency_cases': sample.total('emergency'),
+        'scheduled_cases': sample.total('scheduled'),
+        'avg_cost_per_patient': sample.ratio('revenue', 'billed'),
+    }
+    unique_patients = PatientSketch.from_rows(partial['patient_registers']).estimate()
+    estimates['unique_patients'] = Estimate.of(unique_patients, (unique_patients * RELATIVE_ERROR) ** 2, 0)
+    return dict(approximate_fields(estimates, missing=0),
+                bed_occupancy_rate=round(ratio(partial['occupancy_sum'], partial['occupancy_count']) or 0, 2),
+                approximate=True, sample=sample.describe())
+
+# Overall KPI summary from the admission sample (merge_sums concatenates the strata lists)
+approximate_kpi_summary = Scatter(approximate_kpi_partials, merge_sums, approximate_kpi_finish)
+
+def approximate_department_partials(args):
+    """Per-stratum sample sums and the department list for one database"""
+    branch_id = args.get('branch_id')
+    strata = yield Query(*strata_query(args))
+    departments = yield Query(f"""
+        SELECT dept_id, dept_name
+        FROM departments
+        {"WHERE branch_id = %s" if branch_id else ""}
+    """, [branch_id] if branch_id else [])
+    return {'strata': strata, 'departments': departments}
+
+def merge_department_samples(partials):
+    """Strata from every shard; departments are replicated, so the first shard's list serves"""
+    return {'strata': concat_partials([partial['strata'] for partial in partials]),
+            'departments': partials[0]['departments']}
+
+def approximate_department_finish(partial, args):
+    """Department comparison estimated from the sample, most admissions first"""
+    samples = SampleEstimator.groups(partial['strata'], 'dept_id')
+    rows = []
+    for department in partial['departments']:
+        sample = samples.get(department['dept_id'], SampleEstimator([]))
+        rows.append(dict(dept_name=department['dept_name'], **approximate_fields({
+            'total_admissions': sample.total('admissions'),
+            'avg_los': sample.ratio('los_days', 'admissions'),
+            # Procedures performed; the exact comparison counts distinct procedure types
+            'total_procedures': sample.total('procedures'),
+            'emergency_cases': sample.total('emergency'),
+            'avg_cost': sample.ratio('revenue', 'billed'),
+        })))
+    rows.sort(key=lambda row: row['total_admissions'], reverse=True)
+    return rows
+
+# Department comparison from the admission sample
+approximate_department_comparison = Scatter(approximate_department_partials, merge_department_samples,
+                                            approximate_department_finish)
+
+def approximate_branch_partials(args):
+    """Per-stratum sample sums and per-branch occupancy over the last 30 days for one database"""
+    strata = yield Query(*strata_query(args))
+    branches = yield Query("""
+        SELECT
+            b.branch_id,
+            b.branch_name,
+            b.total_beds,
+            SUM(bod.occupancy_rate) as occupancy_sum,
+            COUNT(bod.occupancy_rate) as occupancy_count
+        FROM branches b
+        LEFT JOIN bed_occupancy_daily bod ON b.branch_id = bod.branch_id
+            AND bod.snapshot_date >= %s
+        GROUP BY b.branch_id, b.branch_name, b.total_beds
+    """, (days_ago(30),), types=BRANCH_PARTIAL_TYPES)
+    return {'strata': strata, 'branches': branches.records()}
+
+def merge_branch_samples(partials):
+    """Strata from every shard; branch occupancy merged like the exact branch partials"""
+    return {'strata': concat_partials([partial['strata'] for partial in partials]),
+            'branches': merge_branch_partials([partial['branches'] for partial in partials])}
+
+def approximate_branch_finish(partial, args):
+    """Branch comparison estimated from the sample, most admissions first"""
+    samples = SampleEstimator.groups(partial['strata'], 'branch_id')
+    rows = []
+    for branch in partial['branches']:
+        sample = samples.get(branch['branch_id'], SampleEstimator([]))
+        rows.append(dict(
+            branch_name=branch['branch_name'],
+            total_beds=branch['total_beds'],
+            avg_occupancy=ratio(branch['occupancy_sum'], branch['occupancy_count']),
+            **approximate_fields({
+                'total_admissions': sample.total('admissions'),
+                'avg_los': sample.ratio('los_days', 'admissions'),
+                'total_revenue': sample.total('revenue', digits=2),
+                'avg_revenue_per_patient': sample.ratio('revenue', 'billed'),
+            })))
+    rows.sort(key=lambda row: row['total_admissions'], reverse=True)
+    return rows
+
+# Branch comparison from the admission sample
+approximate_branch_comparison = Scatter(approximate_branch_partials, merge_branch_samples, approximate_branch_finish)
@@ -0,0 +1,348 @@
+"""
+Hospital Analytics Dashboard - Async Backend API
+Serves the same routes and payloads as flask_backend.py from a single asyncio
+process: read endpoints run the shared query plans on an aiomysql connection
+pool, so a request waiting on MySQL no longer holds a worker. Routes without a
+native async version (ingest, alert reload, index) are delegated to the Flask app,
+whose in-memory census the async /api/census reads directly. Cached reads share
+the Flask workers' result cache, which the delegated ingest routes invalidate;
+hits are streamed from the cache file in chunks rather than copied out first.
+
+Run with:  hypercorn async_backend:asgi_app --bind 0.0.0.0:$PORT
+"""
+
+import asyncio
+import os
+
+import aiomysql
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, Response, g, jsonify, request
+from quart_cors import cors
+
+import analytics_queries
+from admission_control import Overloaded, is_query_timeout, route_class
+from admission_sample import approximate_requested
+import flask_backend
+from forecasting import ForecastCache, MAX_HORIZON_DAYS
+from query_plan import BadRequest, start_plan, run_plan_async
+from shard_router import shard_key
+
+app = Quart(__name__)
+
+# Same CORS policy as the Flask app
+app = cors(app, allow_origin="*", allow_methods=["GET", "POST", "OPTIONS"], allow_headers=["Content-Type"])
+
+# Pool sizing: in-flight requests beyond POOL_MAX_SIZE wait for a connection
+# instead of a worker, so hundreds of dashboard requests can be outstanding
+POOL_MIN_SIZE = int(os.getenv('ASYNC_POOL_MIN_SIZE', 1))
+POOL_MAX_SIZE = int(os.getenv('ASYNC_POOL_MAX_SIZE', 50))
+
+DB_CONFIG = flask_backend.DB_CONFIG
+shard_router = flask_backend.shard_router
+admission = flask_backend.admission      # slots are shared with the Flask routes (and other processes)
+result_cache = flask_backend.result_cache   # the Flask workers' shared result cache (and generation)
+
+CACHED_CHUNK_BYTES = 64 << 10   # read size when streaming a cache hit
+
+pools = {}      # shard_key -> aiomysql pool, one per branch shard
+pool_lock = asyncio.Lock()
+
+# Fitted forecast models, refit only when new daily data arrives
+forecast_cache = ForecastCache()
+
+async def pool_for(config):
+    """Create a shard's connection pool on first use"""
+    key = shard_key(config)
+    async with pool_lock:
+        if key not in pools:
+            pools[key] = await aiomysql.create_pool(
+                host=config['host'],
+                port=config['port'],
+                db=config['database'],
+                user=config['user'],
+                password=config['password'],
+                connect_timeout=config['connect_timeout'],
+                autocommit=config['autocommit'],
+                minsize=POOL_MIN_SIZE,
+                maxsize=POOL_MAX_SIZE,
+                pool_recycle=3600,
+            )
+    return pools[key]
+
+async def get_pool(branch_id=None):
+    """Connection pool of the shard owning `branch_id`"""
+    return await pool_for(shard_router.config_for(branch_id))
+
+@app.after_serving
+async def close_pool():
+    """Release pooled connections on shutdown"""
+    for db_pool in pools.values():
+        db_pool.close()
+        await db_pool.wait_closed()
+
+def shed_response(message, retry_after):
+    """503 telling the client when to come back"""
+    return jsonify({'error': message}), 503, {'Retry-After': str(retry_after)}
+
+@app.before_request
+async def serve_cached():
+    """Answer a cached read from the shared result cache before it takes an execution slot"""
+    if result_cache is None or request.method != 'GET' or request.path not in flask_backend.CACHED_ROUTES:
+        return None
+    g.cache_key = flask_backend.cache_key(request.path, request.args)
+    if 'no-cache' in request.headers.get('Cache-Control', ''):
+        return None
+    entry = result_cache.lookup(g.cache_key)
+    if entry is None:
+        return None
+    g.cache_key = None
+    return Response(cached_chunks(result_cache.body(entry)), mimetype='application/json',
+                    headers={'Content-Length': str(entry.length), 'X-Cache': 'HIT'})
+
+async def cached_chunks(body):
+    """Stream a cached entry from the shared file, like the Flask workers' file wrapper"""
+    try:
+        while True:
+            chunk = body.read(CACHED_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
+
+@app.after_request
+async def store_result(response):
+    """Share a freshly computed read with the Flask workers and later requests"""
+    if getattr(g, 'cache_key', None) and response.status_code == 200:
+        result_cache.put(g.cache_key, await response.get_data(), flask_backend.RESULT_CACHE_TTL)
+        response.headers['X-Cache'] = 'MISS'
+    return response
+
+@app.before_request
+async def admit_request():
+    """Take an execution slot for the route's class, waiting on the event loop up to its queue deadline"""
+    g.route_class = (route_class(request.path, approximate_requested(request.args))
+                     if request.method != 'OPTIONS' else None)
+    if g.route_class is None:
+        return None
+    try:
+        g.admission_slot = await admission.acquire_async(g.route_class)
+    except Overloaded as e:
+        return shed_response(str(e), e.retry_after)
+    return None
+
+@app.teardown_request
+async def release_slot(exc):
+    slot = getattr(g, 'admission_slot', None)
+    if slot is not None:
+        slot.release()
+
+async def limit_statements(cursor):
+    """Cap this pooled connection's SELECTs at the route class's statement timeout
+    (always set, so no earlier request's cap lingers; 0 means none)"""
+    statement_ms = admission.statement_ms(getattr(g, 'route_class', None))
+    await cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (statement_ms,))
+
+def query_timeout_response():
+    route = getattr(g, 'route_class', None)
+    return shed_response(f"Query exceeded the {admission.statement_ms(route)} ms budget; narrow the filters or retry",
+                         admission.retry_after(route))
+
+async def serve_plan(plan, branch_id=None):
+    """Run an analytics query plan on a pooled connection to the branch's shard and return its JSON response"""
+    try:
+        query, result = start_plan(plan)
+    except BadRequest as e:
+        return jsonify({'error': str(e)}), 400
+    if query is None:
+        return jsonify(result)
+
+    try:
+        db_pool = await get_pool(branch_id)
+        conn = await db_pool.acquire()
+    except aiomysql.Error as e:
+        print(f"Database connection error: {e}")
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        async with conn.cursor() as cursor:
+            await limit_statements(cursor)
+            result = await run_plan_async(plan, cursor, query)
+    except aiomysql.Error as e:
+        if is_query_timeout(e):
+            return query_timeout_response()
+        raise
+    finally:
+        db_pool.release(conn)
+
+    return jsonify(result)
+
+async def serve_scatter(scatter, args):
+    """Serve a cross-branch plan: on the owning shard when filtered by branch, else scatter-gather"""
+    branch_id = args.get('branch_id')
+    if branch_id or not shard_router.sharded:
+        return await serve_plan(scatter(args), branch_id)
+
+    plans = [scatter.partial(args) for _ in shard_router.configs]
+    try:
+        started = [start_plan(plan) for plan in plans]
+    except BadRequest as e:
+        return jsonify({'error': str(e)}), 400
+
+    async def run(config, plan, query, result):
+        if query is None:
+            return result
+        db_pool = await pool_for(config)
+        conn = await db_pool.acquire()
+        try:
+            async with conn.cursor() as cursor:
+                await limit_statements(cursor)
+                return await run_plan_async(plan, cursor, query)
+        finally:
+            db_pool.release(conn)
+
+    try:
+        partials = await asyncio.gather(*(
+            run(config, plan, query, result)
+            for config, plan, (query, result) in zip(shard_router.configs, plans, started)
+        ))
+    except aiomysql.Error as e:
+        if is_query_timeout(e):
+            return query_timeout_response()
+        print(f"Shard query error: {e}")
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    return jsonify(scatter.finish(scatter.merge(partials), args))
+
+# ============== CORE KPI ENDPOINTS ==============
+
+@app.route('/api/kpis/summary', methods=['GET'])
+async def get_kpi_summary():
+    """Get overall KPI summary with filters"""
+    if approximate_requested(request.args):
+        return await serve_scatter(analytics_queries.approximate_kpi_summary, request.args)
+    return await serve_scatter(analytics_queries.kpi_summary, request.args)
+
+@app.route('/api/trends/admissions', methods=['GET'])
+async def get_admission_trends():
+    """Get admission trends over time"""
+    return await serve_scatter(analytics_queries.admission_trends, request.args)
+
+@app.route('/api/trends/bed-occupancy', methods=['GET'])
+async def get_bed_occupancy_trends():
+    """Get bed occupancy trends"""
+    return await serve_scatter(analytics_queries.bed_occupancy_trends, request.args)
+
+@app.route('/api/forecast/departments', methods=['GET'])
+async def get_department_forecast():
+    """Forecast next-week bed occupancy and admissions for every department"""
+    # Models are fitted on one database's daily series, so a sharded deployment forecasts a branch at a time
+    if shard_router.sharded and not request.args.get('branch_id'):
+        return jsonify({'error': 'branch_id is required when branches are sharded'}), 400
+    return await serve_plan(analytics_queries.department_forecast(request.args, forecast_cache, MAX_HORIZON_DAYS),
+                            request.args.get('branch_id'))
+
+@app.route('/api/departments/comparison', methods=['GET'])
+async def get_department_comparison():
+    """Compare metrics across departments"""
+    if approximate_requested(request.args):
+        return await serve_scatter(analytics_queries.approximate_department_comparison, request.args)
+    return await serve_scatter(analytics_queries.department_comparison, request.args)
+
+@app.route('/api/branches/comparison', methods=['GET'])
+async def get_branch_comparison():
+    """Compare metrics across hospital branches"""
+    if approximate_requested(request.args):
+        return await serve_scatter(analytics_queries.approximate_branch_comparison, request.args)
+    return await serve_scatter(analytics_queries.branch_comparison, request.args)
+
+@app.route('/api/doctor-utilization', methods=['GET'])
+async def get_doctor_utilization():
+    """Get doctor utilization statistics"""
+    return await serve_scatter(analytics_queries.doctor_utilization, request.args)
+
+@app.route('/api/outcomes/summary', methods=['GET'])
+async def get_outcomes_summary():
+    """Get patient outcome statistics"""
+    return await serve_scatter(analytics_queries.outcomes_summary, request.args)
+
+@app.route('/api/los/distribution', methods=['GET'])
+async def get_los_distribution():
+    """Get length-of-stay distribution (median, p90, p99, histogram) from LOS sketches"""
+    return await serve_scatter(analytics_queries.los_distribution, request.args)
+
+@app.route('/api/patients/unique', methods=['GET'])
+async def get_unique_patients():
+    """Unique patients admitted in a date range, optionally per branch or department"""
+    return await serve_scatter(analytics_queries.unique_patients, request.args)
+
+@app.route('/api/alerts/active', methods=['GET'])
+async def get_active_alerts():
+    """Get active resource alerts"""
+    return await serve_scatter(analytics_queries.active_alerts, request.args)
+
+@app.route('/api/peak-hours', methods=['GET'])
+async def get_peak_hours():
+    """Get peak admission hours/days for staffing optimization"""
+    return await serve_scatter(analytics_queries.peak_hours, request.args)
+
+@app.route('/api/filters/options', methods=['GET'])
+async def get_filter_options():
+    """Get available filter options (branches, departments)"""
+    return await serve_plan(analytics_queries.filter_options(request.args))
+
+@app.route('/api/export/monthly-report', methods=['GET'])
+async def export_monthly_report():
+    """Generate monthly performance report data"""
+    return await serve_scatter(analytics_queries.monthly_report, request.args)
+
+@app.route('/api/reports/period', methods=['GET'])
+async def get_period_report():
+    """Quarter, year-to-date or trailing-12-month report assembled from monthly partials"""
+    return await serve_scatter(analytics_queries.period_report, request.args)
+
+@app.route('/api/census', methods=['GET'])
+async def get_census():
+    """Who and how many are in beds right now, from the Flask app's in-memory census (no SQL)"""
+    payload, status = flask_backend.census_payload(request.args)
+    return jsonify(payload), status
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    """API health check endpoint"""
+    try:
+        db_pool = await get_pool()
+        conn = await db_pool.acquire()
+    except aiomysql.Error:
+        return jsonify({'status': 'unhealthy', 'database': 'disconnected'}), 500
+    db_pool.release(conn)
+    return jsonify({'status': 'healthy', 'database': 'connected'})
+
+# ============== ASGI ENTRY POINT ==============
+
+# Everything not routed natively above is served by the Flask app in a thread
+flask_fallback = WsgiToAsgi(flask_backend.app)
+NATIVE_PATHS = {rule.rule for rule in app.url_map.iter_rules()}
+
+async def asgi_app(scope, receive, send):
+    """Dispatch natively async routes to Quart and the rest to the Flask app"""
+    if scope['type'] == 'http' and scope['path'] not in NATIVE_PATHS:
+        await flask_fallback(scope, receive, send)
+    else:
+        await app(scope, receive, send)
+
+if __name__ == '__main__':
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    port = int(os.getenv('PORT', 5000))
+    config = Config()
+    config.bind = [f"0.0.0.0:{port}"]
+
+    print("="*60)
+    print("Hospital Analytics Dashboard - Async Backend API")
+    print("="*60)
+    print(f"\nStarting server on port {port} (pool size {POOL_MIN_SIZE}-{POOL_MAX_SIZE})")
+    print("="*60)
+
+    asyncio.run(serve(asgi_app, config))
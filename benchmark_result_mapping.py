@@ -0,0 +1,78 @@
+"""
+Result Mapping Benchmark for Hospital Analytics
+Maps a synthetic department-comparison result (DECIMAL averages, NULL costs)
+to JSON-ready dicts the way the endpoints used to (dictionary cursor rows
+patched in place) and through ResultSet.records(), and compares the best
+wall time and the peak allocation of each. No database is needed.
+
+Example:
+    python benchmark_result_mapping.py --rows 200000
+"""
+
+import argparse
+import time
+import tracemalloc
+from decimal import Decimal
+
+from result_mapping import ColumnTypes, ResultSet
+
+NAMES = ['dept_name', 'total_admissions', 'avg_los', 'total_procedures', 'emergency_cases', 'avg_cost']
+TYPES = ColumnTypes.floats('avg_los', 'avg_cost')
+
+
+def fetched_rows(count):
+    """Tuples as mysql-connector returns them for the department comparison"""
+    return [(f"Dept {i % 50}", i, Decimal('3.2500'), i % 7, Decimal(i % 11),
+             Decimal('1234.56') if i % 9 else None) for i in range(count)]
+
+
+def dictionary_cursor(rows):
+    """The previous mapping: one dict per row from the cursor, DECIMAL columns patched afterwards"""
+    results = [dict(zip(NAMES, row)) for row in rows]
+    for row in results:
+        if row['avg_los']:
+            row['avg_los'] = float(row['avg_los'])
+        if row['avg_cost']:
+            row['avg_cost'] = float(row['avg_cost'])
+    return results
+
+
+def typed_result(rows):
+    """The current mapping: declared column types applied when the records are built"""
+    return ResultSet(NAMES, rows, TYPES).records()
+
+
+def measure(mapping, rows, repeats):
+    """(best seconds, peak MiB allocated) of one mapping"""
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        mapping(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    mapping(rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / (1 << 20)
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Compare result mapping strategies")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = fetched_rows(args.rows)
+    assert dictionary_cursor(rows) == typed_result(rows)
+
+    print(f"{'Mapping':<20} {'Best s':>8} {'Peak MiB':>9}")
+    print("-" * 39)
+    for name, mapping in (('dictionary cursor', dictionary_cursor), ('ResultSet.records', typed_result)):
+        best, peak = measure(mapping, rows, args.repeats)
+        print(f"{name:<20} {best:>8.3f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Serving Mode Benchmark for Hospital Analytics
+Drives the same dashboard request mix against the sync (gunicorn + Flask) and
+async (hypercorn + Quart) servers at a fixed concurrency and compares
+throughput and latency percentiles
+
+Example:
+    gunicorn -w 4 -b :5000 flask_backend:app
+    hypercorn -b :5001 async_backend:asgi_app
+    python benchmark_serving.py --sync-url http://localhost:5000 --async-url http://localhost:5001
+"""
+
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+# The request mix issued by one dashboard page load
+DASHBOARD_PATHS = [
+    '/api/filters/options',
+    '/api/kpis/summary',
+    '/api/alerts/active',
+    '/api/trends/admissions',
+    '/api/trends/bed-occupancy',
+    '/api/departments/comparison',
+    '/api/outcomes/summary',
+    '/api/peak-hours',
+    '/api/doctor-utilization',
+    '/api/branches/comparison',
+]
+
+
+async def fetch(host, port, path, timeout):
+    """Issue one GET on a fresh connection; returns the HTTP status code"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    status_line = response.split(b"\r\n", 1)[0].split()
+    return int(status_line[1]) if len(status_line) > 1 else 0
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load(base_url, paths, concurrency, total_requests, timeout):
+    """Keep `concurrency` requests in flight until `total_requests` have completed"""
+    parts = urlsplit(base_url)
+    host, port = parts.hostname, parts.port or 80
+    prefix = parts.path.rstrip('/')
+
+    latencies = []
+    errors = 0
+    issued = 0
+    in_flight = 0
+    peak_in_flight = 0
+
+    async def client():
+        nonlocal issued, errors, in_flight, peak_in_flight
+        while issued < total_requests:
+            path = prefix + paths[issued % len(paths)]
+            issued += 1
+            in_flight += 1
+            peak_in_flight = max(peak_in_flight, in_flight)
+            started = time.perf_counter()
+            try:
+                status = await fetch(host, port, path, timeout)
+                if status != 200:
+                    errors += 1
+            except (OSError, asyncio.TimeoutError):
+                errors += 1
+            finally:
+                in_flight -= 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_in_flight': peak_in_flight,
+    }
+
+
+def print_results(results):
+    """Side-by-side comparison table"""
+    print()
+    print(f"{'Mode':<8} {'Requests':>9} {'Errors':>7} {'Req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'In flight':>10}")
+    print("-" * 76)
+    for mode, stats in results.items():
+        print(
+            f"{mode:<8} "
+            f"{stats['requests']:>9} "
+            f"{stats['errors']:>7} "
+            f"{stats['throughput']:>9.1f} "
+            f"{stats['p50_ms']:>9.1f} "
+            f"{stats['p95_ms']:>9.1f} "
+            f"{stats['p99_ms']:>9.1f} "
+            f"{stats['peak_in_flight']:>10}"
+        )
+    if 'sync' in results and 'async' in results and results['sync']['throughput']:
+        print(f"\nAsync/sync throughput ratio: {results['async']['throughput'] / results['sync']['throughput']:.2f}x")
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Compare sync and async serving modes")
+    parser.add_argument('--sync-url', help="base URL of the gunicorn/Flask server")
+    parser.add_argument('--async-url', help="base URL of the hypercorn/Quart server")
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--path', action='append', dest='paths',
+                        help="endpoint to include (repeatable); defaults to the dashboard mix")
+    args = parser.parse_args()
+
+    if not args.sync_url and not args.async_url:
+        parser.error("pass --sync-url and/or --async-url")
+
+    paths = args.paths or DASHBOARD_PATHS
+    results = {}
+    for mode, url in (('sync', args.sync_url), ('async', args.async_url)):
+        if not url:
+            continue
+        print(f"Benchmarking {mode} server at {url} "
+              f"({args.requests} requests, concurrency {args.concurrency})...")
+        results[mode] = asyncio.run(run_load(url, paths, args.concurrency, args.requests, args.timeout))
+
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
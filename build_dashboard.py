@@ -0,0 +1,107 @@
+"""
+Dashboard Build for Hospital Analytics
+Turns dashboard.html, which compiles its JSX in the browser with Babel, into
+static files the API serves at /dashboard/. The build:
+
+- precompiles and minifies the JSX with esbuild
+- extracts and minifies the stylesheet
+- names both by their content hash
+- gives every file a precompressed .gz twin
+
+dashboard.html stays the source and still works when opened from disk.
+
+    python build_dashboard.py                       # writes static/dashboard/
+    ESBUILD=/usr/local/bin/esbuild python build_dashboard.py
+
+esbuild comes from npx (Node.js) unless ESBUILD points at a binary.
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import shlex
+import subprocess
+
+SOURCE = 'dashboard.html'
+OUTPUT_DIR = os.path.join('static', 'dashboard')
+ASSET_PREFIX = '/dashboard/assets/'
+ESBUILD = shlex.split(os.getenv('ESBUILD', 'npx --yes esbuild@0.19.12'))
+
+STYLE_BLOCK = re.compile(r'[ \t]*<style>(.*?)</style>\n', re.S)
+BABEL_BLOCK = re.compile(r'[ \t]*<script type="text/babel">(.*?)</script>\n', re.S)
+BABEL_LOADER = re.compile(r'[ \t]*<script src="[^"]*@babel/standalone[^"]*"></script>\n')
+
+
+def esbuild(source, loader):
+    """Minified output of esbuild for JSX or CSS source given on stdin"""
+    try:
+        result = subprocess.run(ESBUILD + [f'--loader={loader}', '--minify', '--target=es2018'],
+                                input=source.encode('utf-8'), capture_output=True, check=True)
+    except FileNotFoundError:
+        raise SystemExit(f"esbuild not found ({' '.join(ESBUILD)}); install Node.js or set ESBUILD")
+    except subprocess.CalledProcessError as e:
+        raise SystemExit(f"esbuild failed:\n{e.stderr.decode('utf-8', 'replace')}")
+    return result.stdout.decode('utf-8')
+
+
+def hashed_name(stem, suffix, data):
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{suffix}"
+
+
+def write_file(path, data):
+    """Write a file and its gzip twin (fixed mtime, so rebuilds are byte-identical)"""
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+
+
+def build(source=SOURCE, output_dir=OUTPUT_DIR):
+    """Build the dashboard; returns the names of the files written"""
+    with open(source, encoding='utf-8') as f:
+        html = f.read()
+    style, script = STYLE_BLOCK.search(html), BABEL_BLOCK.search(html)
+    if not style or not script:
+        raise SystemExit(f"{source} needs a <style> block and a <script type=\"text/babel\"> block")
+
+    assets_dir = os.path.join(output_dir, 'assets')
+    os.makedirs(assets_dir, exist_ok=True)
+    assets = {}
+    for stem, suffix, code in (('app', '.css', esbuild(style.group(1), 'css')),
+                               ('app', '.js', esbuild(script.group(1), 'jsx'))):
+        data = code.encode('utf-8')
+        assets[suffix] = hashed_name(stem, suffix, data)
+        write_file(os.path.join(assets_dir, assets[suffix]), data)
+
+    # Replace from the end so the earlier match offsets stay valid
+    html = (html[:script.start()]
+            + f'    <script src="{ASSET_PREFIX}{assets[".js"]}"></script>\n'
+            + html[script.end():])
+    html = (html[:style.start()]
+            + f'    <link rel="stylesheet" href="{ASSET_PREFIX}{assets[".css"]}">\n'
+            + html[style.end():])
+    html = BABEL_LOADER.sub('', html)
+    write_file(os.path.join(output_dir, 'index.html'), html.encode('utf-8'))
+
+    # Assets of earlier builds are unreachable from the new index.html
+    for name in os.listdir(assets_dir):
+        if name.removesuffix('.gz') not in assets.values():
+            os.remove(os.path.join(assets_dir, name))
+    return ['index.html'] + [f"assets/{name}" for name in assets.values()]
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Build the dashboard into hashed, precompressed static files")
+    parser.add_argument('--source', default=SOURCE)
+    parser.add_argument('--output', default=OUTPUT_DIR)
+    args = parser.parse_args()
+    for name in build(args.source, args.output):
+        path = os.path.join(args.output, name)
+        print(f"{name:<32} {os.path.getsize(path):>9,} bytes, {os.path.getsize(path + '.gz'):>8,} gzipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Real-Time Patient Census for Hospital Analytics
+Keeps every currently admitted patient (the rows of v_active_admissions) in
+memory, with secondary indexes by branch, department, bed type and doctor. The
+index is built with one pass over the view on each shard at startup. After
+that, admission and discharge ingest events keep it current, so census
+questions ("who and how many are in beds right now") are answered without SQL.
+
+Each API process keeps its own index, and ingest events only update the index
+of the worker that served them. Another gunicorn worker, or a write made directly
+to the database, is picked up by the periodic rebuild (refresh_seconds), so
+a census answer can be up to refresh_seconds behind. POST /api/census/reload
+rebuilds only the worker that serves it.
+
+Admission ids are unique only within a shard, so patients are keyed by
+(branch_id, admission_id).
+"""
+
+import heapq
+import threading
+import time
+from datetime import date, datetime
+
+from mysql.connector import Error
+
+# v_active_admissions columns kept per patient (length of stay is derived when asked)
+CENSUS_COLUMNS = [
+    'admission_id', 'patient_id', 'patient_name', 'age', 'gender', 'insurance_type',
+    'branch_id', 'branch_name', 'dept_id', 'dept_name', 'doctor_id', 'doctor_name',
+    'admission_date', 'admission_type', 'diagnosis_category', 'bed_type',
+]
+
+# Indexed dimensions (census filters and group_by values)
+DIMENSIONS = ('branch_id', 'dept_id', 'bed_type', 'doctor_id')
+
+# group_by key of patients with no value for the dimension (e.g. a NULL bed_type)
+UNKNOWN = 'unknown'
+
+CENSUS_QUERY = f"SELECT {', '.join(CENSUS_COLUMNS)} FROM v_active_admissions"
+
+EMPTY = frozenset()
+
+
+class CensusIndex:
+    """Active admissions by (branch_id, admission_id) plus dimension -> value -> key sets"""
+
+    def __init__(self, connections_factory, refresh_seconds=0):
+        self.connections_factory = connections_factory    # () -> [connection per shard]
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        self.loaded_at = None
+        self.patients = {}      # (branch_id, admission_id) -> census row
+        self.index = {dimension: {} for dimension in DIMENSIONS}
+
+    def load(self):
+        """Rebuild the index from v_active_admissions on every shard"""
+        try:
+            connections = self.connections_factory()
+        except Error as e:
+            print(f"Census load failed: {e}")
+            return False
+        rows = []
+        try:
+            for conn in connections:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(CENSUS_QUERY)
+                    rows.extend(dict(zip(CENSUS_COLUMNS, row)) for row in cursor.fetchall())
+                finally:
+                    cursor.close()
+        except Error as e:
+            print(f"Census load failed: {e}")
+            return False
+        finally:
+            for conn in connections:
+                conn.close()
+
+        patients = {}
+        index = {dimension: {} for dimension in DIMENSIONS}
+        for row in rows:
+            self._add(patients, index, row)
+        with self.lock:
+            self.patients = patients
+            self.index = index
+            self.loaded_at = datetime.now()
+        return True
+
+    def ensure_loaded(self):
+        """Load state on first use"""
+        if self.loaded_at is None:
+            self.load()
+
+    def start_refresh(self):
+        """Rebuild every refresh_seconds in a background thread (no-op when 0)"""
+        if not self.refresh_seconds:
+            return
+
+        def refresh():
+            while True:
+                time.sleep(self.refresh_seconds)
+                self.load()
+
+        threading.Thread(target=refresh, name='census-refresh', daemon=True).start()
+
+    @staticmethod
+    def _add(patients, index, row):
+        key = (row['branch_id'], row['admission_id'])
+        patients[key] = row
+        for dimension in DIMENSIONS:
+            index[dimension].setdefault(row[dimension], set()).add(key)
+
+    @staticmethod
+    def _remove(patients, index, key):
+        row = patients.pop(key, None)
+        if row is None:
+            return False
+        for dimension in DIMENSIONS:
+            keys = index[dimension].get(row[dimension])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[dimension][row[dimension]]
+        return True
+
+    # ============== EVENT HANDLERS ==============
+
+    def on_admission(self, row):
+        """Add a newly admitted patient (a v_active_admissions row as a tuple or dict)"""
+        if not isinstance(row, dict):
+            row = dict(zip(CENSUS_COLUMNS, row))
+        with self.lock:
+            self._remove(self.patients, self.index, (row['branch_id'], row['admission_id']))
+            self._add(self.patients, self.index, row)
+
+    def on_discharge(self, branch_id, admission_id):
+        """Drop a discharged patient; False if it was not in the census"""
+        with self.lock:
+            return self._remove(self.patients, self.index, (branch_id, admission_id))
+
+    # ============== QUERIES ==============
+
+    def _matching(self, filters):
+        """Patient keys matching every {dimension: value} filter (all patients when none)"""
+        if not filters:
+            return self.patients.keys()
+        sets = sorted((self.index[dimension].get(value, EMPTY) for dimension, value in filters.items()), key=len)
+        return sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+
+    def count(self, **filters):
+        with self.lock:
+            return len(self._matching(filters))
+
+    def census(self, filters=None, group_by=None, limit=0):
+        """
+        Patients in beds matching the filters: the count, optional counts per
+        `group_by` dimension, and up to `limit` patients (longest stays first).
+        """
+        filters = filters or {}
+        with self.lock:
+            ids = self._matching(filters)
+            result = {'active_patients': len(ids)}
+            if group_by:
+                if not filters:
+                    counts = {value: len(members) for value, members in self.index[group_by].items()}
+                else:
+                    counts = {}
+                    for key in ids:
+                        value = self.patients[key][group_by]
+                        counts[value] = counts.get(value, 0) + 1
+                # JSON object keys are strings, and jsonify sorts them: NULL must not sit next to str keys
+                if None in counts:
+                    counts[UNKNOWN] = counts.get(UNKNOWN, 0) + counts.pop(None)
+                result['by_' + group_by] = counts
+            if limit:
+                rows = heapq.nsmallest(limit, (self.patients[key] for key in ids),
+                                       key=lambda row: row['admission_date'])
+            else:
+                rows = []
+            loaded_at = self.loaded_at
+
+        if limit:
+            today = date.today()
+            result['patients'] = [
+                dict(row, admission_date=row['admission_date'].isoformat(),
+                     length_of_stay_days=(today - row['admission_date'].date()).days)
+                for row in rows
+            ]
+        result['loaded_at'] = loaded_at.isoformat() if loaded_at else None
+        return result
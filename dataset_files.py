@@ -0,0 +1,233 @@
+"""
+File-Based Datasets for Hospital Analytics
+Seeded sample data can be written as files instead of into MySQL: one directory
+per table (hospital_schema.sql column names) holding CSV or Parquet parts, one
+part per generation shard, plus manifest.json describing the run. The loader
+imports a dataset with LOAD DATA LOCAL INFILE (parts of a table in parallel,
+tables in foreign-key order) and then rebuilds the derived tables.
+
+    python generate_sample_data.py --seed 7 --scale 50 --engine numpy --output datasets/s7 --format parquet
+    python dataset_files.py load datasets/s7 --workers 8
+
+Parquet needs pyarrow; CSV has no extra dependencies. The server must allow
+local_infile.
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional
+    pa = pq = None
+
+from admission_sample import refresh_sample_month
+from los_sketch import refresh_sketches
+from patient_sketch import refresh_patient_sketches
+from period_reports import add_months, refresh_month
+from readmissions import rebuild as rebuild_admission_gaps
+
+FORMATS = ('csv', 'parquet')
+
+# Load order: parents before the tables referencing them
+TABLE_ORDER = [
+    'branches', 'departments', 'doctors', 'patients', 'procedures',
+    'admissions', 'patient_procedures', 'billing', 'outcomes', 'bed_occupancy_daily', 'resource_alerts',
+]
+
+# DECIMAL columns of hospital_schema.sql, stored as float64 in Parquet so every part has one type
+DECIMAL_COLUMNS = {
+    'base_cost', 'cost', 'total_amount', 'room_charges', 'procedure_charges', 'medicine_charges', 'lab_charges',
+    'other_charges', 'discount', 'insurance_coverage', 'amount_paid', 'occupancy_rate',
+}
+
+# With ENCLOSED BY set, LOAD DATA reads an unquoted NULL field as NULL (no generated string is 'NULL')
+NULL = 'NULL'
+
+# Database Configuration from Environment Variables (same variables as the API)
+DB_CONFIG = {
+    'host': os.getenv('MYSQLHOST', 'localhost'),
+    'port': int(os.getenv('MYSQLPORT', 3306)),
+    'database': os.getenv('MYSQLDATABASE', 'hospital_analytics'),
+    'user': os.getenv('MYSQLUSER', 'root'),
+    'password': os.getenv('MYSQLPASSWORD', ''),
+    'allow_local_infile': True,
+}
+
+
+def check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    if fmt == 'parquet' and pa is None:
+        raise ValueError("Parquet output needs pyarrow (pip install pyarrow)")
+
+
+def csv_value(value):
+    """A value as LOAD DATA reads it"""
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def part_path(root, table, part, fmt):
+    return os.path.join(root, table, f"part-{part:05d}.{fmt}")
+
+
+def write_csv(path, columns, rows):
+    """Header line, then rows; quotes are doubled inside quoted fields"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(columns)
+        writer.writerows([csv_value(value) for value in row] for row in rows)
+
+
+def write_part(root, table, columns, rows, part=0, fmt='csv'):
+    """Write rows (tuples in `columns` order) as one part of a table; returns the row count"""
+    path = part_path(root, table, part, fmt)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == 'parquet':
+        data = {}
+        for i, column in enumerate(columns):
+            values = [row[i] for row in rows]
+            if column in DECIMAL_COLUMNS:
+                values = pa.array([None if value is None else float(value) for value in values], pa.float64())
+            data[column] = values
+        pq.write_table(pa.table(data), path)
+    else:
+        write_csv(path, columns, rows)
+    return len(rows)
+
+
+def write_manifest(root, manifest):
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+
+def read_manifest(root):
+    with open(os.path.join(root, 'manifest.json')) as f:
+        return json.load(f)
+
+
+class ShardFileWriter:
+    """File counterpart of generate_sample_data.BulkWriter: buffers a shard's rows, writes one part per table"""
+
+    def __init__(self, root, fmt, part, columns):
+        self.root = root
+        self.fmt = fmt
+        self.part = part
+        self.columns = columns      # table -> column names (FACT_COLUMNS)
+        self.buffers = {table: [] for table in columns}
+        self.written = dict.fromkeys(columns, 0)
+
+    def add(self, rows):
+        for table, table_rows in rows.items():
+            self.buffers[table].extend(table_rows)
+
+    def add_batch(self, batch):
+        self.add({table: batch.rows(table) for table in batch.tables})
+
+    def close(self):
+        for table, rows in self.buffers.items():
+            if rows:
+                self.written[table] += write_part(self.root, table, self.columns[table], rows, self.part, self.fmt)
+            self.buffers[table] = []
+
+
+def load_part(path, table, columns):
+    """LOAD DATA one part on its own connection; returns seconds taken"""
+    started = time.perf_counter()
+    temp_csv = None
+    if path.endswith('.parquet'):
+        # LOAD DATA reads delimited text only: re-encode the part as CSV first
+        check_format('parquet')
+        data = pq.read_table(path, columns=columns).to_pydict()
+        fd, temp_csv = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        write_csv(temp_csv, columns, list(zip(*(data[column] for column in columns))))
+        path = temp_csv
+
+    connection = mysql.connector.connect(**DB_CONFIG)
+    cursor = connection.cursor()
+    try:
+        # The dataset is self-consistent; skip per-row constraint checks during the load
+        cursor.execute("SET foreign_key_checks = 0, unique_checks = 0")
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+            LINES TERMINATED BY '\\n'
+            IGNORE 1 LINES
+            ({', '.join(columns)})
+        """, (os.path.abspath(path),))
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+        if temp_csv:
+            os.unlink(temp_csv)
+    return time.perf_counter() - started
+
+
+def load_dataset(root, workers=4):
+    """Import every table of a dataset directory, then rebuild the derived tables"""
+    manifest = read_manifest(root)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for table in TABLE_ORDER:
+            info = manifest['tables'].get(table)
+            if not info:
+                continue
+            table_started = time.perf_counter()
+            paths = [part_path(root, table, part, manifest['format']) for part in info['parts']]
+            list(executor.map(lambda path: load_part(path, table, info['columns']), paths))
+            seconds = time.perf_counter() - table_started
+            print(f"{table:<20} {info['rows']:>12,} rows in {len(paths):>4} parts, {seconds:6.1f}s "
+                  f"({info['rows'] / seconds if seconds else 0:,.0f} rows/s)")
+
+    connection = mysql.connector.connect(**DB_CONFIG)
+    cursor = connection.cursor()
+    try:
+        start = datetime.date.fromisoformat(manifest['start'][:10])
+        as_of = datetime.date.fromisoformat(manifest['as_of'][:10])
+        print(f"Derived {rebuild_admission_gaps(cursor)} admission gaps")
+        refresh_sketches(cursor, start, as_of + datetime.timedelta(days=1))
+        refresh_patient_sketches(cursor, start, as_of + datetime.timedelta(days=1))
+        month = start.replace(day=1)
+        while month <= as_of:
+            refresh_month(cursor, month)
+            refresh_sample_month(cursor, month)
+            month = add_months(month, 1)
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+    print(f"Loaded {sum(info['rows'] for info in manifest['tables'].values()):,} rows "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Load file-based sample datasets into MySQL")
+    commands = parser.add_subparsers(dest='command', required=True)
+    load = commands.add_parser('load', help="LOAD DATA a dataset directory into an empty database")
+    load.add_argument('root', help="dataset directory (with manifest.json)")
+    load.add_argument('--workers', type=int, default=4, help="parts loaded concurrently")
+    args = parser.parse_args()
+    load_dataset(args.root, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Trend Granularity and Downsampling for Hospital Analytics
+Trend endpoints take any date range and a point budget. The bucket size
+(day, week or month) is the finest one that fits the budget. A series that
+still has more buckets than the budget is reduced with
+Largest-Triangle-Three-Buckets (LTTB). LTTB keeps real points and preserves
+peaks and troughs, so payload size and chart render time stay flat however
+long the range is.
+"""
+
+from datetime import date, datetime, timedelta
+
+from query_plan import BadRequest
+
+# Granularity -> (SQL bucket start for a date/datetime column, DATE_FORMAT label of the bucket, days per bucket)
+GRANULARITIES = {
+    'day': ("DATE({column})", '%Y-%m-%d', 1),
+    'week': ("DATE_SUB(DATE({column}), INTERVAL WEEKDAY({column}) DAY)", '%Y-%m-%d', 7),
+    'month': ("DATE_FORMAT({column}, '%Y-%m-01')", '%Y-%m', 30.44),
+}
+
+# Legacy `period` values of the trend endpoints
+PERIOD_GRANULARITY = {'daily': 'day', 'weekly': 'week', 'monthly': 'month'}
+
+DEFAULT_POINTS = 200
+MAX_POINTS = 2000
+
+
+def parse_day(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise BadRequest(f"{name} must be a date (YYYY-MM-DD)")
+
+
+def trend_window(args, default_days):
+    """
+    (start, end_exclusive, granularity, points) from start_date, end_date,
+    points and granularity (or the legacy period) arguments. The range defaults
+    to the last `default_days` days.
+    """
+    end = parse_day(args['end_date'], 'end_date') if args.get('end_date') else date.today()
+    start = parse_day(args['start_date'], 'start_date') if args.get('start_date') else end - timedelta(days=default_days)
+    if start > end:
+        raise BadRequest('start_date must not be after end_date')
+    try:
+        points = int(args.get('points', DEFAULT_POINTS))
+    except ValueError:
+        raise BadRequest('points must be an integer')
+    if not 3 <= points <= MAX_POINTS:
+        raise BadRequest(f"points must be between 3 and {MAX_POINTS}")
+
+    granularity = args.get('granularity') or PERIOD_GRANULARITY.get(args.get('period'), 'auto')
+    if granularity == 'auto':
+        days = (end - start).days + 1
+        granularity = next((name for name, (_, _, bucket_days) in GRANULARITIES.items()
+                            if days / bucket_days <= points), 'month')
+    elif granularity not in GRANULARITIES:
+        raise BadRequest(f"granularity must be auto or one of: {', '.join(GRANULARITIES)}")
+    return start, end + timedelta(days=1), granularity, points
+
+
+def lttb_indices(values, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps (x is the point index)"""
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    values = [0.0 if value is None else float(value) for value in values]
+    kept = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        # Average of the next bucket (the last point for the final bucket)
+        next_start, next_end = end, min(int((bucket + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(values[next_start:next_end]) / (next_end - next_start)
+
+        previous_y = values[previous]
+        best, best_area = start, -1.0
+        for i in range(start, end):
+            area = abs((previous - avg_x) * (values[i] - previous_y) - (previous - i) * (avg_y - previous_y))
+            if area > best_area:
+                best, best_area = i, area
+        kept.append(best)
+        previous = best
+    kept.append(n - 1)
+    return kept
+
+
+def downsample(records, threshold, value):
+    """At most `threshold` records, chosen by LTTB on the `value` field; the other fields come along"""
+    return [records[i] for i in lttb_indices([record[value] for record in records], threshold)]
@@ -0,0 +1,436 @@
+"""
+Live Event Simulator for Hospital Analytics
+Emits the write traffic of a running hospital for load and soak tests:
+admissions arrive through the day at generate_sample_data's weekday/weekend
+volumes, procedures follow during the stay, and each stay ends with a
+discharge, a final bill and an outcome. Branch bed snapshots are taken every
+simulated hour. Events go straight to MySQL (as the ingest endpoints write
+them) or are posted to the API's /api/ingest endpoints. They are paced in real or
+accelerated simulated time (--speed) or at a fixed rate (--rate). The throughput
+actually sustained is reported as the run goes.
+
+    python generate_sample_data.py --simulate --speed 3600 --scale 20
+    python generate_sample_data.py --simulate --rate 500 --streams 8 --target http://localhost:5000
+"""
+
+import heapq
+import http.client
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from los_sketch import record_discharge
+from patient_sketch import record_admission
+from readmissions import refresh_patients
+
+from generate_sample_data import (
+    ADMISSION_TYPES, ADMISSION_TYPE_WEIGHTS, BED_TYPES, BED_TYPE_WEIGHTS, DIAGNOSES,
+    LOS_DAYS, LOS_WEIGHTS, OUTCOME_TYPES, OUTCOME_WEIGHTS, READMISSION_RATE, daily_admission_count,
+)
+
+EVENT_KINDS = ['admission', 'procedure', 'discharge', 'billing', 'outcome', 'occupancy']
+
+REPORT_INTERVAL = 5.0       # wall seconds between throughput lines
+
+
+def load_branch_beds(cursor):
+    """(branch_id, total_beds, icu_beds) of every branch"""
+    cursor.execute("SELECT branch_id, total_beds, icu_beds FROM branches ORDER BY branch_id")
+    return cursor.fetchall()
+
+
+class DatabaseSink:
+    """Writes events the way the ingest endpoints do, one transaction per event"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = connection.cursor()
+
+    def send(self, kind, event):
+        """Write one event; returns the ids the ingest endpoint would respond with"""
+        cursor = self.cursor
+        result = {}
+        if kind == 'admission':
+            cursor.execute("""
+                INSERT INTO admissions
+                (patient_id, branch_id, dept_id, doctor_id, admission_date, admission_type,
+                 diagnosis_category, bed_type, bed_number, status)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'Active')
+            """, (event['patient_id'], event['branch_id'], event['dept_id'], event['doctor_id'],
+                  event['admission_date'], event['admission_type'], event['diagnosis_category'],
+                  event['bed_type'], event['bed_number']))
+            result['admission_id'] = cursor.lastrowid
+            refresh_patients(cursor, [event['patient_id']])
+            record_admission(cursor, event['branch_id'], event['dept_id'], event['admission_date'].date(),
+                             event['patient_id'])
+        elif kind == 'procedure':
+            cursor.execute("""
+                INSERT INTO patient_procedures
+                (admission_id, procedure_id, procedure_date, doctor_id, duration_minutes, cost, status)
+                VALUES (%s, %s, %s, %s, %s, %s, 'Completed')
+            """, (event['admission_id'], event['procedure_id'], event['procedure_date'], event['doctor_id'],
+                  event['duration_minutes'], event['cost']))
+            result['record_id'] = cursor.lastrowid
+        elif kind == 'discharge':
+            cursor.execute("""
+                UPDATE admissions
+                SET status = 'Discharged', discharge_date = %s
+                WHERE admission_id = %s AND status = 'Active'
+            """, (event['discharge_date'], event['admission_id']))
+            cursor.execute("""
+                SELECT branch_id, dept_id, DATE(discharge_date),
+                       GREATEST(DATEDIFF(discharge_date, admission_date), 0), patient_id
+                FROM admissions WHERE admission_id = %s
+            """, (event['admission_id'],))
+            row = cursor.fetchone()
+            record_discharge(cursor, *row[:4])
+            refresh_patients(cursor, [row[4]])
+            result['admission_id'] = event['admission_id']
+        elif kind == 'billing':
+            cursor.execute("""
+                INSERT INTO billing
+                (admission_id, total_amount, room_charges, procedure_charges, medicine_charges, lab_charges,
+                 other_charges, discount, insurance_coverage, amount_paid, payment_status, bill_date)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (event['admission_id'], event['total_amount'], event['room_charges'], event['procedure_charges'],
+                  event['medicine_charges'], event['lab_charges'], event['other_charges'], event['discount'],
+                  event['insurance_coverage'], event['amount_paid'], event['payment_status'], event['bill_date']))
+            result['bill_id'] = cursor.lastrowid
+        elif kind == 'outcome':
+            cursor.execute("""
+                INSERT INTO outcomes
+                (admission_id, outcome_type, outcome_date, readmission_flag, readmission_within_30days)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (event['admission_id'], event['outcome_type'], event['outcome_date'],
+                  event['readmission_within_30days'], event['readmission_within_30days']))
+            result['outcome_id'] = cursor.lastrowid
+        elif kind == 'occupancy':
+            cursor.execute("""
+                INSERT INTO bed_occupancy_daily
+                (branch_id, dept_id, snapshot_date, snapshot_hour, total_beds, occupied_beds,
+                 occupancy_rate, icu_occupied, general_occupied)
+                VALUES (%s, NULL, %s, %s, %s, %s, %s, %s, %s)
+            """, (event['branch_id'], event['snapshot_date'], event['snapshot_hour'], event['total_beds'],
+                  event['occupied_beds'], round(event['occupied_beds'] / event['total_beds'] * 100, 2),
+                  event['icu_occupied'], event['general_occupied']))
+            result['record_id'] = cursor.lastrowid
+        self.connection.commit()
+        return result
+
+    def close(self):
+        self.cursor.close()
+        self.connection.close()
+
+
+class HttpSink:
+    """Posts events to the API's /api/ingest/<kind> endpoints over one keep-alive connection"""
+
+    def __init__(self, base_url, timeout=30):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(url.netloc, timeout=timeout)
+        self.prefix = url.path.rstrip('/')
+
+    def send(self, kind, event):
+        """POST one event; returns the decoded response (raises RuntimeError on non-2xx)"""
+        body = json.dumps(event, default=str)
+        for attempt in range(2):
+            try:
+                self.connection.request('POST', f"{self.prefix}/api/ingest/{kind}", body,
+                                        {'Content-Type': 'application/json'})
+                response = self.connection.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # The server may drop idle keep-alive connections: reconnect once
+                self.connection.close()
+                if attempt:
+                    raise
+        if response.status >= 300:
+            raise RuntimeError(f"{kind}: HTTP {response.status} {payload[:200].decode('utf-8', 'replace')}")
+        return json.loads(payload)
+
+    def close(self):
+        self.connection.close()
+
+
+class BedTracker:
+    """Beds taken per branch: the beds occupied at the start plus every stream's simulated stays"""
+
+    def __init__(self, branch_beds, rng):
+        self.lock = threading.Lock()
+        self.beds = {branch_id: (total_beds, icu_beds) for branch_id, total_beds, icu_beds in branch_beds}
+        self.baseline = {branch_id: int(total_beds * rng.uniform(0.55, 0.85))
+                         for branch_id, total_beds, _ in branch_beds}
+        self.active = dict.fromkeys(self.beds, 0)
+        self.active_icu = dict.fromkeys(self.beds, 0)
+
+    def admit(self, branch_id, icu, change=1):
+        with self.lock:
+            self.active[branch_id] += change
+            self.active_icu[branch_id] += change if icu else 0
+
+    def discharge(self, branch_id, icu):
+        self.admit(branch_id, icu, -1)
+
+    def snapshot(self, branch_id, at):
+        """Occupancy event of a branch"""
+        total_beds, icu_beds = self.beds[branch_id]
+        baseline = self.baseline[branch_id]
+        with self.lock:
+            active, active_icu = self.active[branch_id], self.active_icu[branch_id]
+        occupied = min(total_beds, baseline + active)
+        icu_occupied = min(icu_beds, occupied, int(baseline * 0.15) + active_icu)
+        return {'branch_id': branch_id, 'snapshot_date': at.date(), 'snapshot_hour': at.hour,
+                'total_beds': total_beds, 'occupied_beds': occupied,
+                'icu_occupied': icu_occupied, 'general_occupied': occupied - icu_occupied}
+
+
+class EventSimulator:
+    """
+    Discrete-event model of one hospital network from a simulated start time.
+    next_event() returns events in simulated-time order; after an event is
+    written, completed() schedules its follow-ups with the ids the sink assigned.
+    Simulators running side by side share one BedTracker, and only the one
+    with `snapshots` set emits the hourly occupancy events.
+    """
+
+    def __init__(self, reference, branch_beds, start, rng=None, scale=1.0, beds=None, snapshots=True):
+        self.reference = reference
+        self.rng = rng or random.Random()
+        self.scale = scale
+        self.clock = start
+        self.queue = []             # (at, sequence, kind, stay or branch)
+        self.sequence = 0
+        self.beds = beds or BedTracker(branch_beds, self.rng)
+
+        self.schedule_day(start, first_arrival=start)
+        if snapshots:
+            first_hour = start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            for branch_id in self.beds.beds:
+                self.schedule(first_hour, 'occupancy', branch_id)
+
+    def schedule(self, at, kind, subject):
+        heapq.heappush(self.queue, (at, self.sequence, kind, subject))
+        self.sequence += 1
+
+    def schedule_day(self, day, first_arrival=None):
+        """Spread a day's admissions (daily_admission_count) uniformly over it; the next day follows at midnight"""
+        midnight = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        for _ in range(daily_admission_count(self.rng, midnight, self.scale)):
+            at = midnight + timedelta(seconds=self.rng.randrange(86400))
+            if first_arrival is None or at >= first_arrival:
+                self.schedule(at, 'admission', None)
+        self.schedule(midnight + timedelta(days=1), 'day', None)
+
+    def next_event(self):
+        """(simulated time, kind, event payload, stay) of the next event"""
+        while True:
+            at, _, kind, subject = heapq.heappop(self.queue)
+            self.clock = at
+            if kind == 'day':
+                self.schedule_day(at)
+                continue
+            if kind == 'admission':
+                stay = self.new_stay(at)
+                return at, kind, stay['admission'], stay
+            if kind == 'occupancy':
+                self.schedule(at + timedelta(hours=1), 'occupancy', subject)
+                return at, kind, self.beds.snapshot(subject, at), None
+            return at, kind, getattr(self, kind)(subject, at), subject
+
+    def completed(self, kind, stay, result):
+        """Follow-ups of a written event: procedures and discharge of an admitted stay"""
+        if kind == 'admission':
+            stay['admission_id'] = result['admission_id']
+            self.beds.admit(stay['branch_id'], stay['bed_type'] == 'ICU')
+            admitted = stay['admission']['admission_date']
+            if self.reference['procedures_by_dept'].get(stay['dept_id']):
+                for _ in range(self.rng.randint(1, 3)):
+                    # Within the first three days, always before discharge
+                    self.schedule(admitted + timedelta(days=self.rng.randint(0, min(stay['los'] - 1, 3)),
+                                                       hours=self.rng.randint(1, 12)), 'procedure', stay)
+            discharged = admitted + timedelta(days=stay['los'])
+            for follow_up in ('discharge', 'billing', 'outcome'):
+                self.schedule(discharged, follow_up, stay)
+        elif kind == 'discharge':
+            self.beds.discharge(stay['branch_id'], stay['bed_type'] == 'ICU')
+
+    def new_stay(self, at):
+        """A patient arriving now, drawn as in generate_sample_data.generate_admission"""
+        rng = self.rng
+        dept_id, dept_type, branch_id = rng.choice(self.reference['departments'])
+        patient_id = rng.choice(self.reference['patient_ids'])
+        doctor_id = rng.choice(self.reference['doctors_by_dept'].get(dept_id, [1]))
+        bed_type = rng.choices(BED_TYPES, weights=BED_TYPE_WEIGHTS)[0]
+        return {
+            'admission_id': None,
+            'patient_id': patient_id,
+            'branch_id': branch_id,
+            'dept_id': dept_id,
+            'doctor_id': doctor_id,
+            'bed_type': bed_type,
+            'los': rng.choices(LOS_DAYS, weights=LOS_WEIGHTS)[0],
+            'procedure_cost': Decimal(0),
+            'admission': {
+                'patient_id': patient_id,
+                'branch_id': branch_id,
+                'dept_id': dept_id,
+                'doctor_id': doctor_id,
+                'admission_date': at,
+                'admission_type': rng.choices(ADMISSION_TYPES, weights=ADMISSION_TYPE_WEIGHTS)[0],
+                'diagnosis_category': rng.choice(DIAGNOSES.get(dept_type, ['General Condition'])),
+                'bed_type': bed_type,
+                'bed_number': f"B-{rng.randint(101, 499)}",
+            },
+        }
+
+    def procedure(self, stay, at):
+        proc_id, base_cost, duration = self.rng.choice(self.reference['procedures_by_dept'][stay['dept_id']])
+        cost = (Decimal(base_cost) * Decimal(str(self.rng.uniform(0.9, 1.2)))).quantize(Decimal('0.01'))
+        stay['procedure_cost'] += cost
+        return {'admission_id': stay['admission_id'], 'branch_id': stay['branch_id'], 'procedure_id': proc_id,
+                'procedure_date': at, 'doctor_id': stay['doctor_id'], 'duration_minutes': duration, 'cost': cost}
+
+    def discharge(self, stay, at):
+        return {'admission_id': stay['admission_id'], 'branch_id': stay['branch_id'], 'discharge_date': at}
+
+    def billing(self, stay, at):
+        """Final bill at discharge (generate_admission charge distributions)"""
+        rng = self.rng
+        los_days = stay['los']
+        room_charges = los_days * rng.randint(2000, 8000)
+        medicine_charges = los_days * rng.randint(1000, 3000)
+        lab_charges = rng.randint(2000, 10000)
+        other_charges = rng.randint(1000, 5000)
+        total_amount = room_charges + stay['procedure_cost'] + medicine_charges + lab_charges + other_charges
+        discount = (total_amount * Decimal(str(rng.uniform(0.9, 1.2)))).quantize(Decimal('0.01'))
+        if self.reference['insurance_by_patient'][stay['patient_id']] != 'Self-Pay':
+            insurance_coverage = (total_amount * Decimal(str(rng.uniform(0.5, 0.8)))).quantize(Decimal('0.01'))
+        else:
+            insurance_coverage = Decimal(0)
+        amount_paid = total_amount - discount
+        return {
+            'admission_id': stay['admission_id'], 'branch_id': stay['branch_id'],
+            'total_amount': total_amount, 'room_charges': room_charges, 'procedure_charges': stay['procedure_cost'],
+            'medicine_charges': medicine_charges, 'lab_charges': lab_charges, 'other_charges': other_charges,
+            'discount': discount, 'insurance_coverage': insurance_coverage, 'amount_paid': amount_paid,
+            'payment_status': 'Paid' if amount_paid >= total_amount - discount - insurance_coverage else 'Partial',
+            'bill_date': at,
+        }
+
+    def outcome(self, stay, at):
+        return {'admission_id': stay['admission_id'], 'branch_id': stay['branch_id'],
+                'outcome_type': self.rng.choices(OUTCOME_TYPES, weights=OUTCOME_WEIGHTS)[0],
+                'outcome_date': at, 'readmission_within_30days': self.rng.random() < READMISSION_RATE}
+
+
+class ThroughputStats:
+    """Event counts shared by simulator streams"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.counts = dict.fromkeys(EVENT_KINDS, 0)
+        self.errors = 0
+        self.latency = 0.0          # summed seconds spent in sink.send
+        self.clock = None           # latest simulated time written
+
+    def record(self, kind, seconds, at, ok=True):
+        with self.lock:
+            if ok:
+                self.counts[kind] += 1
+            else:
+                self.errors += 1
+            self.latency += seconds
+            self.clock = max(self.clock or at, at)
+
+    def report(self, final=False):
+        with self.lock:
+            elapsed = time.perf_counter() - self.started
+            events = sum(self.counts.values())
+            attempts = events + self.errors
+            clock = f", simulated clock {self.clock:%Y-%m-%d %H:%M}" if self.clock else ""
+            print(f"{'Sustained ' if final else '  '}{elapsed:8.1f}s {events:>10,} events "
+                  f"({events / elapsed if elapsed else 0:,.1f}/s), {self.errors} errors, "
+                  f"{self.latency / attempts * 1000 if attempts else 0:.1f} ms/event{clock}")
+            if final:
+                print("  " + ", ".join(f"{count:,} {kind}" for kind, count in self.counts.items()))
+
+
+def run_stream(simulator, sink, stats, stop, speed=1.0, rate=None):
+    """
+    Write the simulator's events to the sink until `stop` is set. Events are
+    released when their simulated time comes up at `speed` simulated seconds
+    per second, or at `rate` events per second regardless of simulated time;
+    a stream that falls behind writes as fast as the sink allows.
+    """
+    wall_start = time.perf_counter()
+    sim_start = simulator.clock
+    emitted = 0
+    try:
+        while not stop.is_set():
+            at, kind, event, stay = simulator.next_event()
+            if rate:
+                due = wall_start + emitted / rate
+            else:
+                due = wall_start + (at - sim_start).total_seconds() / speed
+            delay = due - time.perf_counter()
+            if delay > 0 and stop.wait(delay):
+                break
+            sent = time.perf_counter()
+            try:
+                result = sink.send(kind, event)
+            except Exception as e:  # counted and reported; the stream keeps going
+                stats.record(kind, time.perf_counter() - sent, at, ok=False)
+                print(f"  {kind} failed: {e}")
+                continue
+            stats.record(kind, time.perf_counter() - sent, at)
+            simulator.completed(kind, stay, result)
+            emitted += 1
+    finally:
+        sink.close()
+
+
+def simulate(reference, branch_beds, sink_factory, streams=1, speed=1.0, rate=None, duration=None,
+             scale=1.0, seed=None):
+    """
+    Run `streams` independent simulators in threads (each with its own sink and
+    1/streams of the volume and rate) for `duration` seconds or until interrupted,
+    printing throughput every REPORT_INTERVAL seconds. The streams share one bed
+    tracker; the first stream writes the occupancy snapshots for all of them.
+    """
+    start = datetime.now().replace(microsecond=0)
+    stats = ThroughputStats()
+    stop = threading.Event()
+    beds = BedTracker(branch_beds, random.Random(f"{seed}:beds") if seed is not None else random.Random())
+    threads = []
+    for index in range(streams):
+        rng = random.Random(f"{seed}:simulate:{index}") if seed is not None else random.Random()
+        simulator = EventSimulator(reference, branch_beds, start, rng, scale / streams, beds, snapshots=index == 0)
+        thread = threading.Thread(target=run_stream, name=f"simulator-{index}", daemon=True,
+                                  args=(simulator, sink_factory(), stats, stop, speed,
+                                        rate / streams if rate else None))
+        thread.start()
+        threads.append(thread)
+
+    pacing = f"{rate:,.0f} events/s" if rate else f"{speed:g}x simulated time"
+    print(f"Simulating from {start} with {streams} stream(s) at {pacing} (Ctrl-C to stop)")
+    deadline = time.perf_counter() + duration if duration else None
+    try:
+        while any(thread.is_alive() for thread in threads):
+            if deadline and time.perf_counter() >= deadline:
+                break
+            time.sleep(max(0, min(REPORT_INTERVAL, deadline - time.perf_counter())) if deadline else REPORT_INTERVAL)
+            stats.report()
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    for thread in threads:
+        thread.join()
+    stats.report(final=True)
+    return stats
@@ -3,15 +3,31 @@ Hospital Analytics Dashboard - Flask Backend API (Railway Deployment Version)
 Provides RESTful endpoints for hospital resource utilization analytics
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
-import mysql.connector
 from mysql.connector import Error
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
 from datetime import datetime, timedelta
 import json
 from decimal import Decimal
+import mimetypes
 import os
 
+import analytics_queries
+from admission_control import AdmissionController, Overloaded, is_query_timeout, route_class
+from admission_sample import approximate_requested
+from alert_engine import AlertEngine
+from census_index import CENSUS_QUERY, DIMENSIONS, CensusIndex
+from forecasting import ForecastCache, MAX_HORIZON_DAYS
+from los_sketch import record_discharge
+from patient_sketch import record_admission
+from query_plan import BadRequest, start_plan, run_plan
+from readmissions import refresh_patients, refresh_patients_across
+from report_jobs import REPORT_FORMATS, ReportJobQueue, ResultStore
+from shard_router import ShardRouter
+from shared_cache import SharedResultCache
+
 app = Flask(__name__)
 
 # Enable CORS for all domains (you can restrict this in production)
@@ -36,14 +52,17 @@ DB_CONFIG = {
 DB_CONFIG['connect_timeout'] = 10
 DB_CONFIG['autocommit'] = True
 
-def get_db_connection():
-    """Create and return database connection with retry logic"""
+# Branch shards (SHARD_MAP); a single database when unset
+shard_router = ShardRouter.from_env(DB_CONFIG)
+
+def get_db_connection(branch_id=None):
+    """Create and return a connection to the branch's shard with retry logic"""
     max_retries = 3
     retry_delay = 2
     
     for attempt in range(max_retries):
         try:
-            connection = mysql.connector.connect(**DB_CONFIG)
+            connection = shard_router.connect(branch_id)
             return connection
         except Error as e:
             if attempt < max_retries - 1:
@@ -54,662 +73,560 @@ def get_db_connection():
                 print(f"Database connection error after {max_retries} attempts: {e}")
                 return None
 
+# JSON responses of read endpoints, shared by every worker process on the host and by
+# async_backend.py (census, alerts, health and report jobs are always served live).
+# Every /api/ingest write starts a new cache generation; writes made straight to the
+# database (batch loads, the simulator's database sink) show up within RESULT_CACHE_TTL.
+CACHED_ROUTES = {
+    '/api/kpis/summary', '/api/trends/admissions', '/api/trends/bed-occupancy', '/api/forecast/departments',
+    '/api/departments/comparison', '/api/branches/comparison', '/api/doctor-utilization',
+    '/api/outcomes/summary', '/api/los/distribution', '/api/patients/unique', '/api/peak-hours',
+    '/api/filters/options', '/api/export/monthly-report', '/api/reports/period',
+}
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 30))
+result_cache = (SharedResultCache(capacity=int(os.getenv('RESULT_CACHE_BYTES', 64 << 20)),
+                                  slots=int(os.getenv('RESULT_CACHE_SLOTS', 4096)),
+                                  directory=os.getenv('RESULT_CACHE_DIR'))
+                if RESULT_CACHE_TTL > 0 else None)
+
+def cache_key(path, args):
+    """Shared-cache key of a read: the data generation, the path and the sorted arguments"""
+    return f"{result_cache.generation()}:{path}?" + '&'.join(f"{name}={value}" for name, value
+                                                            in sorted(args.items(multi=True)))
+
+@app.before_request
+def serve_cached():
+    """Answer a cached read from shared memory, before it takes an execution slot or a connection"""
+    if result_cache is None or request.method != 'GET' or request.path not in CACHED_ROUTES:
+        return None
+    g.cache_key = cache_key(request.path, request.args)
+    # Cache-Control: no-cache recomputes the result and refreshes the shared copy
+    if 'no-cache' in request.headers.get('Cache-Control', ''):
+        return None
+    entry = result_cache.lookup(g.cache_key)
+    if entry is None:
+        return None
+    g.cache_key = None
+    # A file wrapper lets gunicorn sendfile() the body straight from the shared mapping
+    response = Response(wrap_file(request.environ, result_cache.body(entry)),
+                        mimetype='application/json', direct_passthrough=True)
+    response.content_length = entry.length
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+@app.after_request
+def store_result(response):
+    """Share a freshly computed read with the other workers, or retire every cached read after an ingest write"""
+    if result_cache is not None and request.path.startswith('/api/ingest/') and response.status_code < 300:
+        result_cache.invalidate()
+    if g.get('cache_key') and response.status_code == 200 and not response.direct_passthrough:
+        result_cache.put(g.cache_key, response.get_data(), RESULT_CACHE_TTL)
+        response.headers['X-Cache'] = 'MISS'
+    return response
+
+# Per-route-class concurrency caps, queue deadlines and statement timeouts
+admission = AdmissionController()
+
+def shed_response(message, retry_after):
+    """503 telling the client when to come back"""
+    response = jsonify({'error': message})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.before_request
+def admit_request():
+    """Take an execution slot for the route's class, or shed the request once its queue deadline passes"""
+    g.route_class = (route_class(request.path, approximate_requested(request.args))
+                     if request.method != 'OPTIONS' else None)
+    if g.route_class is None:
+        return None
+    try:
+        g.admission_slot = admission.acquire(g.route_class)
+    except Overloaded as e:
+        return shed_response(str(e), e.retry_after)
+    return None
+
+@app.teardown_request
+def release_slot(exc):
+    slot = g.pop('admission_slot', None)
+    if slot is not None:
+        slot.release()
+
+def limit_statements(cursor):
+    """Cap this connection's SELECTs at the route class's statement timeout"""
+    statement_ms = admission.statement_ms(g.get('route_class'))
+    if statement_ms:
+        cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (statement_ms,))
+
+def query_timeout_response():
+    route = g.get('route_class')
+    return shed_response(f"Query exceeded the {admission.statement_ms(route)} ms budget; narrow the filters or retry",
+                         admission.retry_after(route))
+
 def decimal_to_float(obj):
     """Convert Decimal objects to float for JSON serialization"""
     if isinstance(obj, Decimal):
         return float(obj)
     raise TypeError
 
-# ============== CORE KPI ENDPOINTS ==============
-
-@app.route('/api/kpis/summary', methods=['GET'])
-def get_kpi_summary():
-    """Get overall KPI summary with filters"""
-    branch_id = request.args.get('branch_id')
-    dept_id = request.args.get('dept_id')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    conn = get_db_connection()
+def serve_plan(plan, branch_id=None):
+    """Run an analytics query plan on a fresh connection to the branch's shard and return its JSON response"""
+    try:
+        query, result = start_plan(plan)
+    except BadRequest as e:
+        return jsonify({'error': str(e)}), 400
+    if query is None:
+        return jsonify(result)
+    
+    conn = get_db_connection(branch_id)
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
-    cursor = conn.cursor(dictionary=True)
-    
-    # Build WHERE clause
-    where_conditions = []
-    params = []
-    
-    if branch_id:
-        where_conditions.append("a.branch_id = %s")
-        params.append(branch_id)
-    if dept_id:
-        where_conditions.append("a.dept_id = %s")
-        params.append(dept_id)
-    if start_date:
-        where_conditions.append("a.admission_date >= %s")
-        params.append(start_date)
-    if end_date:
-        where_conditions.append("a.admission_date <= %s")
-        params.append(end_date)
-    
-    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-    
-    # Average Length of Stay (ALOS)
-    query = f"""
-        SELECT AVG(DATEDIFF(COALESCE(discharge_date, CURRENT_DATE), admission_date)) as alos
-        FROM admissions a
-        {where_clause}
-    """
-    cursor.execute(query, params)
-    alos_result = cursor.fetchone()
-    alos = float(alos_result['alos']) if alos_result['alos'] else 0
-    
-    # Bed Occupancy Rate (current)
-    if branch_id:
-        cursor.execute("""
-            SELECT AVG(occupancy_rate) as avg_occupancy
-            FROM bed_occupancy_daily
-            WHERE branch_id = %s AND snapshot_date = CURRENT_DATE
-        """, (branch_id,))
-    else:
-        cursor.execute("""
-            SELECT AVG(occupancy_rate) as avg_occupancy
-            FROM bed_occupancy_daily
-            WHERE snapshot_date = CURRENT_DATE
-        """)
-    occupancy_result = cursor.fetchone()
-    bed_occupancy = float(occupancy_result['avg_occupancy']) if occupancy_result['avg_occupancy'] else 0
-    
-    # Patient Counts
-    query = f"""
-        SELECT 
-            COUNT(*) as total_admissions,
-            SUM(CASE WHEN status = 'Discharged' THEN 1 ELSE 0 END) as total_discharges,
-            SUM(CASE WHEN status = 'Active' THEN 1 ELSE 0 END) as active_patients
-        FROM admissions a
-        {where_clause}
-    """
-    cursor.execute(query, params)
-    counts = cursor.fetchone()
-    
-    # Readmission Rate (30-day)
-    query = f"""
-        SELECT 
-            COUNT(*) as total_discharges,
-            SUM(CASE WHEN o.readmission_within_30days = TRUE THEN 1 ELSE 0 END) as readmissions
-        FROM admissions a
-        LEFT JOIN outcomes o ON a.admission_id = o.admission_id
-        {where_clause} AND a.status = 'Discharged'
-    """
-    cursor.execute(query, params)
-    readmission_data = cursor.fetchone()
-    total_discharges = readmission_data['total_discharges']
-    readmission_rate = (readmission_data['readmissions'] / total_discharges * 100) if total_discharges > 0 else 0
-    
-    # Procedure Volume
-    query = f"""
-        SELECT COUNT(*) as procedure_count
-        FROM patient_procedures pp
-        JOIN admissions a ON pp.admission_id = a.admission_id
-        {where_clause}
-    """
-    cursor.execute(query, params)
-    procedure_count = cursor.fetchone()['procedure_count']
-    
-    # Emergency vs Scheduled
-    query = f"""
-        SELECT 
-            admission_type,
-            COUNT(*) as count
-        FROM admissions a
-        {where_clause}
-        GROUP BY admission_type
-    """
-    cursor.execute(query, params)
-    admission_types = {row['admission_type']: row['count'] for row in cursor.fetchall()}
-    
-    # Cost per Patient
-    query = f"""
-        SELECT AVG(b.total_amount) as avg_cost
-        FROM billing b
-        JOIN admissions a ON b.admission_id = a.admission_id
-        {where_clause}
-    """
-    cursor.execute(query, params)
-    cost_result = cursor.fetchone()
-    avg_cost = float(cost_result['avg_cost']) if cost_result['avg_cost'] else 0
+    cursor = conn.cursor()
+    try:
+        limit_statements(cursor)
+        result = run_plan(plan, cursor, query)
+    except Error as e:
+        if is_query_timeout(e):
+            return query_timeout_response()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
     
-    cursor.close()
-    conn.close()
+    return jsonify(result)
+
+def serve_scatter(scatter, args):
+    """Serve a cross-branch plan: on the owning shard when filtered by branch, else scatter-gather"""
+    branch_id = args.get('branch_id')
+    if branch_id or not shard_router.sharded:
+        return serve_plan(scatter(args), branch_id)
+    
+    try:
+        partials = shard_router.scatter(scatter.partial, args, admission.statement_ms(g.get('route_class')))
+    except BadRequest as e:
+        return jsonify({'error': str(e)}), 400
+    except Error as e:
+        if is_query_timeout(e):
+            return query_timeout_response()
+        print(f"Shard query error: {e}")
+        return jsonify({'error': 'Database connection failed'}), 500
     
-    return jsonify({
-        'alos': round(alos, 2),
-        'bed_occupancy_rate': round(bed_occupancy, 2),
-        'total_admissions': counts['total_admissions'],
-        'total_discharges': counts['total_discharges'],
-        'active_patients': counts['active_patients'],
-        'readmission_rate': round(readmission_rate, 2),
-        'procedure_volume': procedure_count,
-        'emergency_cases': admission_types.get('Emergency', 0),
-        'scheduled_cases': admission_types.get('Scheduled', 0),
-        'avg_cost_per_patient': round(avg_cost, 2)
-    })
+    return jsonify(scatter.finish(scatter.merge(partials), args))
+
+# Alert rules are evaluated in-process as ingest events arrive; alerts are stored on their branch's shard
+alert_engine = AlertEngine(get_db_connection, shard_router.connect_all)
+
+# Patients currently in beds, built once at startup and kept current by ingest events. The index is
+# per worker process: ingest served by another worker shows up at the next rebuild (CENSUS_REFRESH_SECONDS)
+census_index = CensusIndex(shard_router.connect_all, refresh_seconds=int(os.getenv('CENSUS_REFRESH_SECONDS', 30)))
+census_index.load()
+census_index.start_refresh()
+
+# Fitted forecast models, refit only when new daily data arrives
+forecast_cache = ForecastCache()
+
+# Monthly reports generated in the background; outputs kept in a content-addressed store
+report_store = ResultStore(os.getenv('REPORT_STORE_DIR', 'report_store'))
+report_jobs = ReportJobQueue(report_store, get_db_connection, workers=int(os.getenv('REPORT_WORKERS', 2)))
+
+def report_job_payload(job):
+    """Job status with download links for finished outputs"""
+    payload = dict(job)
+    payload['downloads'] = {fmt: f"/api/reports/jobs/{job['job_id']}/{fmt}" for fmt in job.get('outputs') or {}}
+    return payload
+
+# ============== CORE KPI ENDPOINTS ==============
+
+@app.route('/api/kpis/summary', methods=['GET'])
+def get_kpi_summary():
+    """Get overall KPI summary with filters"""
+    if approximate_requested(request.args):
+        return serve_scatter(analytics_queries.approximate_kpi_summary, request.args)
+    return serve_scatter(analytics_queries.kpi_summary, request.args)
 
 @app.route('/api/trends/admissions', methods=['GET'])
 def get_admission_trends():
     """Get admission trends over time"""
-    period = request.args.get('period', 'daily')
-    branch_id = request.args.get('branch_id')
-    dept_id = request.args.get('dept_id')
-    
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = conn.cursor(dictionary=True)
-    
-    if period == 'daily':
-        date_format = '%Y-%m-%d'
-        group_by = "DATE(admission_date)"
-    elif period == 'weekly':
-        date_format = '%Y-%u'
-        group_by = "YEAR(admission_date), WEEK(admission_date)"
-    else:
-        date_format = '%Y-%m'
-        group_by = "YEAR(admission_date), MONTH(admission_date)"
-    
-    where_conditions = ["admission_date >= DATE_SUB(CURRENT_DATE, INTERVAL 90 DAY)"]
-    params = []
-    
-    if branch_id:
-        where_conditions.append("branch_id = %s")
-        params.append(branch_id)
-    if dept_id:
-        where_conditions.append("dept_id = %s")
-        params.append(dept_id)
-    
-    where_clause = "WHERE " + " AND ".join(where_conditions)
-    
-    query = f"""
-        SELECT 
-            DATE_FORMAT(admission_date, '{date_format}') as period,
-            COUNT(*) as total_admissions,
-            SUM(CASE WHEN admission_type = 'Emergency' THEN 1 ELSE 0 END) as emergency_admissions,
-            SUM(CASE WHEN admission_type = 'Scheduled' THEN 1 ELSE 0 END) as scheduled_admissions
-        FROM admissions
-        {where_clause}
-        GROUP BY {group_by}
-        ORDER BY admission_date
-    """
-    
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
-    return jsonify(results)
+    return serve_scatter(analytics_queries.admission_trends, request.args)
 
 @app.route('/api/trends/bed-occupancy', methods=['GET'])
 def get_bed_occupancy_trends():
     """Get bed occupancy trends"""
-    branch_id = request.args.get('branch_id')
-    dept_id = request.args.get('dept_id')
-    
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = conn.cursor(dictionary=True)
-    
-    where_conditions = ["snapshot_date >= DATE_SUB(CURRENT_DATE, INTERVAL 30 DAY)"]
-    params = []
-    
-    if branch_id:
-        where_conditions.append("branch_id = %s")
-        params.append(branch_id)
-    if dept_id:
-        where_conditions.append("dept_id = %s")
-        params.append(dept_id)
-    
-    where_clause = "WHERE " + " AND ".join(where_conditions)
-    
-    query = f"""
-        SELECT 
-            DATE_FORMAT(snapshot_date, '%Y-%m-%d') as date,
-            AVG(occupancy_rate) as avg_occupancy,
-            AVG(icu_occupied) as avg_icu_occupied,
-            AVG(general_occupied) as avg_general_occupied
-        FROM bed_occupancy_daily
-        {where_clause}
-        GROUP BY snapshot_date
-        ORDER BY snapshot_date
-    """
-    
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    
-    for row in results:
-        if row['avg_occupancy']:
-            row['avg_occupancy'] = float(row['avg_occupancy'])
-        if row['avg_icu_occupied']:
-            row['avg_icu_occupied'] = float(row['avg_icu_occupied'])
-        if row['avg_general_occupied']:
-            row['avg_general_occupied'] = float(row['avg_general_occupied'])
-    
-    cursor.close()
-    conn.close()
-    
-    return jsonify(results)
+    return serve_scatter(analytics_queries.bed_occupancy_trends, request.args)
+
+@app.route('/api/forecast/departments', methods=['GET'])
+def get_department_forecast():
+    """Forecast next-week bed occupancy and admissions for every department"""
+    # Models are fitted on one database's daily series, so a sharded deployment forecasts a branch at a time
+    if shard_router.sharded and not request.args.get('branch_id'):
+        return jsonify({'error': 'branch_id is required when branches are sharded'}), 400
+    return serve_plan(analytics_queries.department_forecast(request.args, forecast_cache, MAX_HORIZON_DAYS),
+                      request.args.get('branch_id'))
 
 @app.route('/api/departments/comparison', methods=['GET'])
 def get_department_comparison():
     """Compare metrics across departments"""
-    branch_id = request.args.get('branch_id')
-    
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = conn.cursor(dictionary=True)
-    
-    where_clause = f"WHERE d.branch_id = {branch_id}" if branch_id else ""
-    
-    query = f"""
-        SELECT 
-            d.dept_name,
-            COUNT(DISTINCT a.admission_id) as total_admissions,
-            AVG(DATEDIFF(COALESCE(a.discharge_date, CURRENT_DATE), a.admission_date)) as avg_los,
-            COUNT(DISTINCT pp.procedure_id) as total_procedures,
-            SUM(CASE WHEN a.admission_type = 'Emergency' THEN 1 ELSE 0 END) as emergency_cases,
-            AVG(b.total_amount) as avg_cost
-        FROM departments d
-        LEFT JOIN admissions a ON d.dept_id = a.dept_id
-        LEFT JOIN patient_procedures pp ON a.admission_id = pp.admission_id
-        LEFT JOIN billing b ON a.admission_id = b.admission_id
-        {where_clause}
-        GROUP BY d.dept_id, d.dept_name
-        ORDER BY total_admissions DESC
-    """
-    
-    cursor.execute(query)
-    results = cursor.fetchall()
-    
-    for row in results:
-        if row['avg_los']:
-            row['avg_los'] = float(row['avg_los'])
-        if row['avg_cost']:
-            row['avg_cost'] = float(row['avg_cost'])
-    
-    cursor.close()
-    conn.close()
-    
-    return jsonify(results)
+    if approximate_requested(request.args):
+        return serve_scatter(analytics_queries.approximate_department_comparison, request.args)
+    return serve_scatter(analytics_queries.department_comparison, request.args)
 
 @app.route('/api/branches/comparison', methods=['GET'])
 def get_branch_comparison():
     """Compare metrics across hospital branches"""
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = conn.cursor(dictionary=True)
-    
-    query = """
-        SELECT 
-            b.branch_name,
-            b.total_beds,
-            COUNT(DISTINCT a.admission_id) as total_admissions,
-            AVG(DATEDIFF(COALESCE(a.discharge_date, CURRENT_DATE), a.admission_date)) as avg_los,
-            AVG(bod.occupancy_rate) as avg_occupancy,
-            SUM(bil.total_amount) as total_revenue,
-            AVG(bil.total_amount) as avg_revenue_per_patient
-        FROM branches b
-        LEFT JOIN admissions a ON b.branch_id = a.branch_id
-        LEFT JOIN bed_occupancy_daily bod ON b.branch_id = bod.branch_id 
-            AND bod.snapshot_date >= DATE_SUB(CURRENT_DATE, INTERVAL 30 DAY)
-        LEFT JOIN billing bil ON a.admission_id = bil.admission_id
-        GROUP BY b.branch_id, b.branch_name, b.total_beds
-        ORDER BY total_admissions DESC
-    """
-    
-    cursor.execute(query)
-    results = cursor.fetchall()
-    
-    for row in results:
-        if row['avg_los']:
-            row['avg_los'] = float(row['avg_los'])
-        if row['avg_occupancy']:
-            row['avg_occupancy'] = float(row['avg_occupancy'])
-        if row['total_revenue']:
-            row['total_revenue'] = float(row['total_revenue'])
-        if row['avg_revenue_per_patient']:
-            row['avg_revenue_per_patient'] = float(row['avg_revenue_per_patient'])
-    
-    cursor.close()
-    conn.close()
-    
-    return jsonify(results)
+    if approximate_requested(request.args):
+        return serve_scatter(analytics_queries.approximate_branch_comparison, request.args)
+    return serve_scatter(analytics_queries.branch_comparison, request.args)
 
 @app.route('/api/doctor-utilization', methods=['GET'])
 def get_doctor_utilization():
     """Get doctor utilization statistics"""
-    dept_id = request.args.get('dept_id')
-    branch_id = request.args.get('branch_id')
-    
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = conn.cursor(dictionary=True)
-    
-    where_conditions = []
-    params = []
-    
-    if dept_id:
-        where_conditions.append("doc.dept_id = %s")
-        params.append(dept_id)
-    if branch_id:
-        where_conditions.append("doc.branch_id = %s")
-        params.append(branch_id)
-    
-    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-    
-    query = f"""
-        SELECT 
-            doc.doctor_name,
-            dep.dept_name,
-            doc.working_hours_per_week,
-            COUNT(DISTINCT a.admission_id) as patients_handled,
-            COUNT(DISTINCT pp.procedure_id) as procedures_performed,
-            AVG(pp.duration_minutes) as avg_procedure_duration
-        FROM doctors doc
-        LEFT JOIN departments dep ON doc.dept_id = dep.dept_id
-        LEFT JOIN admissions a ON doc.doctor_id = a.doctor_id 
-            AND a.admission_date >= DATE_SUB(CURRENT_DATE, INTERVAL 30 DAY)
-        LEFT JOIN patient_procedures pp ON doc.doctor_id = pp.doctor_id
-            AND pp.procedure_date >= DATE_SUB(CURRENT_DATE, INTERVAL 30 DAY)
-        {where_clause}
-        GROUP BY doc.doctor_id, doc.doctor_name, dep.dept_name, doc.working_hours_per_week
-        ORDER BY patients_handled DESC
-    """
-    
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    
-    for row in results:
-        if row['avg_procedure_duration']:
-            row['avg_procedure_duration'] = float(row['avg_procedure_duration'])
-        weekly_hours = row['working_hours_per_week']
-        estimated_hours = (row['patients_handled'] * 0.5 + row['procedures_performed'] * 1.5)
-        row['utilization_percentage'] = min(100, round((estimated_hours / weekly_hours * 100), 2))
-    
-    cursor.close()
-    conn.close()
-    
-    return jsonify(results)
+    return serve_scatter(analytics_queries.doctor_utilization, request.args)
 
 @app.route('/api/outcomes/summary', methods=['GET'])
 def get_outcomes_summary():
     """Get patient outcome statistics"""
-    branch_id = request.args.get('branch_id')
-    dept_id = request.args.get('dept_id')
-    
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = conn.cursor(dictionary=True)
-    
-    where_conditions = []
-    params = []
-    
-    if branch_id:
-        where_conditions.append("a.branch_id = %s")
-        params.append(branch_id)
-    if dept_id:
-        where_conditions.append("a.dept_id = %s")
-        params.append(dept_id)
-    
-    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-    if where_clause:
-        where_clause += " AND o.outcome_date >= DATE_SUB(CURRENT_DATE, INTERVAL 90 DAY)"
-    else:
-        where_clause = "WHERE o.outcome_date >= DATE_SUB(CURRENT_DATE, INTERVAL 90 DAY)"
-    
-    query = f"""
-        SELECT 
-            o.outcome_type,
-            COUNT(*) as count
-        FROM outcomes o
-        JOIN admissions a ON o.admission_id = a.admission_id
-        {where_clause}
-        GROUP BY o.outcome_type
-    """
-    
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
-    return jsonify(results)
+    return serve_scatter(analytics_queries.outcomes_summary, request.args)
+
+@app.route('/api/los/distribution', methods=['GET'])
+def get_los_distribution():
+    """Get length-of-stay distribution (median, p90, p99, histogram) from LOS sketches"""
+    return serve_scatter(analytics_queries.los_distribution, request.args)
+
+@app.route('/api/patients/unique', methods=['GET'])
+def get_unique_patients():
+    """Unique patients admitted in a date range, optionally per branch or department"""
+    return serve_scatter(analytics_queries.unique_patients, request.args)
 
 @app.route('/api/alerts/active', methods=['GET'])
 def get_active_alerts():
     """Get active resource alerts"""
-    branch_id = request.args.get('branch_id')
-    
-    conn = get_db_connection()
+    return serve_scatter(analytics_queries.active_alerts, request.args)
+
+@app.route('/api/peak-hours', methods=['GET'])
+def get_peak_hours():
+    """Get peak admission hours/days for staffing optimization"""
+    return serve_scatter(analytics_queries.peak_hours, request.args)
+
+@app.route('/api/filters/options', methods=['GET'])
+def get_filter_options():
+    """Get available filter options (branches, departments)"""
+    return serve_plan(analytics_queries.filter_options(request.args))
+
+@app.route('/api/export/monthly-report', methods=['GET'])
+def export_monthly_report():
+    """Generate monthly performance report data"""
+    return serve_scatter(analytics_queries.monthly_report, request.args)
+
+@app.route('/api/reports/period', methods=['GET'])
+def get_period_report():
+    """Quarter, year-to-date or trailing-12-month report assembled from monthly partials"""
+    return serve_scatter(analytics_queries.period_report, request.args)
+
+@app.route('/api/reports/jobs', methods=['POST'])
+def submit_report_job():
+    """Queue a monthly report; identical pending requests share one job"""
+    data = request.get_json(silent=True) or {}
+    try:
+        month = datetime.strptime(str(data.get('month', '')), '%Y-%m')
+        branch_id = int(data['branch_id']) if data.get('branch_id') not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'month (YYYY-MM) and an integer branch_id are required'}), 400
+    # A report job reads one database, which holds every branch only when unsharded
+    if shard_router.sharded and branch_id is None:
+        return jsonify({'error': 'branch_id is required when branches are sharded'}), 400
+    
+    job, deduplicated = report_jobs.submit(month.year, month.month, branch_id)
+    payload = report_job_payload(job)
+    payload['deduplicated'] = deduplicated
+    return jsonify(payload), 202
+
+@app.route('/api/reports/jobs/<job_id>', methods=['GET'])
+def get_report_job(job_id):
+    """Status of a report job"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(report_job_payload(job))
+
+@app.route('/api/reports/jobs/<job_id>/<fmt>', methods=['GET'])
+def download_report_job(job_id, fmt):
+    """Download a finished report as json, csv or txt"""
+    if fmt not in REPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(REPORT_FORMATS)}"}), 400
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': f"Job is {job['status']}", 'status': job['status']}), 409
+    
+    suffix, mimetype = REPORT_FORMATS[fmt]
+    branch = f"_branch{job['branch_id']}" if job['branch_id'] else ''
+    response = send_file(report_store.object_path(job['outputs'][fmt]), mimetype=mimetype,
+                         as_attachment=True, download_name=f"monthly_report_{job['month']}{branch}.{suffix}")
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+def census_payload(args):
+    """(payload, status) of a census request, shared with the async backend"""
+    try:
+        filters = {dimension: int(args[dimension]) for dimension in ('branch_id', 'dept_id', 'doctor_id')
+                   if args.get(dimension)}
+        limit = min(int(args.get('limit', 0)), 1000)
+    except ValueError:
+        return {'error': 'branch_id, dept_id, doctor_id and limit must be integers'}, 400
+    if args.get('bed_type'):
+        filters['bed_type'] = args['bed_type']
+    group_by = args.get('group_by')
+    if group_by and group_by not in DIMENSIONS:
+        return {'error': f"group_by must be one of: {', '.join(DIMENSIONS)}"}, 400
+    
+    census_index.ensure_loaded()
+    if census_index.loaded_at is None:
+        return {'error': 'Database connection failed'}, 500
+    return census_index.census(filters, group_by, limit), 200
+
+@app.route('/api/census', methods=['GET'])
+def get_census():
+    """Who and how many are in beds right now, from the in-memory census (no SQL)"""
+    payload, status = census_payload(request.args)
+    return jsonify(payload), status
+
+@app.route('/api/census/reload', methods=['POST'])
+def reload_census():
+    """Rebuild the census from v_active_admissions"""
+    if not census_index.load():
+        return jsonify({'error': 'Database connection failed'}), 500
+    return jsonify({'status': 'reloaded', 'active_patients': census_index.count()})
+
+@app.route('/api/alerts/reload', methods=['POST'])
+def reload_alert_state():
+    """Reload alert thresholds and seed counters after configuration changes"""
+    if not alert_engine.load():
+        return jsonify({'error': 'Database connection failed'}), 500
+    return jsonify({'status': 'reloaded', 'open_alerts': len(alert_engine.open_alerts)})
+
+# ============== INGEST ENDPOINTS ==============
+
+def refresh_readmissions(cursor, patient_id):
+    """Recompute a patient's admission gaps; when sharded, their admissions are paired across every shard"""
+    if not shard_router.sharded:
+        refresh_patients(cursor, [patient_id])
+        return
+    connections = shard_router.connect_all()
+    try:
+        refresh_patients_across([conn.cursor() for conn in connections], [patient_id])
+    finally:
+        for conn in connections:
+            conn.close()
+
+@app.route('/api/ingest/occupancy', methods=['POST'])
+def ingest_occupancy():
+    """Store a bed occupancy snapshot and evaluate occupancy/ICU alert rules"""
+    data = request.get_json(silent=True) or {}
+    try:
+        branch_id = int(data['branch_id'])
+        dept_id = int(data['dept_id']) if data.get('dept_id') is not None else None
+        total_beds = int(data['total_beds'])
+        occupied_beds = int(data['occupied_beds'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'branch_id, total_beds and occupied_beds are required'}), 400
+    icu_occupied = data.get('icu_occupied')
+    general_occupied = data.get('general_occupied')
+    now = datetime.now()
+    occupancy_rate = (occupied_beds / total_beds * 100) if total_beds else 0
+    
+    conn = get_db_connection(branch_id)
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
-    cursor = conn.cursor(dictionary=True)
-    
-    where_conditions = ["resolved = FALSE"]
-    params = []
-    
-    if branch_id:
-        where_conditions.append("ra.branch_id = %s")
-        params.append(branch_id)
-    
-    where_clause = "WHERE " + " AND ".join(where_conditions)
-    
-    query = f"""
-        SELECT 
-            ra.alert_id,
-            ra.alert_type,
-            ra.severity,
-            ra.alert_message,
-            ra.alert_date,
-            b.branch_name,
-            d.dept_name
-        FROM resource_alerts ra
-        JOIN branches b ON ra.branch_id = b.branch_id
-        LEFT JOIN departments d ON ra.dept_id = d.dept_id
-        {where_clause}
-        ORDER BY 
-            FIELD(ra.severity, 'Critical', 'High', 'Medium', 'Low'),
-            ra.alert_date DESC
-        LIMIT 50
-    """
-    
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO bed_occupancy_daily
+        (branch_id, dept_id, snapshot_date, snapshot_hour, total_beds, occupied_beds,
+         occupancy_rate, icu_occupied, general_occupied)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (branch_id, dept_id, data.get('snapshot_date', now.date()), data.get('snapshot_hour', now.hour),
+          total_beds, occupied_beds, occupancy_rate, icu_occupied or 0, general_occupied or 0))
+    record_id = cursor.lastrowid
     cursor.close()
     conn.close()
     
-    return jsonify(results)
-
-@app.route('/api/peak-hours', methods=['GET'])
-def get_peak_hours():
-    """Get peak admission hours/days for staffing optimization"""
-    branch_id = request.args.get('branch_id')
+    alerts = alert_engine.on_occupancy(branch_id, dept_id, occupied_beds, total_beds,
+                                       int(icu_occupied) if icu_occupied is not None else None)
     
-    conn = get_db_connection()
+    return jsonify({'record_id': record_id, 'alerts': alerts}), 201
+
+@app.route('/api/ingest/admission', methods=['POST'])
+def ingest_admission():
+    """Store a new admission and evaluate the staffing alert rule"""
+    data = request.get_json(silent=True) or {}
+    required = ['patient_id', 'branch_id', 'dept_id', 'doctor_id', 'admission_type']
+    missing = [field for field in required if data.get(field) is None]
+    if missing:
+        return jsonify({'error': f"Missing fields: {', '.join(missing)}"}), 400
+    branch_id = int(data['branch_id'])
+    dept_id = int(data['dept_id'])
+    
+    conn = get_db_connection(branch_id)
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
-    cursor = conn.cursor(dictionary=True)
-    
-    where_clause = f"WHERE branch_id = {branch_id}" if branch_id else ""
-    if where_clause:
-        where_clause += " AND admission_date >= DATE_SUB(CURRENT_DATE, INTERVAL 90 DAY)"
-    else:
-        where_clause = "WHERE admission_date >= DATE_SUB(CURRENT_DATE, INTERVAL 90 DAY)"
-    
-    query = f"""
-        SELECT 
-            HOUR(admission_date) as hour,
-            COUNT(*) as admission_count
-        FROM admissions
-        {where_clause}
-        GROUP BY HOUR(admission_date)
-        ORDER BY admission_count DESC
-        LIMIT 10
-    """
-    
-    cursor.execute(query)
-    peak_hours = cursor.fetchall()
-    
-    query = f"""
-        SELECT 
-            DAYNAME(admission_date) as day_name,
-            DAYOFWEEK(admission_date) as day_number,
-            COUNT(*) as admission_count
-        FROM admissions
-        {where_clause}
-        GROUP BY DAYOFWEEK(admission_date), DAYNAME(admission_date)
-        ORDER BY admission_count DESC
-    """
-    
-    cursor.execute(query)
-    peak_days = cursor.fetchall()
-    
+    admission_date = data.get('admission_date', datetime.now())
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO admissions
+        (patient_id, branch_id, dept_id, doctor_id, admission_date, admission_type,
+         diagnosis_category, bed_type, bed_number, status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'Active')
+    """, (data['patient_id'], branch_id, dept_id, data['doctor_id'],
+          admission_date, data['admission_type'],
+          data.get('diagnosis_category'), data.get('bed_type'), data.get('bed_number')))
+    admission_id = cursor.lastrowid
+    refresh_readmissions(cursor, data['patient_id'])
+    # The day of a datetime or of an ISO date/datetime string
+    record_admission(cursor, branch_id, dept_id, str(admission_date)[:10], data['patient_id'])
+    cursor.execute(CENSUS_QUERY + " WHERE admission_id = %s", (admission_id,))
+    census_row = cursor.fetchone()
     cursor.close()
     conn.close()
     
-    return jsonify({
-        'peak_hours': peak_hours,
-        'peak_days': peak_days
-    })
+    if census_row:
+        census_index.on_admission(census_row)
+    alerts = alert_engine.on_admission(branch_id, dept_id)
+    
+    return jsonify({'admission_id': admission_id, 'alerts': alerts}), 201
 
-@app.route('/api/filters/options', methods=['GET'])
-def get_filter_options():
-    """Get available filter options (branches, departments)"""
-    conn = get_db_connection()
+@app.route('/api/ingest/discharge', methods=['POST'])
+def ingest_discharge():
+    """Discharge an active admission and evaluate the staffing alert rule"""
+    data = request.get_json(silent=True) or {}
+    if data.get('admission_id') is None:
+        return jsonify({'error': 'admission_id is required'}), 400
+    # Admission ids are only unique within a shard
+    if shard_router.sharded and data.get('branch_id') is None:
+        return jsonify({'error': 'branch_id is required when branches are sharded'}), 400
+    
+    conn = get_db_connection(data.get('branch_id'))
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT branch_id, branch_name, location FROM branches ORDER BY branch_name")
-    branches = cursor.fetchall()
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE admissions
+        SET status = 'Discharged', discharge_date = %s
+        WHERE admission_id = %s AND status = 'Active'
+    """, (data.get('discharge_date', datetime.now()), data['admission_id']))
+    updated = cursor.rowcount
+    cursor.execute("""
+        SELECT branch_id, dept_id, DATE(discharge_date),
+               GREATEST(DATEDIFF(discharge_date, admission_date), 0), patient_id
+        FROM admissions WHERE admission_id = %s
+    """, (data['admission_id'],))
+    row = cursor.fetchone()
+    if row and updated:
+        record_discharge(cursor, *row[:4])
+        refresh_readmissions(cursor, row[4])
+    cursor.close()
+    conn.close()
     
-    cursor.execute("SELECT dept_id, dept_name, dept_type, branch_id FROM departments ORDER BY dept_name")
-    departments = cursor.fetchall()
+    if not row:
+        return jsonify({'error': 'Admission not found'}), 404
+    if not updated:
+        return jsonify({'error': 'Admission is not active'}), 409
     
-    cursor.execute("SELECT DISTINCT diagnosis_category FROM admissions WHERE diagnosis_category IS NOT NULL")
-    diagnoses = [row['diagnosis_category'] for row in cursor.fetchall()]
+    census_index.on_discharge(row[0], int(data['admission_id']))
+    alerts = alert_engine.on_discharge(row[0], row[1])
     
-    cursor.execute("SELECT DISTINCT insurance_type FROM patients")
-    insurance_types = [row['insurance_type'] for row in cursor.fetchall()]
+    return jsonify({'admission_id': data['admission_id'], 'alerts': alerts})
+
+@app.route('/api/ingest/procedure', methods=['POST'])
+def ingest_procedure():
+    """Record a procedure performed during an admission"""
+    data = request.get_json(silent=True) or {}
+    required = ['admission_id', 'procedure_id', 'doctor_id']
+    missing = [field for field in required if data.get(field) is None]
+    if missing:
+        return jsonify({'error': f"Missing fields: {', '.join(missing)}"}), 400
+    # Admission ids are only unique within a shard
+    if shard_router.sharded and data.get('branch_id') is None:
+        return jsonify({'error': 'branch_id is required when branches are sharded'}), 400
+    
+    conn = get_db_connection(data.get('branch_id'))
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 500
     
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO patient_procedures
+        (admission_id, procedure_id, procedure_date, doctor_id, duration_minutes, cost, status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, (data['admission_id'], data['procedure_id'], data.get('procedure_date', datetime.now()),
+          data['doctor_id'], data.get('duration_minutes'), data.get('cost'), data.get('status', 'Completed')))
+    record_id = cursor.lastrowid
     cursor.close()
     conn.close()
     
-    return jsonify({
-        'branches': branches,
-        'departments': departments,
-        'diagnoses': diagnoses,
-        'insurance_types': insurance_types
-    })
+    return jsonify({'record_id': record_id}), 201
 
-@app.route('/api/export/monthly-report', methods=['GET'])
-def export_monthly_report():
-    """Generate monthly performance report data"""
-    month = request.args.get('month')
-    branch_id = request.args.get('branch_id')
+@app.route('/api/ingest/billing', methods=['POST'])
+def ingest_billing():
+    """Record the bill of an admission"""
+    data = request.get_json(silent=True) or {}
+    if data.get('admission_id') is None or data.get('total_amount') is None:
+        return jsonify({'error': 'admission_id and total_amount are required'}), 400
+    # Admission ids are only unique within a shard
+    if shard_router.sharded and data.get('branch_id') is None:
+        return jsonify({'error': 'branch_id is required when branches are sharded'}), 400
+    
+    conn = get_db_connection(data.get('branch_id'))
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 500
     
-    if not month:
-        return jsonify({'error': 'Month parameter required (format: YYYY-MM)'}), 400
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO billing
+        (admission_id, total_amount, room_charges, procedure_charges, medicine_charges, lab_charges,
+         other_charges, discount, insurance_coverage, amount_paid, payment_status, bill_date)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (data['admission_id'], data['total_amount'], data.get('room_charges'), data.get('procedure_charges'),
+          data.get('medicine_charges'), data.get('lab_charges'), data.get('other_charges'),
+          data.get('discount', 0), data.get('insurance_coverage', 0), data.get('amount_paid', 0),
+          data.get('payment_status', 'Pending'), data.get('bill_date', datetime.now())))
+    bill_id = cursor.lastrowid
+    cursor.close()
+    conn.close()
     
-    conn = get_db_connection()
+    return jsonify({'bill_id': bill_id}), 201
+
+@app.route('/api/ingest/outcome', methods=['POST'])
+def ingest_outcome():
+    """Record the outcome of a discharged admission"""
+    data = request.get_json(silent=True) or {}
+    if data.get('admission_id') is None or data.get('outcome_type') is None:
+        return jsonify({'error': 'admission_id and outcome_type are required'}), 400
+    # Admission ids are only unique within a shard
+    if shard_router.sharded and data.get('branch_id') is None:
+        return jsonify({'error': 'branch_id is required when branches are sharded'}), 400
+    readmitted = bool(data.get('readmission_within_30days', False))
+    
+    conn = get_db_connection(data.get('branch_id'))
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
-    cursor = conn.cursor(dictionary=True)
-    
-    where_conditions = [
-        f"DATE_FORMAT(a.admission_date, '%Y-%m') = '{month}'"
-    ]
-    params = []
-    
-    if branch_id:
-        where_conditions.append("a.branch_id = %s")
-        params.append(branch_id)
-    
-    where_clause = "WHERE " + " AND ".join(where_conditions)
-    
-    query = f"""
-        SELECT 
-            COUNT(DISTINCT a.admission_id) as total_admissions,
-            COUNT(DISTINCT CASE WHEN a.status = 'Discharged' THEN a.admission_id END) as total_discharges,
-            AVG(DATEDIFF(COALESCE(a.discharge_date, CURRENT_DATE), a.admission_date)) as avg_los,
-            SUM(b.total_amount) as total_revenue,
-            AVG(b.total_amount) as avg_cost_per_patient,
-            COUNT(DISTINCT pp.procedure_id) as total_procedures
-        FROM admissions a
-        LEFT JOIN billing b ON a.admission_id = b.admission_id
-        LEFT JOIN patient_procedures pp ON a.admission_id = pp.admission_id
-        {where_clause}
-    """
-    
-    cursor.execute(query, params)
-    summary = cursor.fetchone()
-    
-    if summary:
-        if summary['avg_los']:
-            summary['avg_los'] = float(summary['avg_los'])
-        if summary['total_revenue']:
-            summary['total_revenue'] = float(summary['total_revenue'])
-        if summary['avg_cost_per_patient']:
-            summary['avg_cost_per_patient'] = float(summary['avg_cost_per_patient'])
-    
-    query = f"""
-        SELECT 
-            d.dept_name,
-            COUNT(DISTINCT a.admission_id) as admissions,
-            AVG(DATEDIFF(COALESCE(a.discharge_date, CURRENT_DATE), a.admission_date)) as avg_los,
-            SUM(b.total_amount) as revenue
-        FROM departments d
-        LEFT JOIN admissions a ON d.dept_id = a.dept_id AND {where_conditions[0]}
-        LEFT JOIN billing b ON a.admission_id = b.admission_id
-        {'WHERE a.branch_id = %s' if branch_id else ''}
-        GROUP BY d.dept_id, d.dept_name
-        ORDER BY admissions DESC
-    """
-    
-    cursor.execute(query, params if branch_id else [])
-    dept_breakdown = cursor.fetchall()
-    
-    for row in dept_breakdown:
-        if row['avg_los']:
-            row['avg_los'] = float(row['avg_los'])
-        if row['revenue']:
-            row['revenue'] = float(row['revenue'])
-    
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO outcomes
+        (admission_id, outcome_type, outcome_date, readmission_flag, readmission_within_30days)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (data['admission_id'], data['outcome_type'], data.get('outcome_date', datetime.now()),
+          bool(data.get('readmission_flag', readmitted)), readmitted))
+    outcome_id = cursor.lastrowid
     cursor.close()
     conn.close()
     
-    return jsonify({
-        'month': month,
-        'summary': summary,
-        'department_breakdown': dept_breakdown,
-        'generated_at': datetime.now().isoformat()
-    })
+    return jsonify({'outcome_id': outcome_id}), 201
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -720,6 +637,37 @@ def health_check():
         return jsonify({'status': 'healthy', 'database': 'connected'})
     return jsonify({'status': 'unhealthy', 'database': 'disconnected'}), 500
 
+# ============== DASHBOARD ==============
+
+# Output of build_dashboard.py: index.html plus content-hashed assets, each with a .gz twin
+DASHBOARD_DIR = os.getenv('DASHBOARD_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         'static', 'dashboard'))
+
+def send_dashboard_file(name, cache_control):
+    """Send a built dashboard file, precompressed when the client accepts gzip"""
+    mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    gzipped = safe_join(DASHBOARD_DIR, name + '.gz')
+    if 'gzip' in request.accept_encodings and gzipped and os.path.isfile(gzipped):
+        response = send_from_directory(DASHBOARD_DIR, name + '.gz', mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_from_directory(DASHBOARD_DIR, name, mimetype=mimetype)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+@app.route('/dashboard/')
+def dashboard():
+    """The dashboard page; revalidated on every load so new builds are picked up at once"""
+    if not os.path.isfile(os.path.join(DASHBOARD_DIR, 'index.html')):
+        return jsonify({'error': 'Dashboard not built (run python build_dashboard.py)'}), 404
+    return send_dashboard_file('index.html', 'no-cache')
+
+@app.route('/dashboard/assets/<path:name>')
+def dashboard_asset(name):
+    """Content-hashed dashboard scripts and styles, cached for good"""
+    return send_dashboard_file(f"assets/{name}", 'public, max-age=31536000, immutable')
+
 @app.route('/')
 def index():
     """Root endpoint"""
@@ -728,18 +676,35 @@ def index():
         'version': '2.0',
         'status': 'running',
         'endpoints': [
+            '/dashboard/',
             '/api/health',
             '/api/kpis/summary',
             '/api/trends/admissions',
             '/api/trends/bed-occupancy',
+            '/api/forecast/departments',
             '/api/departments/comparison',
             '/api/branches/comparison',
             '/api/doctor-utilization',
             '/api/outcomes/summary',
+            '/api/los/distribution',
+            '/api/patients/unique',
             '/api/alerts/active',
+            '/api/alerts/reload',
+            '/api/census',
+            '/api/census/reload',
+            '/api/ingest/occupancy',
+            '/api/ingest/admission',
+            '/api/ingest/discharge',
+            '/api/ingest/procedure',
+            '/api/ingest/billing',
+            '/api/ingest/outcome',
             '/api/peak-hours',
             '/api/filters/options',
-            '/api/export/monthly-report'
+            '/api/export/monthly-report',
+            '/api/reports/period',
+            '/api/reports/jobs',
+            '/api/reports/jobs/<job_id>',
+            '/api/reports/jobs/<job_id>/<format>'
         ]
     })
 
@@ -0,0 +1,200 @@
+"""
+Department Occupancy & Admission Forecasting for Hospital Analytics
+Fits day-of-week + linear trend models for every department at once with NumPy
+"""
+
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from query_plan import Query
+from result_mapping import ColumnTypes, FLOAT
+
+HISTORY_DAYS = 56       # eight weeks of daily history per fit
+MAX_HORIZON_DAYS = 14
+RIDGE = 1e-6            # keeps the normal equations solvable for sparse departments
+
+SERIES_TYPES = ColumnTypes(value=FLOAT)
+
+
+def design_matrix(day_numbers):
+    """Columns: intercept, trend, and six day-of-week offsets (Monday is the baseline)"""
+    day_numbers = np.asarray(day_numbers)
+    weekday = (day_numbers + date(1970, 1, 1).weekday()) % 7
+    X = np.zeros((len(day_numbers), 8))
+    X[:, 0] = 1.0
+    X[:, 1] = day_numbers - day_numbers[0] if len(day_numbers) else 0
+    for dow in range(1, 7):
+        X[:, 1 + dow] = weekday == dow
+    return X
+
+
+def fit_seasonal_trend(X, Y, W):
+    """
+    Weighted least squares for every series in one batched solve.
+    X is (T, k), Y and W are (T, D); W is 0 where a department has no observation.
+    Returns coefficients (D, k) and residual standard deviation (D,).
+    """
+    A = np.einsum('td,ti,tj->dij', W, X, X)
+    A += RIDGE * np.eye(X.shape[1])
+    b = np.einsum('td,ti,td->di', W, X, Y)
+    beta = np.linalg.solve(A, b[..., None])[..., 0]
+
+    residuals = (Y - X @ beta.T) * W
+    dof = np.maximum(W.sum(axis=0) - X.shape[1], 1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=0) / dof)
+    return beta, sigma
+
+
+def to_matrix(rows, dept_ids, start_day, num_days):
+    """Scatter (dept_id, day, value) rows into dense (T, D) value and weight matrices"""
+    column = {dept_id: i for i, dept_id in enumerate(dept_ids)}
+    values = np.zeros((num_days, len(dept_ids)))
+    weights = np.zeros((num_days, len(dept_ids)))
+    if rows:
+        depts, days, vals = zip(*rows)
+        cols = np.fromiter((column[d] for d in depts), dtype=np.intp, count=len(rows))
+        t = np.fromiter((day.toordinal() - start_day for day in days), dtype=np.intp, count=len(rows))
+        values[t, cols] = np.asarray(vals, dtype=float)
+        weights[t, cols] = 1.0
+    return values, weights
+
+
+class DepartmentForecaster:
+    """Fitted models for one branch (or all branches), valid for a single data watermark"""
+
+    def __init__(self, departments, watermark, last_day, occupancy, admissions):
+        self.departments = departments      # list of (dept_id, dept_name, total_beds)
+        self.watermark = watermark
+        self.last_day = last_day
+        self.occupancy = occupancy          # (beta, sigma)
+        self.admissions = admissions
+
+    @classmethod
+    def fit(cls, departments, watermark, end_day, occupancy_rows, admission_rows):
+        """Fit occupied-bed and admission-count models for all departments"""
+        dept_ids = [dept[0] for dept in departments]
+        start_day = end_day.toordinal() - HISTORY_DAYS + 1
+        X = design_matrix(np.arange(start_day, end_day.toordinal() + 1) - date(1970, 1, 1).toordinal())
+
+        Y_occ, W_occ = to_matrix(occupancy_rows, dept_ids, start_day, HISTORY_DAYS)
+        Y_adm, _ = to_matrix(admission_rows, dept_ids, start_day, HISTORY_DAYS)
+        # A day without admissions is a real zero, not a missing observation
+        W_adm = np.ones_like(Y_adm)
+
+        return cls(departments, watermark, end_day,
+                   fit_seasonal_trend(X, Y_occ, W_occ),
+                   fit_seasonal_trend(X, Y_adm, W_adm))
+
+    def predict(self, horizon):
+        """Forecast the next `horizon` days for every department"""
+        first = self.last_day.toordinal() + 1
+        start = self.last_day.toordinal() - HISTORY_DAYS + 1
+        epoch = date(1970, 1, 1).toordinal()
+        X = design_matrix(np.arange(start, first + horizon) - epoch)[-horizon:]
+
+        occ_beta, occ_sigma = self.occupancy
+        adm_beta, adm_sigma = self.admissions
+        capacity = np.array([dept[2] or 0 for dept in self.departments], dtype=float)
+
+        occupied = np.clip(X @ occ_beta.T, 0, np.where(capacity > 0, capacity, np.inf))
+        admissions = np.clip(X @ adm_beta.T, 0, None)
+        rate = np.divide(occupied * 100, capacity, out=np.zeros_like(occupied), where=capacity > 0)
+
+        dates = [date.fromordinal(first + i).isoformat() for i in range(horizon)]
+        results = []
+        for j, (dept_id, dept_name, total_beds) in enumerate(self.departments):
+            results.append({
+                'dept_id': dept_id,
+                'dept_name': dept_name,
+                'total_beds': total_beds,
+                'occupancy_error': round(float(occ_sigma[j]), 2),
+                'admissions_error': round(float(adm_sigma[j]), 2),
+                'forecast': [
+                    {
+                        'date': dates[i],
+                        'occupied_beds': round(float(occupied[i, j]), 1),
+                        'occupancy_rate': round(float(rate[i, j]), 2),
+                        'admissions': round(float(admissions[i, j]), 1),
+                    }
+                    for i in range(horizon)
+                ],
+            })
+        return results
+
+
+class ForecastCache:
+    """Caches fitted models per branch and refits only when new daily data lands"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.models = {}    # branch_id or None -> DepartmentForecaster
+
+    def plan(self, branch_id=None):
+        """Query plan returning a forecaster whose fit matches the current data watermark"""
+        watermark = yield from read_watermark(branch_id)
+        with self.lock:
+            model = self.models.get(branch_id)
+        if model is not None and model.watermark == watermark:
+            return model
+
+        model = yield from load_and_fit(branch_id, watermark)
+        with self.lock:
+            self.models[branch_id] = model
+        return model
+
+
+def read_watermark(branch_id):
+    """Latest snapshot/admission day for the scope; both lookups are index-only"""
+    branch_filter = "AND branch_id = %s" if branch_id else ""
+    params = (branch_id,) if branch_id else ()
+    row = yield Query(f"""
+        SELECT
+            (SELECT MAX(snapshot_date) FROM bed_occupancy_daily
+             WHERE dept_id IS NOT NULL {branch_filter}) as last_snapshot,
+            (SELECT MAX(admission_date) FROM admissions
+             WHERE 1 = 1 {branch_filter}) as last_admission
+    """, params * 2, one=True)
+    last_admission = row['last_admission'].date() if row['last_admission'] else None
+    return (row['last_snapshot'], last_admission)
+
+
+def load_and_fit(branch_id, watermark):
+    """Pull the training window for every department and fit in one pass"""
+    days = [day for day in watermark if day is not None]
+    end_day = max(days) if days else date.today()
+    start = end_day - timedelta(days=HISTORY_DAYS - 1)
+
+    branch_filter = "AND branch_id = %s" if branch_id else ""
+    params = [branch_id] if branch_id else []
+
+    rows = yield Query(f"""
+        SELECT dept_id, dept_name, total_beds
+        FROM departments
+        WHERE 1 = 1 {branch_filter}
+        ORDER BY dept_id
+    """, params)
+    departments = [(row['dept_id'], row['dept_name'], row['total_beds']) for row in rows]
+
+    rows = yield Query(f"""
+        SELECT dept_id, snapshot_date as day, AVG(occupied_beds) as value
+        FROM bed_occupancy_daily
+        WHERE dept_id IS NOT NULL AND snapshot_date BETWEEN %s AND %s {branch_filter}
+        GROUP BY dept_id, snapshot_date
+    """, [start, end_day] + params, types=SERIES_TYPES)
+    occupancy_rows = rows.tuples()
+
+    rows = yield Query(f"""
+        SELECT dept_id, DATE(admission_date) as day, COUNT(*) as value
+        FROM admissions
+        WHERE admission_date >= %s AND admission_date < %s {branch_filter}
+        GROUP BY dept_id, DATE(admission_date)
+    """, [start, end_day + timedelta(days=1)] + params, types=SERIES_TYPES)
+    admission_rows = rows.tuples()
+
+    known = {dept[0] for dept in departments}
+    occupancy_rows = [row for row in occupancy_rows if row[0] in known]
+    admission_rows = [row for row in admission_rows if row[0] in known]
+
+    return DepartmentForecaster.fit(departments, watermark, end_day, occupancy_rows, admission_rows)
@@ -3,12 +3,22 @@ Sample Data Generator for Hospital Analytics Dashboard
 Generates realistic hospital operational data for testing and demonstration
 """
 
+import argparse
 import random
 import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import timedelta
 import mysql.connector
 from mysql.connector import Error
 
+from admission_sample import refresh_sample_month
+from dataset_files import FORMATS, ShardFileWriter, check_format, write_manifest, write_part
+from los_sketch import refresh_sketches
+from patient_sketch import refresh_patient_sketches
+from period_reports import add_months, refresh_month
+from readmissions import rebuild as rebuild_admission_gaps
+
 # Configuration
 DB_CONFIG = {
     'host': 'localhost',
@@ -186,8 +196,9 @@ def insert_admissions_and_related(cursor, start_date, num_days=180):
     """Insert admissions, procedures, billing, and outcomes"""
     print(f"Generating admissions data for {num_days} days...")
     
-    cursor.execute("SELECT patient_id FROM patients")
-    patient_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT patient_id, insurance_type FROM patients")
+    insurance_by_patient = dict(cursor.fetchall())
+    patient_ids = list(insurance_by_patient)
     
     cursor.execute("SELECT dept_id, dept_type, branch_id FROM departments")
     departments = cursor.fetchall()
@@ -278,9 +289,7 @@ def insert_admissions_and_related(cursor, start_date, num_days=180):
             total_amount = room_charges + procedure_charges + medicine_charges + lab_charges + other_charges
             discount = total_amount *Decimal(str(random.uniform(0.9, 1.2)))
             
-            # Get insurance type
-            cursor.execute("SELECT insurance_type FROM patients WHERE patient_id = %s", (patient_id,))
-            insurance_type = cursor.fetchone()[0]
+            insurance_type = insurance_by_patient[patient_id]
             insurance_coverage = total_amount * Decimal(str(random.uniform(0.5, 0.8))) if insurance_type != 'Self-Pay' else 0
             
             amount_paid = total_amount - discount if status == 'Discharged' else total_amount * Decimal(str(random.uniform(0.3, 0.7)))
@@ -307,6 +316,225 @@ def insert_admissions_and_related(cursor, start_date, num_days=180):
     
     print(f"Inserted {admission_count} admissions with related data")
 
+# Column order of the generated fact rows (matches hospital_schema.sql). Every row carries its
+# primary key: child ids derive from the admission id (bill and outcome share it, procedures
+# use admission_id * 3 + n), so concurrent loaders produce the same ids as a serial one.
+FACT_COLUMNS = {
+    'admissions': ('admission_id', 'patient_id', 'branch_id', 'dept_id', 'doctor_id', 'admission_date',
+                   'discharge_date', 'admission_type', 'diagnosis_category', 'bed_type', 'bed_number', 'status'),
+    'patient_procedures': ('record_id', 'admission_id', 'procedure_id', 'procedure_date', 'doctor_id',
+                           'duration_minutes', 'cost', 'status'),
+    'billing': ('bill_id', 'admission_id', 'total_amount', 'room_charges', 'procedure_charges', 'medicine_charges',
+                'lab_charges', 'other_charges', 'discount', 'insurance_coverage', 'amount_paid', 'payment_status'),
+    'outcomes': ('outcome_id', 'admission_id', 'outcome_type', 'outcome_date', 'readmission_flag',
+                 'readmission_within_30days'),
+    'bed_occupancy_daily': ('record_id', 'branch_id', 'dept_id', 'snapshot_date', 'snapshot_hour', 'total_beds',
+                            'occupied_beds', 'occupancy_rate', 'icu_occupied', 'general_occupied'),
+}
+
+# Reference tables of seeded generation, with explicit ids
+REFERENCE_COLUMNS = {
+    'branches': ('branch_id', 'branch_name', 'location', 'total_beds', 'icu_beds', 'general_beds'),
+    'departments': ('dept_id', 'dept_name', 'dept_type', 'branch_id', 'total_beds'),
+    'doctors': ('doctor_id', 'doctor_name', 'specialization', 'dept_id', 'branch_id', 'working_hours_per_week'),
+    'patients': ('patient_id', 'patient_name', 'age', 'gender', 'insurance_type', 'contact_number'),
+    'procedures': ('procedure_id', 'procedure_name', 'procedure_type', 'dept_id', 'base_cost',
+                   'avg_duration_minutes'),
+    'resource_alerts': ('alert_id', 'branch_id', 'dept_id', 'alert_type', 'severity', 'alert_message',
+                        'alert_date', 'resolved'),
+}
+
+SHARD_DAYS = 7              # days of admissions per seeded shard
+PATIENT_CHUNK = 10000       # patients per seeded RNG stream
+
+# Distributions of generated admissions (shared with the vectorized engine)
+ADMISSION_TYPES = ['Emergency', 'Scheduled']
+ADMISSION_TYPE_WEIGHTS = [0.35, 0.65]
+BED_TYPES = ['ICU', 'General', 'Private', 'Semi-Private']
+BED_TYPE_WEIGHTS = [0.15, 0.50, 0.20, 0.15]
+LOS_DAYS = [1, 2, 3, 4, 5, 6, 7, 10, 14]
+LOS_WEIGHTS = [0.05, 0.15, 0.20, 0.18, 0.15, 0.10, 0.08, 0.06, 0.03]
+OUTCOME_TYPES = ['Recovered', 'Improved', 'Transferred', 'Deceased']
+OUTCOME_WEIGHTS = [0.65, 0.25, 0.07, 0.03]
+READMISSION_RATE = 0.12
+
+def load_reference_data(cursor):
+    """Patients (with insurance), departments, doctors and procedures that admissions are drawn from"""
+    cursor.execute("SELECT patient_id, insurance_type FROM patients ORDER BY patient_id")
+    insurance_by_patient = dict(cursor.fetchall())
+    
+    cursor.execute("SELECT dept_id, dept_type, branch_id FROM departments ORDER BY dept_id")
+    departments = cursor.fetchall()
+    
+    cursor.execute("SELECT doctor_id, dept_id FROM doctors ORDER BY doctor_id")
+    doctors_by_dept = {}
+    for doctor_id, dept_id in cursor.fetchall():
+        doctors_by_dept.setdefault(dept_id, []).append(doctor_id)
+    
+    cursor.execute("SELECT procedure_id, dept_id, base_cost, avg_duration_minutes FROM procedures ORDER BY procedure_id")
+    procedures_by_dept = {}
+    for proc_id, dept_id, cost, duration in cursor.fetchall():
+        procedures_by_dept.setdefault(dept_id, []).append((proc_id, cost, duration))
+    
+    return {
+        'insurance_by_patient': insurance_by_patient,
+        'patient_ids': list(insurance_by_patient),
+        'departments': departments,
+        'doctors_by_dept': doctors_by_dept,
+        'procedures_by_dept': procedures_by_dept,
+    }
+
+def daily_admission_count(rng, current_date, scale=1.0):
+    """Admissions on a day (fewer at weekends), scaled for load tests"""
+    is_weekend = current_date.weekday() >= 5
+    base_admissions = rng.randint(15, 30) if not is_weekend else rng.randint(8, 18)
+    return int(round(base_admissions * scale))
+
+def generate_admission(rng, reference, admission_id, current_date, now):
+    """Rows of one synthetic admission: {table: [row, ...]} with the pre-assigned admission_id"""
+    dept_id, dept_type, branch_id = rng.choice(reference['departments'])
+    patient_id = rng.choice(reference['patient_ids'])
+    doctor_id = rng.choice(reference['doctors_by_dept'].get(dept_id, [1]))
+    
+    admission_type = rng.choices(ADMISSION_TYPES, weights=ADMISSION_TYPE_WEIGHTS)[0]
+    diagnosis = rng.choice(DIAGNOSES.get(dept_type, ['General Condition']))
+    bed_type = rng.choices(BED_TYPES, weights=BED_TYPE_WEIGHTS)[0]
+    admission_time = current_date + timedelta(hours=rng.randint(0, 23), minutes=rng.randint(0, 59))
+    
+    los_days = rng.choices(LOS_DAYS, weights=LOS_WEIGHTS)[0]
+    discharge_date = admission_time + timedelta(days=los_days)
+    status = 'Discharged' if discharge_date <= now else 'Active'
+    discharge_date_final = discharge_date if status == 'Discharged' else None
+    
+    rows = {
+        'admissions': [(admission_id, patient_id, branch_id, dept_id, doctor_id, admission_time,
+                        discharge_date_final, admission_type, diagnosis, bed_type,
+                        f"B-{rng.randint(101, 499)}", status)],
+        'patient_procedures': [],
+        'billing': [],
+        'outcomes': [],
+    }
+    
+    total_proc_cost = 0
+    procs = reference['procedures_by_dept'].get(dept_id, [])
+    if procs:
+        for _ in range(rng.randint(1, 3)):
+            proc_id, base_cost, duration = rng.choice(procs)
+            proc_date = admission_time + timedelta(days=rng.randint(0, min(los_days, 3)))
+            actual_cost = (base_cost * Decimal(str(rng.uniform(0.9, 1.2)))).quantize(Decimal('0.01'))
+            total_proc_cost += actual_cost
+            rows['patient_procedures'].append((admission_id * 3 + len(rows['patient_procedures']), admission_id,
+                                               proc_id, proc_date, doctor_id, duration, actual_cost, 'Completed'))
+    
+    room_charges = los_days * rng.randint(2000, 8000)
+    medicine_charges = los_days * rng.randint(1000, 3000)
+    lab_charges = rng.randint(2000, 10000)
+    other_charges = rng.randint(1000, 5000)
+    total_amount = room_charges + total_proc_cost + medicine_charges + lab_charges + other_charges
+    discount = (total_amount * Decimal(str(rng.uniform(0.9, 1.2)))).quantize(Decimal('0.01'))
+    
+    if reference['insurance_by_patient'][patient_id] != 'Self-Pay':
+        insurance_coverage = (total_amount * Decimal(str(rng.uniform(0.5, 0.8)))).quantize(Decimal('0.01'))
+    else:
+        insurance_coverage = 0
+    if status == 'Discharged':
+        amount_paid = total_amount - discount
+    else:
+        amount_paid = (total_amount * Decimal(str(rng.uniform(0.3, 0.7)))).quantize(Decimal('0.01'))
+    payment_status = 'Paid' if amount_paid >= (total_amount - discount - insurance_coverage) else 'Partial'
+    rows['billing'].append((admission_id, admission_id, total_amount, room_charges, total_proc_cost, medicine_charges,
+                            lab_charges, other_charges, discount, insurance_coverage, amount_paid, payment_status))
+    
+    if status == 'Discharged':
+        outcome_type = rng.choices(OUTCOME_TYPES, weights=OUTCOME_WEIGHTS)[0]
+        readmission_30 = rng.random() < READMISSION_RATE
+        rows['outcomes'].append((admission_id, admission_id, outcome_type, discharge_date_final,
+                                 readmission_30, readmission_30))
+    
+    return rows
+
+class BulkWriter:
+    """Buffers generated fact rows and writes each table with multi-row INSERTs, committing per batch"""
+    
+    def __init__(self, connection, batch_size=5000, verbose=True):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.batch_size = batch_size    # admissions per batch
+        self.verbose = verbose
+        self.buffers = {table: [] for table in FACT_COLUMNS}
+        self.written = dict.fromkeys(FACT_COLUMNS, 0)
+        self.started = time.perf_counter()
+    
+    def add(self, rows):
+        for table, table_rows in rows.items():
+            self.buffers[table].extend(table_rows)
+        if len(self.buffers['admissions']) >= self.batch_size:
+            self.flush()
+    
+    def add_batch(self, batch):
+        """Add a vectorized_generator.ColumnarBatch"""
+        self.add({table: batch.rows(table) for table in batch.tables})
+    
+    def flush(self):
+        """Write and commit the buffered rows (parents before children)"""
+        for table, columns in FACT_COLUMNS.items():
+            rows = self.buffers[table]
+            # mysql-connector rewrites executemany INSERTs into one multi-row statement
+            for i in range(0, len(rows), self.batch_size):
+                self.cursor.executemany(f"""
+                    INSERT INTO {table} ({', '.join(columns)})
+                    VALUES ({', '.join(['%s'] * len(columns))})
+                """, rows[i:i + self.batch_size])
+            self.written[table] += len(rows)
+            self.buffers[table] = []
+        self.connection.commit()
+        if self.verbose:
+            self.report()
+    
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        total = sum(self.written.values())
+        print(f"  {self.written['admissions']:>10,} admissions, {total:>12,} rows "
+              f"in {elapsed:7.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+    
+    def close(self):
+        self.flush()
+        self.cursor.close()
+
+def bulk_insert_admissions_and_related(connection, cursor, start_date, num_days=180, batch_size=5000,
+                                       scale=1.0, rng=random, engine='python'):
+    """Bulk mode of insert_admissions_and_related: ids assigned up front, rows written per batch"""
+    print(f"Bulk generating admissions data for {num_days} days with the {engine} engine "
+          f"(batches of {batch_size} admissions)...")
+    reference = load_reference_data(cursor)
+    
+    # Child rows reference admission ids assigned here, so no per-row lastrowid round trip
+    cursor.execute("SELECT COALESCE(MAX(admission_id), 0) FROM admissions")
+    next_admission_id = cursor.fetchone()[0] + 1
+    first_admission_id = next_admission_id
+    
+    now = datetime.datetime.now()
+    writer = BulkWriter(connection, batch_size)
+    if engine == 'numpy':
+        import numpy as np
+        from vectorized_generator import generate_admissions, reference_arrays
+        arrays = reference_arrays(reference)
+        np_rng = np.random.default_rng()
+        for first_day in range(0, num_days, SHARD_DAYS):
+            days = [start_date + timedelta(days=day) for day in range(first_day, min(first_day + SHARD_DAYS, num_days))]
+            counts = [daily_admission_count(rng, day, scale) for day in days]
+            writer.add_batch(generate_admissions(np_rng, arrays, next_admission_id, days, counts, now))
+            next_admission_id += sum(counts)
+    else:
+        for day in range(num_days):
+            current_date = start_date + timedelta(days=day)
+            for _ in range(daily_admission_count(rng, current_date, scale)):
+                writer.add(generate_admission(rng, reference, next_admission_id, current_date, now))
+                next_admission_id += 1
+    writer.close()
+    
+    print(f"Inserted {next_admission_id - first_admission_id} admissions with related data")
+
 def insert_bed_occupancy_data(cursor, start_date, num_days=180):
     """Insert daily bed occupancy snapshots"""
     print(f"Generating bed occupancy data for {num_days} days...")
@@ -385,8 +613,307 @@ def generate_resource_alerts(cursor):
     
     print(f"Inserted {num_alerts} resource alerts")
 
+# ============== SEEDED, SHARDED GENERATION ==============
+
+def insert_rows(cursor, table, columns, rows):
+    """Multi-row INSERT of rows given in column order"""
+    if rows:
+        cursor.executemany(f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+        """, rows)
+
+def build_reference_rows(seed, num_patients):
+    """Reference tables with explicit ids from seeded RNG streams: {table: rows}"""
+    rng = random.Random(f"{seed}:reference")
+    tables = {table: [] for table in REFERENCE_COLUMNS if table != 'resource_alerts'}
+    
+    for branch_id, (name, location) in enumerate(zip(BRANCH_NAMES, LOCATIONS), 1):
+        total_beds = rng.randint(200, 400)
+        icu_beds = int(total_beds * 0.15)
+        tables['branches'].append((branch_id, name, location, total_beds, icu_beds, total_beds - icu_beds))
+    
+    for branch in tables['branches']:
+        for dept_type in DEPT_TYPES:
+            tables['departments'].append((len(tables['departments']) + 1, dept_type, dept_type, branch[0],
+                                          rng.randint(30, 80)))
+    
+    for dept_id, _, dept_type, branch_id, _ in tables['departments']:
+        for _ in range(rng.randint(3, 5)):
+            tables['doctors'].append((len(tables['doctors']) + 1, rng.choice(DOCTOR_NAMES), dept_type,
+                                      dept_id, branch_id, rng.choice([40, 48, 50, 60])))
+    
+    # As in insert_procedures_master, each catalog hangs off the last department of its type
+    dept_by_type = {dept_type: dept_id for dept_id, _, dept_type, _, _ in tables['departments']}
+    for dept_type, procedures in PROCEDURES.items():
+        for proc_name, proc_type, cost, duration in procedures:
+            tables['procedures'].append((len(tables['procedures']) + 1, proc_name, proc_type,
+                                         dept_by_type[dept_type], Decimal(cost), duration))
+    
+    # Patients come in fixed-size id ranges, each from its own stream
+    for chunk_start in range(1, num_patients + 1, PATIENT_CHUNK):
+        chunk_rng = random.Random(f"{seed}:patients:{chunk_start // PATIENT_CHUNK}")
+        for patient_id in range(chunk_start, min(chunk_start + PATIENT_CHUNK, num_patients + 1)):
+            tables['patients'].append((
+                patient_id,
+                f"{chunk_rng.choice(PATIENT_FIRST_NAMES)} {chunk_rng.choice(PATIENT_LAST_NAMES)}",
+                chunk_rng.randint(1, 90),
+                chunk_rng.choice(['Male', 'Female', 'Other']),
+                chunk_rng.choice(['Government', 'Private', 'Self-Pay', 'Corporate']),
+                f"+91{chunk_rng.randint(7000000000, 9999999999)}",
+            ))
+    return tables
+
+def reference_from_rows(tables):
+    """The lookup structure of load_reference_data, built from generated reference rows"""
+    doctors_by_dept = {}
+    for doctor_id, _, _, dept_id, _, _ in tables['doctors']:
+        doctors_by_dept.setdefault(dept_id, []).append(doctor_id)
+    procedures_by_dept = {}
+    for proc_id, _, _, dept_id, cost, duration in tables['procedures']:
+        procedures_by_dept.setdefault(dept_id, []).append((proc_id, cost, duration))
+    insurance_by_patient = {row[0]: row[4] for row in tables['patients']}
+    
+    return {
+        'insurance_by_patient': insurance_by_patient,
+        'patient_ids': list(insurance_by_patient),
+        'departments': [(dept_id, dept_type, branch_id) for dept_id, _, dept_type, branch_id, _ in tables['departments']],
+        'doctors_by_dept': doctors_by_dept,
+        'procedures_by_dept': procedures_by_dept,
+        'branch_beds': [(row[0], row[3]) for row in tables['branches']],
+        'department_beds': [(dept_id, branch_id, beds) for dept_id, _, _, branch_id, beds in tables['departments']],
+    }
+
+def generate_occupancy(rng, reference, current_date, first_record_id):
+    """One day's branch and department bed snapshots (insert_bed_occupancy_data distributions)"""
+    rows = []
+    for branch_id, total_beds in reference['branch_beds']:
+        occupied = int(total_beds * rng.uniform(0.60, 0.95))
+        icu_occupied = int(occupied * rng.uniform(0.10, 0.20))
+        rows.append((first_record_id + len(rows), branch_id, None, current_date.date(), 12, total_beds, occupied,
+                     round(occupied / total_beds * 100, 2), icu_occupied, occupied - icu_occupied))
+    for dept_id, branch_id, dept_beds in reference['department_beds']:
+        occupied = int(dept_beds * rng.uniform(0.55, 0.92))
+        rows.append((first_record_id + len(rows), branch_id, dept_id, current_date.date(), 12, dept_beds, occupied,
+                     round(occupied / dept_beds * 100, 2), 0, 0))
+    return rows
+
+def generate_alert_rows(seed, reference, as_of):
+    """Sample resource alerts (generate_resource_alerts distributions) dated before as_of"""
+    rng = random.Random(f"{seed}:alerts")
+    messages = {
+        'Bed_Shortage': 'ICU beds running low - only 2 available',
+        'Staff_Shortage': 'Insufficient nursing staff for night shift',
+        'Equipment_Shortage': 'Ventilator availability critical',
+        'High_Occupancy': 'Department occupancy exceeds 90%'
+    }
+    branch_ids = [branch_id for branch_id, _ in reference['branch_beds']]
+    dept_ids = [dept_id for dept_id, _, _ in reference['department_beds']]
+    rows = []
+    for alert_id in range(1, rng.randint(10, 20) + 1):
+        branch_id = rng.choice(branch_ids)
+        dept_id = rng.choice(dept_ids) if rng.random() > 0.3 else None
+        alert_type = rng.choice(list(messages))
+        rows.append((alert_id, branch_id, dept_id, alert_type, rng.choice(['Low', 'Medium', 'High', 'Critical']),
+                     messages[alert_type], as_of - timedelta(days=rng.randint(0, 30)), rng.random() > 0.4))
+    return rows
+
+def plan_shards(seed, start_date, num_days, scale=1.0, shard_days=SHARD_DAYS):
+    """Split the date range into shards with their daily volumes and admission id ranges"""
+    volume = random.Random(f"{seed}:volume")
+    daily_counts = [daily_admission_count(volume, start_date + timedelta(days=day), scale)
+                    for day in range(num_days)]
+    shards = []
+    next_admission_id = 1
+    for index, first_day in enumerate(range(0, num_days, shard_days)):
+        counts = daily_counts[first_day:first_day + shard_days]
+        shards.append({'index': index, 'first_day': first_day, 'daily_counts': counts,
+                       'first_admission_id': next_admission_id})
+        next_admission_id += sum(counts)
+    return shards
+
+_worker_reference = None
+_worker_arrays = None
+
+def init_shard_worker(reference, engine='python'):
+    """Process pool initializer: share the reference lookups once per worker"""
+    global _worker_reference, _worker_arrays
+    _worker_reference = reference
+    if engine == 'numpy':
+        from vectorized_generator import reference_arrays
+        _worker_arrays = reference_arrays(reference)
+
+def generate_shard(seed, shard, start_date, as_of, batch_size, engine='python', output_dir=None, file_format='csv'):
+    """Generate one shard's admissions and bed snapshots and load them on its own connection
+    (or write them as the shard's part of a file dataset)"""
+    started = time.perf_counter()
+    reference = _worker_reference
+    rng = random.Random(f"{seed}:shard:{shard['index']}")
+    slots = len(reference['branch_beds']) + len(reference['department_beds'])
+    
+    if output_dir:
+        connection = None
+        writer = ShardFileWriter(output_dir, file_format, shard['index'], FACT_COLUMNS)
+    else:
+        connection = mysql.connector.connect(**DB_CONFIG)
+        writer = BulkWriter(connection, batch_size, verbose=False)
+    try:
+        days = [start_date + timedelta(days=shard['first_day'] + offset)
+                for offset in range(len(shard['daily_counts']))]
+        admission_id = shard['first_admission_id']
+        for offset, (current_date, count) in enumerate(zip(days, shard['daily_counts'])):
+            day = shard['first_day'] + offset
+            writer.add({'bed_occupancy_daily': generate_occupancy(rng, reference, current_date, day * slots + 1)})
+            if engine == 'python':
+                for _ in range(count):
+                    writer.add(generate_admission(rng, reference, admission_id, current_date, as_of))
+                    admission_id += 1
+        if engine == 'numpy':
+            import numpy as np
+            from vectorized_generator import generate_admissions
+            np_rng = np.random.default_rng([seed, shard['index']])
+            writer.add_batch(generate_admissions(np_rng, _worker_arrays, shard['first_admission_id'], days,
+                                                 shard['daily_counts'], as_of))
+        writer.close()
+    finally:
+        if connection:
+            connection.close()
+    return writer.written, time.perf_counter() - started
+
+def generate_seeded(connection, cursor, seed, start_date, num_days, num_patients, scale=1.0,
+                    workers=4, batch_size=5000, engine='python', output_dir=None, file_format='csv'):
+    """
+    Deterministic generation into an empty database, or into a file dataset under
+    output_dir (no connection needed): the same seed, scale (days, patients, scale)
+    and engine give identical rows regardless of worker count. Reference tables
+    come first; date shards then generate and load in parallel processes.
+    """
+    if output_dir:
+        check_format(file_format)
+    else:
+        cursor.execute("SELECT COUNT(*) FROM branches")
+        if cursor.fetchone()[0]:
+            raise ValueError("Seeded generation needs an empty database (branches already has rows)")
+    
+    as_of = start_date + timedelta(days=num_days)
+    print(f"Seeded generation (seed {seed}): {start_date.date()} .. {as_of.date()}, "
+          f"{num_patients} patients, scale {scale}")
+    tables = build_reference_rows(seed, num_patients)
+    reference = reference_from_rows(tables)
+    tables['resource_alerts'] = generate_alert_rows(seed, reference, as_of)
+    manifest_tables = {}
+    for table, rows in tables.items():
+        if output_dir:
+            write_part(output_dir, table, REFERENCE_COLUMNS[table], rows, fmt=file_format)
+        else:
+            for i in range(0, len(rows), batch_size):
+                insert_rows(cursor, table, REFERENCE_COLUMNS[table], rows[i:i + batch_size])
+        manifest_tables[table] = {'columns': list(REFERENCE_COLUMNS[table]), 'parts': [0], 'rows': len(rows)}
+        print(f"{'Wrote' if output_dir else 'Inserted'} {len(rows)} {table}")
+    if connection:
+        connection.commit()
+    
+    shards = plan_shards(seed, start_date, num_days, scale)
+    print(f"Generating {sum(sum(shard['daily_counts']) for shard in shards)} admissions "
+          f"in {len(shards)} shards with {workers} workers ({engine} engine)...")
+    totals = dict.fromkeys(FACT_COLUMNS, 0)
+    parts = {table: [] for table in FACT_COLUMNS}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_shard_worker,
+                             initargs=(reference, engine)) as executor:
+        futures = {executor.submit(generate_shard, seed, shard, start_date, as_of, batch_size, engine,
+                                   output_dir, file_format): shard
+                   for shard in shards}
+        for done, future in enumerate(as_completed(futures), 1):
+            written, seconds = future.result()
+            shard = futures[future]
+            for table, rows in written.items():
+                totals[table] += rows
+                if rows:
+                    parts[table].append(shard['index'])
+            print(f"[{done:>{len(str(len(shards)))}}/{len(shards)}] shard {shard['index']:<4} "
+                  f"{sum(written.values()):>10,} rows in {seconds:6.1f}s")
+    
+    elapsed = time.perf_counter() - started
+    print(f"{'Wrote' if output_dir else 'Loaded'} {sum(totals.values()):,} rows in {elapsed:.1f}s "
+          f"({sum(totals.values()) / elapsed if elapsed else 0:,.0f} rows/s): "
+          + ", ".join(f"{rows:,} {table}" for table, rows in totals.items()))
+    
+    if output_dir:
+        for table, columns in FACT_COLUMNS.items():
+            manifest_tables[table] = {'columns': list(columns), 'parts': sorted(parts[table]), 'rows': totals[table]}
+        write_manifest(output_dir, {
+            'seed': seed, 'engine': engine, 'scale': scale, 'days': num_days, 'patients': num_patients,
+            'start': start_date, 'as_of': as_of, 'format': file_format, 'tables': manifest_tables,
+        })
+        print(f"Dataset written to {output_dir} (load with: python dataset_files.py load {output_dir})")
+    return as_of
+
+def run_simulation(args):
+    """Live event mode: reference data from the seed (if given) or the database, events to MySQL or the API"""
+    from event_simulator import DatabaseSink, HttpSink, load_branch_beds, simulate
+    if args.seed is not None:
+        tables = build_reference_rows(args.seed, args.patients)
+        reference = reference_from_rows(tables)
+        branch_beds = [(row[0], row[3], row[4]) for row in tables['branches']]
+    else:
+        connection = create_connection()
+        if not connection:
+            return
+        cursor = connection.cursor()
+        reference = load_reference_data(cursor)
+        branch_beds = load_branch_beds(cursor)
+        cursor.close()
+        connection.close()
+    
+    if args.target:
+        sink_factory = lambda: HttpSink(args.target)
+    else:
+        sink_factory = lambda: DatabaseSink(mysql.connector.connect(**DB_CONFIG))
+    simulate(reference, branch_beds, sink_factory, streams=args.streams, speed=args.speed, rate=args.rate,
+             duration=args.duration, scale=args.scale, seed=args.seed)
+
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Generate sample hospital analytics data")
+    parser.add_argument('--days', type=int, default=180, help="days of admissions (ending today, or from --start with --seed)")
+    parser.add_argument('--patients', type=int, default=2000)
+    parser.add_argument('--bulk', action='store_true', help="batched multi-row inserts for large volumes")
+    parser.add_argument('--batch-size', type=int, default=5000, help="admissions per bulk batch")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplier on daily admissions (bulk and seeded modes)")
+    parser.add_argument('--seed', type=int, help="deterministic, sharded multi-process generation into an empty database")
+    parser.add_argument('--start', type=datetime.date.fromisoformat, default=datetime.date(2024, 1, 1),
+                        help="first day of seeded data (YYYY-MM-DD)")
+    parser.add_argument('--workers', type=int, default=4, help="worker processes for seeded generation")
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                        help="admission generator for bulk and seeded modes (numpy: vectorized)")
+    parser.add_argument('--output', help="write a seeded dataset to this directory instead of MySQL")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="file format of --output")
+    parser.add_argument('--simulate', action='store_true',
+                        help="emit live admission/procedure/discharge/billing/outcome/occupancy events")
+    parser.add_argument('--speed', type=float, default=1.0, help="simulated seconds per second (--simulate)")
+    parser.add_argument('--rate', type=float, help="events per second instead of simulated-time pacing (--simulate)")
+    parser.add_argument('--streams', type=int, default=1, help="concurrent event streams (--simulate)")
+    parser.add_argument('--duration', type=float, help="seconds to simulate (default: until Ctrl-C)")
+    parser.add_argument('--target', help="API base URL to post events to (default: write to MySQL)")
+    args = parser.parse_args()
+    
+    if args.simulate:
+        run_simulation(args)
+        return
+    
+    if args.output:
+        if args.seed is None:
+            parser.error("--output needs --seed")
+        try:
+            generate_seeded(None, None, args.seed, datetime.datetime.combine(args.start, datetime.time()),
+                            args.days, args.patients, scale=args.scale, workers=args.workers,
+                            batch_size=args.batch_size, engine=args.engine,
+                            output_dir=args.output, file_format=args.format)
+        except ValueError as e:
+            print(f"Error during data generation: {e}")
+        return
+    
     connection = create_connection()
     if not connection:
         return
@@ -394,34 +921,59 @@ def main():
     cursor = connection.cursor()
     
     try:
-        # Start date for data generation (6 months ago)
-        start_date = datetime.datetime.now() - timedelta(days=180)
-        
         print("\n=== Starting Data Generation ===\n")
         
-        # Generate data
-        insert_branches(cursor)
-        connection.commit()
-        
-        insert_departments(cursor)
-        connection.commit()
-        
-        insert_doctors(cursor)
-        connection.commit()
-        
-        insert_patients(cursor, num_patients=2000)
-        connection.commit()
-        
-        insert_procedures_master(cursor)
-        connection.commit()
-        
-        insert_admissions_and_related(cursor, start_date, num_days=180)
-        connection.commit()
-        
-        insert_bed_occupancy_data(cursor, start_date, num_days=180)
-        connection.commit()
+        if args.seed is not None:
+            # Seeded data covers a fixed window and is "as of" its end, never of today
+            start_date = datetime.datetime.combine(args.start, datetime.time())
+            as_of = generate_seeded(connection, cursor, args.seed, start_date, args.days, args.patients,
+                                    scale=args.scale, workers=args.workers, batch_size=args.batch_size,
+                                    engine=args.engine)
+        else:
+            # Start date for data generation (6 months ago by default)
+            start_date = datetime.datetime.now() - timedelta(days=args.days)
+            as_of = datetime.datetime.now()
+            
+            # Generate data
+            insert_branches(cursor)
+            connection.commit()
+            
+            insert_departments(cursor)
+            connection.commit()
+            
+            insert_doctors(cursor)
+            connection.commit()
+            
+            insert_patients(cursor, num_patients=args.patients)
+            connection.commit()
+            
+            insert_procedures_master(cursor)
+            connection.commit()
+            
+            if args.bulk:
+                bulk_insert_admissions_and_related(connection, cursor, start_date, num_days=args.days,
+                                                   batch_size=args.batch_size, scale=args.scale,
+                                                   engine=args.engine)
+            else:
+                insert_admissions_and_related(cursor, start_date, num_days=args.days)
+            connection.commit()
+            
+            insert_bed_occupancy_data(cursor, start_date, num_days=args.days)
+            connection.commit()
+            
+            generate_resource_alerts(cursor)
+            connection.commit()
         
-        generate_resource_alerts(cursor)
+        # Derived tables: readmissions from patient admission sequences, LOS and
+        # distinct-patient sketches, monthly partials and the approximate-query sample
+        print(f"Derived {rebuild_admission_gaps(cursor)} admission gaps")
+        refresh_sketches(cursor, start_date.date(), as_of.date() + timedelta(days=1))
+        refresh_patient_sketches(cursor, start_date.date(), as_of.date() + timedelta(days=1))
+        month = start_date.date().replace(day=1)
+        while month <= as_of.date():
+            refresh_month(cursor, month)
+            refresh_sample_month(cursor, month)
+            month = add_months(month, 1)
         connection.commit()
         
         print("\n=== Data Generation Complete! ===")
@@ -449,7 +1001,7 @@ def main():
         cursor.execute("SELECT COUNT(*) FROM bed_occupancy_daily")
         print(f"Bed Occupancy Records: {cursor.fetchone()[0]}")
         
-    except Error as e:
+    except (Error, ValueError) as e:
         print(f"Error during data generation: {e}")
         connection.rollback()
     finally:
@@ -50,6 +50,8 @@ CREATE TABLE patients (
 );
 
 -- Admissions
+-- admissions, patient_procedures, outcomes and bed_occupancy_daily are converted to
+-- monthly RANGE partitions by `python partition_maintenance.py migrate --apply`
 CREATE TABLE admissions (
     admission_id INT PRIMARY KEY AUTO_INCREMENT,
     patient_id INT NOT NULL,
@@ -69,7 +71,8 @@ CREATE TABLE admissions (
     FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id),
     INDEX idx_admission_date (admission_date),
     INDEX idx_discharge_date (discharge_date),
-    INDEX idx_status (status)
+    INDEX idx_status (status),
+    INDEX idx_patient_admission (patient_id, admission_date)
 );
 
 -- Procedures
@@ -171,9 +174,116 @@ CREATE TABLE resource_alerts (
     alert_message TEXT,
     alert_date DATETIME DEFAULT CURRENT_TIMESTAMP,
     resolved BOOLEAN DEFAULT FALSE,
+    resolved_at DATETIME,
+    alert_key VARCHAR(64),
+    -- Only one unresolved alert may exist per key; resolved rows drop out of the index
+    open_alert_key VARCHAR(64) GENERATED ALWAYS AS (IF(resolved, NULL, alert_key)) STORED,
     FOREIGN KEY (branch_id) REFERENCES branches(branch_id),
     FOREIGN KEY (dept_id) REFERENCES departments(dept_id),
-    INDEX idx_alert_date (alert_date)
+    INDEX idx_alert_date (alert_date),
+    UNIQUE INDEX uq_open_alert_key (open_alert_key)
+);
+
+-- Alert Thresholds (per branch, optionally per department)
+CREATE TABLE alert_thresholds (
+    threshold_id INT PRIMARY KEY AUTO_INCREMENT,
+    branch_id INT NOT NULL,
+    dept_id INT,
+    max_occupancy_rate DECIMAL(5, 2) DEFAULT 90.00,
+    min_free_icu_beds INT DEFAULT 2,
+    max_patients_per_doctor DECIMAL(5, 2) DEFAULT 8.00,
+    FOREIGN KEY (branch_id) REFERENCES branches(branch_id),
+    FOREIGN KEY (dept_id) REFERENCES departments(dept_id),
+    INDEX idx_threshold_scope (branch_id, dept_id)
+);
+
+-- Admission Gaps (each admission paired with the patient's next one, see readmissions.py)
+CREATE TABLE admission_gaps (
+    admission_id INT PRIMARY KEY,
+    patient_id INT NOT NULL,
+    branch_id INT NOT NULL,
+    dept_id INT NOT NULL,
+    admission_date DATETIME NOT NULL,
+    discharge_date DATETIME,
+    next_admission_id INT,
+    next_admission_date DATETIME,
+    gap_days INT,
+    readmitted_30d BOOLEAN NOT NULL DEFAULT FALSE,
+    INDEX idx_gap_admission (admission_date, branch_id, dept_id),
+    INDEX idx_gap_discharge (discharge_date),
+    INDEX idx_gap_patient (patient_id)
+);
+
+-- Length-of-Stay Sketches (completed stays per discharge day, see los_sketch.py)
+CREATE TABLE los_sketch_daily (
+    discharge_day DATE NOT NULL,
+    branch_id INT NOT NULL,
+    dept_id INT NOT NULL,
+    bucket SMALLINT NOT NULL,
+    stays INT NOT NULL,
+    PRIMARY KEY (discharge_day, branch_id, dept_id, bucket),
+    FOREIGN KEY (branch_id) REFERENCES branches(branch_id),
+    FOREIGN KEY (dept_id) REFERENCES departments(dept_id)
+);
+
+-- Distinct-Patient Sketches (HyperLogLog registers per admission day, see patient_sketch.py)
+CREATE TABLE patient_hll_daily (
+    admission_day DATE NOT NULL,
+    branch_id INT NOT NULL,
+    dept_id INT NOT NULL,
+    register_index SMALLINT NOT NULL,
+    max_rank TINYINT NOT NULL,
+    PRIMARY KEY (admission_day, branch_id, dept_id, register_index),
+    FOREIGN KEY (branch_id) REFERENCES branches(branch_id),
+    FOREIGN KEY (dept_id) REFERENCES departments(dept_id)
+);
+
+-- Mergeable Monthly Partials (per month, branch and department, see period_reports.py)
+CREATE TABLE monthly_partials (
+    summary_month DATE NOT NULL,
+    branch_id INT NOT NULL,
+    dept_id INT NOT NULL,
+    admissions INT NOT NULL DEFAULT 0,
+    discharges INT NOT NULL DEFAULT 0,
+    emergency_admissions INT NOT NULL DEFAULT 0,
+    los_days BIGINT NOT NULL DEFAULT 0,
+    revenue DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    billed_count INT NOT NULL DEFAULT 0,
+    procedures INT NOT NULL DEFAULT 0,
+    readmissions INT NOT NULL DEFAULT 0,
+    occupancy_sum DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    occupancy_count INT NOT NULL DEFAULT 0,
+    los_buckets JSON,
+    PRIMARY KEY (summary_month, branch_id, dept_id),
+    FOREIGN KEY (branch_id) REFERENCES branches(branch_id),
+    FOREIGN KEY (dept_id) REFERENCES departments(dept_id)
+);
+
+-- Stratified Admission Sample for approximate KPIs (per month, branch and department, see admission_sample.py)
+CREATE TABLE admission_sample_strata (
+    sample_month DATE NOT NULL,
+    branch_id INT NOT NULL,
+    dept_id INT NOT NULL,
+    population INT NOT NULL,
+    sampled INT NOT NULL,
+    PRIMARY KEY (sample_month, branch_id, dept_id),
+    FOREIGN KEY (branch_id) REFERENCES branches(branch_id),
+    FOREIGN KEY (dept_id) REFERENCES departments(dept_id)
+);
+
+CREATE TABLE admission_sample (
+    sample_month DATE NOT NULL,
+    branch_id INT NOT NULL,
+    dept_id INT NOT NULL,
+    admission_id INT NOT NULL,
+    admission_date DATETIME NOT NULL,
+    discharge_date DATETIME,
+    emergency BOOLEAN NOT NULL,
+    procedures INT NOT NULL DEFAULT 0,
+    billed BOOLEAN NOT NULL DEFAULT FALSE,
+    total_amount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    readmitted_30d BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (sample_month, branch_id, dept_id, admission_id)
 );
 
 -- Monthly Performance Summary
@@ -0,0 +1,192 @@
+"""
+Length-of-Stay Distribution Sketches for Hospital Analytics
+Completed stays are kept as bucket counts per branch, department and discharge
+day (los_sketch_daily). Buckets are exact for stays under LINEAR_DAYS and
+logarithmic above it (relative error <= ALPHA), so sketches for any date range
+or filter merge by adding counts and quantiles never sort raw admissions.
+
+Backfill or rebuild a window:
+    python los_sketch.py refresh --start 2024-01-01 --end 2024-07-01
+"""
+
+import argparse
+import json
+import math
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+LINEAR_DAYS = 64        # one bucket per day below this
+ALPHA = 0.02            # relative accuracy of the logarithmic buckets
+GAMMA = (1 + ALPHA) / (1 - ALPHA)
+
+# Histogram bins reported by the API and the monthly report: (label, first day, last day)
+LOS_BINS = [
+    ('0', 0, 0),
+    ('1', 1, 1),
+    ('2', 2, 2),
+    ('3-4', 3, 4),
+    ('5-7', 5, 7),
+    ('8-14', 8, 14),
+    ('15-30', 15, 30),
+    ('31+', 31, None),
+]
+
+# Database Configuration from Environment Variables
+DB_CONFIG = {
+    'host': os.getenv('MYSQLHOST', 'localhost'),
+    'port': int(os.getenv('MYSQLPORT', 3306)),
+    'database': os.getenv('MYSQLDATABASE', 'hospital_analytics'),
+    'user': os.getenv('MYSQLUSER', 'root'),
+    'password': os.getenv('MYSQLPASSWORD', ''),
+}
+
+
+def bucket_of(days):
+    """Sketch bucket of a stay length in days"""
+    days = max(0, int(days))
+    if days < LINEAR_DAYS:
+        return days
+    return LINEAR_DAYS + math.ceil(math.log(days / LINEAR_DAYS, GAMMA) - 1e-9)
+
+
+def bucket_value(bucket):
+    """Representative stay length of a bucket (exact for linear buckets)"""
+    if bucket <= LINEAR_DAYS:
+        return float(bucket)
+    return LINEAR_DAYS * GAMMA ** (bucket - LINEAR_DAYS) * 2 / (1 + GAMMA)
+
+
+class LOSSketch:
+    """Mergeable quantile sketch of stay lengths: bucket -> number of stays"""
+
+    def __init__(self, counts=None):
+        self.counts = Counter(counts or {})
+
+    @classmethod
+    def from_json(cls, text):
+        """Sketch stored as a JSON object of bucket -> stays"""
+        return cls({int(bucket): stays for bucket, stays in json.loads(text or '{}').items()})
+
+    def to_json(self):
+        return json.dumps({str(bucket): stays for bucket, stays in sorted(self.counts.items()) if stays})
+
+    def add(self, days, stays=1):
+        self.counts[bucket_of(days)] += stays
+
+    def add_bucket(self, bucket, stays):
+        self.counts[bucket] += stays
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        return self
+
+    @property
+    def stays(self):
+        return sum(self.counts.values())
+
+    def mean(self):
+        total = self.stays
+        if not total:
+            return None
+        return sum(bucket_value(b) * n for b, n in self.counts.items()) / total
+
+    def quantile(self, q):
+        """Stay length at quantile q (0..1); None for an empty sketch"""
+        total = self.stays
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen > rank:
+                return bucket_value(bucket)
+        return bucket_value(max(self.counts))
+
+    def histogram(self):
+        """Stays per LOS_BINS bin"""
+        bins = Counter()
+        for bucket, stays in self.counts.items():
+            value = bucket_value(bucket)
+            for label, low, high in LOS_BINS:
+                if value >= low and (high is None or value <= high):
+                    bins[label] += stays
+                    break
+        return [{'bin': label, 'stays': bins.get(label, 0)} for label, _, _ in LOS_BINS]
+
+    def stats(self):
+        """Distribution summary for API payloads and reports"""
+        def rounded(value):
+            return None if value is None else round(value, 2)
+        return {
+            'stays': self.stays,
+            'mean_los': rounded(self.mean()),
+            'median_los': rounded(self.quantile(0.5)),
+            'p90_los': rounded(self.quantile(0.9)),
+            'p99_los': rounded(self.quantile(0.99)),
+            'histogram': self.histogram(),
+        }
+
+
+def record_discharge(cursor, branch_id, dept_id, discharge_day, los_days):
+    """Count one completed stay into its day's sketch (atomic per bucket)"""
+    cursor.execute("""
+        INSERT INTO los_sketch_daily (discharge_day, branch_id, dept_id, bucket, stays)
+        VALUES (%s, %s, %s, %s, 1)
+        ON DUPLICATE KEY UPDATE stays = stays + 1
+    """, (discharge_day, branch_id, dept_id, bucket_of(los_days)))
+
+
+def refresh_sketches(cursor, start, end):
+    """Rebuild the sketches of discharge days in [start, end) from admissions"""
+    cursor.execute("""
+        SELECT branch_id, dept_id, DATE(discharge_date) as discharge_day,
+               GREATEST(DATEDIFF(discharge_date, admission_date), 0) as los_days,
+               COUNT(*) as stays
+        FROM admissions
+        WHERE status = 'Discharged' AND discharge_date >= %s AND discharge_date < %s
+        GROUP BY branch_id, dept_id, DATE(discharge_date), los_days
+    """, (start, end))
+
+    buckets = Counter()
+    for branch_id, dept_id, discharge_day, los_days, stays in cursor.fetchall():
+        buckets[(discharge_day, branch_id, dept_id, bucket_of(los_days))] += stays
+
+    cursor.execute("DELETE FROM los_sketch_daily WHERE discharge_day >= %s AND discharge_day < %s",
+                   (start, end))
+    cursor.executemany("""
+        INSERT INTO los_sketch_daily (discharge_day, branch_id, dept_id, bucket, stays)
+        VALUES (%s, %s, %s, %s, %s)
+    """, [key + (stays,) for key, stays in buckets.items()])
+    return len(buckets)
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Maintain length-of-stay sketches")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    refresh = subparsers.add_parser('refresh', help="rebuild sketches for a discharge-date window")
+    refresh.add_argument('--start', type=date.fromisoformat,
+                         default=date.today() - timedelta(days=30), help="first discharge day (YYYY-MM-DD)")
+    refresh.add_argument('--end', type=date.fromisoformat,
+                         default=date.today() + timedelta(days=1), help="day after the last discharge day")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    try:
+        started = datetime.now()
+        rows = refresh_sketches(cursor, args.start, args.end)
+        conn.commit()
+        print(f"Rebuilt {rows} sketch buckets for {args.start} .. {args.end} "
+              f"in {(datetime.now() - started).total_seconds():.1f}s")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,25 @@
 """
 Automated Monthly Report Generator for Hospital Analytics
 Generates comprehensive PDF and CSV reports for specified month
+
+Batch mode (every branch plus the consolidated report, in parallel):
+    python monthly_report_generator.py --from 2023-01 --to 2024-12 --branches all --workers 8
 """
 
 import mysql.connector
 from datetime import datetime, timedelta
+import argparse
 import csv
+import io
 import json
-from decimal import Decimal
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from los_sketch import LOSSketch
+from period_reports import PARTIAL_TYPES, assemble_period, partial_query, period_bounds
+from report_cache import ReportCache
+from result_mapping import ColumnTypes, INT, map_rows
 
 # Database Configuration
 DB_CONFIG = {
@@ -21,20 +33,45 @@ def get_db_connection():
     """Create database connection"""
     return mysql.connector.connect(**DB_CONFIG)
 
-def decimal_to_float(obj):
-    """Convert Decimal to float"""
-    if isinstance(obj, Decimal):
-        return float(obj)
-    return obj
+# Column types per report query: DECIMAL averages and money sums become floats
+SUMMARY_TYPES = ColumnTypes.floats('avg_los', 'total_revenue', 'avg_cost_per_patient')
+DEPARTMENT_TYPES = ColumnTypes.floats('avg_los', 'revenue', 'avg_revenue_per_patient')
+OCCUPANCY_TYPES = ColumnTypes.floats('avg_occupancy', 'max_occupancy', 'min_occupancy',
+                                     'avg_icu_occupied', 'avg_general_occupied')
+DOCTOR_TYPES = ColumnTypes.floats('avg_procedure_duration', 'revenue_generated')
+OUTCOME_TYPES = ColumnTypes.floats('avg_los_for_outcome')
+REVENUE_TYPES = ColumnTypes.floats('room_charges', 'procedure_charges', 'medicine_charges',
+                                   'lab_charges', 'other_charges', 'total_revenue',
+                                   'total_discount', 'insurance_coverage', 'total_collected')
+LOS_TYPES = ColumnTypes(stays=INT)
+
+# Source rows each report section is computed from (keys of source_watermarks())
+SECTION_SOURCES = {
+    'summary': ('admissions', 'billing', 'procedures', 'readmissions'),
+    'bed_occupancy': ('occupancy',),
+    'departments': ('admissions', 'billing', 'procedures'),
+    'revenue': ('billing',),
+    'outcomes': ('outcomes',),
+    'los_distribution': ('los',),
+    'top_doctors': ('admissions', 'billing', 'procedures'),
+}
 
 class MonthlyReportGenerator:
-    def __init__(self, year, month, branch_id=None):
+    def __init__(self, year, month, branch_id=None, connection=None):
         self.year = year
         self.month = month
         self.branch_id = branch_id
         self.month_str = f"{year}-{month:02d}"
-        self.connection = get_db_connection()
-        self.cursor = self.connection.cursor(dictionary=True)
+        # Half-open [month_start, month_end) range keeps predicates sargable and partition-prunable
+        self.month_start = datetime(year, month, 1).date()
+        self.month_end = datetime(year + month // 12, month % 12 + 1, 1).date()
+        # The generator owns (and closes) its connection; callers may pass one from their own config
+        self.connection = connection or get_db_connection()
+        self.cursor = self.connection.cursor()
+        self._dataset = None
+        # Sections from an earlier run ({name: {'watermark', 'data'}}), reused while their sources are unchanged
+        self.cached_sections = {}
+        self.refreshed_sections = []
         
     def __del__(self):
         """Cleanup database connection"""
@@ -43,9 +80,128 @@ class MonthlyReportGenerator:
         if hasattr(self, 'connection'):
             self.connection.close()
     
+    def fetch(self, query, params, types):
+        """Run a report query and return its typed ResultSet"""
+        self.cursor.execute(query, params)
+        return map_rows(self.cursor.description, self.cursor.fetchall(), types)
+
+    @property
+    def dataset(self):
+        """Every report section, fetched once per instance; all renderers read from it"""
+        if self._dataset is None:
+            self._dataset = self.build_dataset()
+        return self._dataset
+    
+    def build_dataset(self):
+        """Run each report query once inside one consistent-snapshot, read-only transaction,
+        reusing cached sections whose source watermarks are unchanged"""
+        # Earlier reads on a non-autocommit connection (watermark and cache checks) leave a
+        # transaction open, and start_transaction refuses to nest
+        if self.connection.in_transaction:
+            self.connection.rollback()
+        self.connection.start_transaction(consistent_snapshot=True,
+                                          isolation_level='REPEATABLE READ', readonly=True)
+        try:
+            branch_name = None
+            if self.branch_id:
+                self.cursor.execute(f"SELECT branch_name FROM branches WHERE branch_id = {self.branch_id}")
+                branch_name, = self.cursor.fetchone()
+            sources = self.source_watermarks()
+            dataset = {
+                'branch_name': branch_name,
+                'data_watermark': self.data_watermark(sources),
+                'section_watermarks': {}
+            }
+            loaders = {
+                'summary': self.get_summary_metrics,
+                'bed_occupancy': self.get_bed_occupancy_stats,
+                'departments': self.get_department_breakdown,
+                'revenue': self.get_revenue_breakdown,
+                'outcomes': self.get_patient_outcomes,
+                'los_distribution': self.get_los_distribution,
+                'top_doctors': self.get_doctor_performance
+            }
+            self.refreshed_sections = []
+            for section, load in loaders.items():
+                watermark = "/".join(sources[source] for source in SECTION_SOURCES[section])
+                cached = self.cached_sections.get(section)
+                if cached and cached['watermark'] == watermark:
+                    dataset[section] = cached['data']
+                else:
+                    dataset[section] = load()
+                    self.refreshed_sections.append(section)
+                dataset['section_watermarks'][section] = watermark
+            return dataset
+        finally:
+            # Nothing was written; ending the transaction releases the snapshot
+            self.connection.rollback()
+    
+    def source_watermarks(self):
+        """Cheap fingerprints (counts, max ids, sums) of the month's rows per source table"""
+        admission_filter = f" AND a.branch_id = {self.branch_id}" if self.branch_id else ""
+        branch_filter = f" AND branch_id = {self.branch_id}" if self.branch_id else ""
+        month = (self.month_start, self.month_end)
+        
+        # Open stays age every day (their LOS runs to CURRENT_DATE), so they pin the date
+        queries = {
+            'admissions': (f"""
+                SELECT COUNT(*), MAX(a.admission_id), MAX(a.discharge_date), SUM(a.status = 'Discharged'),
+                       IF(SUM(a.discharge_date IS NULL) > 0, CURRENT_DATE, NULL)
+                FROM admissions a
+                WHERE a.admission_date >= %s AND a.admission_date < %s{admission_filter}
+            """, month),
+            'readmissions': (f"""
+                SELECT COUNT(*), SUM(g.readmitted_30d)
+                FROM admission_gaps g
+                JOIN admissions a ON g.admission_id = a.admission_id
+                WHERE a.admission_date >= %s AND a.admission_date < %s{admission_filter}
+            """, month),
+            'billing': (f"""
+                SELECT COUNT(*), MAX(b.bill_id), SUM(b.total_amount), SUM(b.amount_paid)
+                FROM billing b
+                JOIN admissions a ON b.admission_id = a.admission_id
+                WHERE a.admission_date >= %s AND a.admission_date < %s{admission_filter}
+            """, month),
+            # Procedures on the month's admissions and procedures performed in the month
+            'procedures': (f"""
+                SELECT COUNT(*), MAX(pp.record_id)
+                FROM patient_procedures pp
+                JOIN admissions a ON pp.admission_id = a.admission_id
+                WHERE pp.procedure_date >= %s
+                  AND (a.admission_date >= %s AND a.admission_date < %s OR pp.procedure_date < %s){admission_filter}
+            """, (self.month_start,) + month + (self.month_end,)),
+            'outcomes': (f"""
+                SELECT COUNT(*), MAX(o.outcome_id)
+                FROM outcomes o
+                JOIN admissions a ON o.admission_id = a.admission_id
+                WHERE o.outcome_date >= %s AND o.outcome_date < %s{admission_filter}
+            """, month),
+            'occupancy': (f"""
+                SELECT COUNT(*), MAX(record_id)
+                FROM bed_occupancy_daily
+                WHERE snapshot_date >= %s AND snapshot_date < %s{branch_filter}
+            """, month),
+            'los': (f"""
+                SELECT COUNT(*), SUM(stays)
+                FROM los_sketch_daily
+                WHERE discharge_day >= %s AND discharge_day < %s{branch_filter}
+            """, month),
+        }
+        
+        watermarks = {}
+        for source, (query, params) in queries.items():
+            self.cursor.execute(query, params)
+            watermarks[source] = "|".join(str(value) for value in self.cursor.fetchone())
+        return watermarks
+    
+    def data_watermark(self, sources=None):
+        """Fingerprint of all the month's source rows; a report with the same watermark is up to date"""
+        sources = sources or self.source_watermarks()
+        return "/".join(sources[source] for source in sorted(sources))
+    
     def get_summary_metrics(self):
         """Get overall summary metrics for the month"""
-        where_clause = f"WHERE DATE_FORMAT(a.admission_date, '%Y-%m') = '{self.month_str}'"
+        where_clause = "WHERE a.admission_date >= %s AND a.admission_date < %s"
         if self.branch_id:
             where_clause += f" AND a.branch_id = {self.branch_id}"
         
@@ -58,20 +214,17 @@ class MonthlyReportGenerator:
                 SUM(b.total_amount) as total_revenue,
                 AVG(b.total_amount) as avg_cost_per_patient,
                 COUNT(DISTINCT pp.procedure_id) as total_procedures,
-                COUNT(DISTINCT CASE WHEN o.readmission_within_30days = TRUE THEN a.admission_id END) as readmissions
+                COUNT(DISTINCT CASE WHEN g.readmitted_30d THEN a.admission_id END) as readmissions
             FROM admissions a
             LEFT JOIN billing b ON a.admission_id = b.admission_id
             LEFT JOIN patient_procedures pp ON a.admission_id = pp.admission_id
-            LEFT JOIN outcomes o ON a.admission_id = o.admission_id
+                AND pp.procedure_date >= %s
+            LEFT JOIN admission_gaps g ON a.admission_id = g.admission_id
             {where_clause}
         """
         
-        self.cursor.execute(query)
-        result = self.cursor.fetchone()
-        
-        # Convert Decimal to float
-        for key in result:
-            result[key] = decimal_to_float(result[key])
+        result = self.fetch(query, (self.month_start,
+                                    self.month_start, self.month_end), SUMMARY_TYPES).first()
         
         # Calculate readmission rate
         if result['total_discharges'] and result['total_discharges'] > 0:
@@ -89,10 +242,6 @@ class MonthlyReportGenerator:
     
     def get_department_breakdown(self):
         """Get department-wise breakdown"""
-        where_clause = f"WHERE DATE_FORMAT(a.admission_date, '%Y-%m') = '{self.month_str}'"
-        if self.branch_id:
-            where_clause += f" AND d.branch_id = {self.branch_id}"
-        
         query = f"""
             SELECT 
                 d.dept_name,
@@ -105,28 +254,23 @@ class MonthlyReportGenerator:
                 COUNT(DISTINCT pp.procedure_id) as procedures,
                 COUNT(DISTINCT CASE WHEN a.admission_type = 'Emergency' THEN a.admission_id END) as emergency_cases
             FROM departments d
-            LEFT JOIN admissions a ON d.dept_id = a.dept_id AND DATE_FORMAT(a.admission_date, '%Y-%m') = '{self.month_str}'
+            LEFT JOIN admissions a ON d.dept_id = a.dept_id
+                AND a.admission_date >= %s AND a.admission_date < %s
             LEFT JOIN billing b ON a.admission_id = b.admission_id
             LEFT JOIN patient_procedures pp ON a.admission_id = pp.admission_id
+                AND pp.procedure_date >= %s
             {f'WHERE d.branch_id = {self.branch_id}' if self.branch_id else ''}
             GROUP BY d.dept_id, d.dept_name, d.dept_type
             HAVING admissions > 0
             ORDER BY revenue DESC
         """
         
-        self.cursor.execute(query)
-        results = self.cursor.fetchall()
-        
-        # Convert Decimal to float
-        for row in results:
-            for key in row:
-                row[key] = decimal_to_float(row[key])
-        
-        return results
+        return self.fetch(query, (self.month_start, self.month_end, self.month_start),
+                          DEPARTMENT_TYPES).records()
     
     def get_bed_occupancy_stats(self):
         """Get bed occupancy statistics"""
-        where_clause = f"WHERE DATE_FORMAT(snapshot_date, '%Y-%m') = '{self.month_str}'"
+        where_clause = "WHERE snapshot_date >= %s AND snapshot_date < %s"
         if self.branch_id:
             where_clause += f" AND branch_id = {self.branch_id}"
         
@@ -141,21 +285,10 @@ class MonthlyReportGenerator:
             {where_clause} AND dept_id IS NULL
         """
         
-        self.cursor.execute(query)
-        result = self.cursor.fetchone()
-        
-        # Convert Decimal to float
-        for key in result:
-            result[key] = decimal_to_float(result[key])
-        
-        return result
+        return self.fetch(query, (self.month_start, self.month_end), OCCUPANCY_TYPES).first()
     
     def get_doctor_performance(self):
         """Get doctor performance metrics"""
-        where_clause = f"WHERE DATE_FORMAT(a.admission_date, '%Y-%m') = '{self.month_str}'"
-        if self.branch_id:
-            where_clause += f" AND doc.branch_id = {self.branch_id}"
-        
         query = f"""
             SELECT 
                 doc.doctor_name,
@@ -167,9 +300,9 @@ class MonthlyReportGenerator:
             FROM doctors doc
             JOIN departments dep ON doc.dept_id = dep.dept_id
             LEFT JOIN admissions a ON doc.doctor_id = a.doctor_id 
-                AND DATE_FORMAT(a.admission_date, '%Y-%m') = '{self.month_str}'
+                AND a.admission_date >= %s AND a.admission_date < %s
             LEFT JOIN patient_procedures pp ON doc.doctor_id = pp.doctor_id
-                AND DATE_FORMAT(pp.procedure_date, '%Y-%m') = '{self.month_str}'
+                AND pp.procedure_date >= %s AND pp.procedure_date < %s
             LEFT JOIN billing b ON a.admission_id = b.admission_id
             {'WHERE doc.branch_id = ' + str(self.branch_id) if self.branch_id else ''}
             GROUP BY doc.doctor_id, doc.doctor_name, dep.dept_name
@@ -178,19 +311,12 @@ class MonthlyReportGenerator:
             LIMIT 20
         """
         
-        self.cursor.execute(query)
-        results = self.cursor.fetchall()
-        
-        # Convert Decimal to float
-        for row in results:
-            for key in row:
-                row[key] = decimal_to_float(row[key])
-        
-        return results
+        return self.fetch(query, (self.month_start, self.month_end,
+                                  self.month_start, self.month_end), DOCTOR_TYPES).records()
     
     def get_patient_outcomes(self):
         """Get patient outcome distribution"""
-        where_clause = f"WHERE DATE_FORMAT(o.outcome_date, '%Y-%m') = '{self.month_str}'"
+        where_clause = "WHERE o.outcome_date >= %s AND o.outcome_date < %s"
         if self.branch_id:
             where_clause += f" AND a.branch_id = {self.branch_id}"
         
@@ -206,19 +332,47 @@ class MonthlyReportGenerator:
             ORDER BY count DESC
         """
         
-        self.cursor.execute(query)
-        results = self.cursor.fetchall()
+        return self.fetch(query, (self.month_start, self.month_end), OUTCOME_TYPES).records()
+    
+    def get_los_distribution(self):
+        """Get length-of-stay distribution for stays completed in the month, merged from daily LOS sketches"""
+        where_clause = "WHERE s.discharge_day >= %s AND s.discharge_day < %s"
+        if self.branch_id:
+            where_clause += f" AND s.branch_id = {self.branch_id}"
+        
+        query = f"""
+            SELECT d.dept_name, s.bucket, SUM(s.stays) as stays
+            FROM los_sketch_daily s
+            JOIN departments d ON s.dept_id = d.dept_id
+            {where_clause}
+            GROUP BY s.dept_id, d.dept_name, s.bucket
+        """
+        
+        rows = self.fetch(query, (self.month_start, self.month_end), LOS_TYPES)
         
-        # Convert Decimal to float
-        for row in results:
-            for key in row:
-                row[key] = decimal_to_float(row[key])
+        overall = LOSSketch()
+        departments = {}
+        for dept_name, bucket, stays in rows.tuples():
+            overall.add_bucket(bucket, stays)
+            departments.setdefault(dept_name, LOSSketch()).add_bucket(bucket, stays)
         
-        return results
+        return {
+            'overall': overall.stats(),
+            'departments': [dict(dept_name=name, **sketch.stats())
+                            for name, sketch in sorted(departments.items())]
+        }
+    
+    def get_period_report(self, period):
+        """Quarter ('quarter'), year-to-date ('ytd') or trailing-12-month ('ttm') report
+        ending with this month, merged from the stored monthly partials"""
+        first_month, last_month = period_bounds(period, self.month_start)
+        query, params = partial_query(first_month, last_month, self.branch_id)
+        rows = self.fetch(query, params, PARTIAL_TYPES).records()
+        return dict(period=period, **assemble_period(rows, first_month, last_month))
     
     def get_revenue_breakdown(self):
         """Get revenue breakdown by category"""
-        where_clause = f"WHERE DATE_FORMAT(a.admission_date, '%Y-%m') = '{self.month_str}'"
+        where_clause = "WHERE a.admission_date >= %s AND a.admission_date < %s"
         if self.branch_id:
             where_clause += f" AND a.branch_id = {self.branch_id}"
         
@@ -238,12 +392,7 @@ class MonthlyReportGenerator:
             {where_clause}
         """
         
-        self.cursor.execute(query)
-        result = self.cursor.fetchone()
-        
-        # Convert Decimal to float
-        for key in result:
-            result[key] = decimal_to_float(result[key])
+        result = self.fetch(query, (self.month_start, self.month_end), REVENUE_TYPES).first()
         
         # Calculate collection rate
         if result['total_revenue']:
@@ -255,15 +404,13 @@ class MonthlyReportGenerator:
     
     def generate_text_report(self):
         """Generate text-based report"""
+        data = self.dataset
         report = []
         report.append("="*80)
         report.append(f"HOSPITAL MONTHLY PERFORMANCE REPORT")
         report.append(f"Period: {datetime(self.year, self.month, 1).strftime('%B %Y')}")
         if self.branch_id:
-            # Get branch name
-            self.cursor.execute(f"SELECT branch_name FROM branches WHERE branch_id = {self.branch_id}")
-            branch = self.cursor.fetchone()
-            report.append(f"Branch: {branch['branch_name']}")
+            report.append(f"Branch: {data['branch_name']}")
         else:
             report.append("Branch: All Branches")
         report.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -271,7 +418,7 @@ class MonthlyReportGenerator:
         report.append("")
         
         # Summary Metrics
-        summary = self.get_summary_metrics()
+        summary = data['summary']
         report.append("SUMMARY METRICS")
         report.append("-"*80)
         report.append(f"Total Admissions:          {summary['total_admissions']:>10}")
@@ -300,7 +447,7 @@ class MonthlyReportGenerator:
         report.append("")
         
         # Bed Occupancy
-        occupancy = self.get_bed_occupancy_stats()
+        occupancy = data['bed_occupancy']
         report.append("BED OCCUPANCY STATISTICS")
         report.append("-"*80)
         def fmt_float(value, suffix=""):
@@ -314,7 +461,7 @@ class MonthlyReportGenerator:
         report.append("")
 
         # Department Breakdown
-        departments = self.get_department_breakdown()
+        departments = data['departments']
         report.append("DEPARTMENT PERFORMANCE")
         report.append("-"*80)
         report.append(f"{'Department':<20} {'Admits':>8} {'Dischar':>8} {'Avg LOS':>8} {'Revenue':>15} {'Procedures':>10}")
@@ -331,7 +478,7 @@ class MonthlyReportGenerator:
         report.append("")
         
         # Revenue Breakdown
-        revenue = self.get_revenue_breakdown()
+        revenue = data['revenue']
 
         report.append("REVENUE BREAKDOWN")
         report.append("-" * 80)
@@ -354,8 +501,29 @@ class MonthlyReportGenerator:
 
         report.append("")
 
+        # Length of Stay Distribution
+        los = data['los_distribution']
+        report.append("LENGTH OF STAY DISTRIBUTION (COMPLETED STAYS)")
+        report.append("-"*80)
+        report.append(f"{'Department':<20} {'Stays':>8} {'Median':>8} {'P90':>8} {'P99':>8}")
+        report.append("-"*80)
+        def fmt_days(value):
+            return "N/A".rjust(8) if value is None else f"{value:>8.1f}"
+        for row in los['departments'] + [dict(los['overall'], dept_name='All Departments')]:
+            report.append(
+                f"{row['dept_name']:<20} "
+                f"{row['stays']:>8} "
+                f"{fmt_days(row['median_los'])} "
+                f"{fmt_days(row['p90_los'])} "
+                f"{fmt_days(row['p99_los'])}"
+            )
+        report.append("")
+        report.append("Stays by length (days):  " + "  ".join(
+            f"{b['bin']}: {b['stays']}" for b in los['overall']['histogram']))
+        report.append("")
+        
         # Patient Outcomes
-        outcomes = self.get_patient_outcomes()
+        outcomes = data['outcomes']
         report.append("PATIENT OUTCOMES")
         report.append("-"*80)
         report.append(f"{'Outcome Type':<20} {'Count':>10} {'Avg LOS':>12}")
@@ -369,7 +537,7 @@ class MonthlyReportGenerator:
         report.append("")
         
         # Top Doctors
-        doctors = self.get_doctor_performance()
+        doctors = data['top_doctors']
         report.append("TOP 20 DOCTORS BY PATIENT VOLUME")
         report.append("-"*80)
         report.append(f"{'Doctor Name':<25} {'Department':<20} {'Patients':>8} {'Procedures':>10} {'Revenue':>15}")
@@ -389,39 +557,202 @@ class MonthlyReportGenerator:
         
         return "\n".join(report)
     
-    def export_to_csv(self, filename):
-        """Export department data to CSV"""
-        departments = self.get_department_breakdown()
-        
-        with open(filename, 'w', newline='') as csvfile:
-            fieldnames = ['dept_name', 'admissions', 'discharges', 'avg_los', 'revenue', 
-                         'avg_revenue_per_patient', 'procedures', 'emergency_cases']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for dept in departments:
-                writer.writerow(dept)
-        
-        print(f"CSV exported to: {filename}")
+    def render_csv(self):
+        """Department data as CSV text"""
+        buffer = io.StringIO()
+        fieldnames = ['dept_name', 'admissions', 'discharges', 'avg_los', 'revenue', 
+                     'avg_revenue_per_patient', 'procedures', 'emergency_cases']
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+        
+        writer.writeheader()
+        for dept in self.dataset['departments']:
+            writer.writerow(dept)
+        return buffer.getvalue()
     
-    def export_to_json(self, filename):
-        """Export all data to JSON"""
+    def render_json(self):
+        """All report data as JSON text"""
+        dataset = self.dataset
         data = {
             'report_period': self.month_str,
             'generated_at': datetime.now().isoformat(),
-            'summary': self.get_summary_metrics(),
-            'bed_occupancy': self.get_bed_occupancy_stats(),
-            'departments': self.get_department_breakdown(),
-            'revenue': self.get_revenue_breakdown(),
-            'outcomes': self.get_patient_outcomes(),
-            'top_doctors': self.get_doctor_performance()
+            'data_watermark': dataset['data_watermark'],
+            'summary': dataset['summary'],
+            'bed_occupancy': dataset['bed_occupancy'],
+            'departments': dataset['departments'],
+            'revenue': dataset['revenue'],
+            'outcomes': dataset['outcomes'],
+            'los_distribution': dataset['los_distribution'],
+            'top_doctors': dataset['top_doctors']
         }
+        return json.dumps(data, indent=2, default=str)
+    
+    def export_to_csv(self, filename, verbose=True):
+        """Export department data to CSV"""
+        with open(filename, 'w', newline='') as csvfile:
+            csvfile.write(self.render_csv())
+        
+        if verbose:
+            print(f"CSV exported to: {filename}")
+    
+    def export_to_json(self, filename, verbose=True):
+        """Export all data to JSON"""
         with open(filename, 'w') as jsonfile:
-            json.dump(data, jsonfile, indent=2, default=str)
-        print(f"JSON exported to: {filename}")
+            jsonfile.write(self.render_json())
+        if verbose:
+            print(f"JSON exported to: {filename}")
+
+def report_paths(year, month, branch_id=None, output_dir='.'):
+    """Text, department CSV and JSON output paths of one report"""
+    filename_base = f"hospital_report_{year}_{month:02d}"
+    if branch_id:
+        filename_base += f"_branch{branch_id}"
+    filename_base = os.path.join(output_dir, filename_base)
+    return f"{filename_base}.txt", f"{filename_base}_departments.csv", f"{filename_base}_data.json"
+
+def is_up_to_date(paths, data_watermark):
+    """All outputs exist and the JSON was generated from data with this watermark"""
+    if not all(os.path.exists(path) for path in paths):
+        return False
+    try:
+        with open(paths[2]) as jsonfile:
+            previous = json.load(jsonfile).get('data_watermark')
+    except (OSError, ValueError):
+        return False
+    return previous == data_watermark
+
+def write_report(year, month, branch_id=None, output_dir='.', force=False, verbose=True, cache_dir=None):
+    """
+    Write one report's text, CSV and JSON files; returns (status, paths, refreshed sections).
+    'skipped': the files on disk are current. 'cached': copied from the report cache.
+    'generated': rendered, re-querying only sections whose source rows changed.
+    """
+    paths = report_paths(year, month, branch_id, output_dir)
+    cache = ReportCache(cache_dir) if cache_dir else None
+    key = ReportCache.key(year, month, branch_id)
+    generator = MonthlyReportGenerator(year, month, branch_id)
+    if not force:
+        watermark = generator.data_watermark()
+        # With autocommit off the pre-check opened a transaction; end it so build_dataset can start its snapshot
+        generator.connection.rollback()
+        if is_up_to_date(paths, watermark):
+            return 'skipped', paths, []
+        if cache and cache.has_artifacts(key, watermark):
+            cache.copy_artifacts(key, paths)
+            if verbose:
+                print(f"Report for {generator.month_str} is unchanged; copied from cache to: {paths[0]}")
+            return 'cached', paths, []
+        if cache:
+            generator.cached_sections = cache.sections(key)
+    
+    txt_filename, csv_filename, json_filename = paths
+    artifacts = {
+        'txt': generator.generate_text_report(),
+        'csv': generator.render_csv(),
+        'json': generator.render_json()
+    }
+    with open(txt_filename, 'w') as f:
+        f.write(artifacts['txt'])
+    if verbose:
+        print(f"Text report saved to: {txt_filename}")
+    generator.export_to_csv(csv_filename, verbose)
+    generator.export_to_json(json_filename, verbose)
+    if cache:
+        cache.save(key, generator.dataset, artifacts)
+    return 'generated', paths, generator.refreshed_sections
+
+def run_report_job(year, month, branch_id, output_dir, force, cache_dir=None):
+    """Batch worker: one report on its own connection; returns (status, seconds, detail)"""
+    started = time.perf_counter()
+    try:
+        status, paths, refreshed = write_report(year, month, branch_id, output_dir, force,
+                                                verbose=False, cache_dir=cache_dir)
+    except Exception as e:  # one bad report must not stop the batch
+        return 'failed', time.perf_counter() - started, f"{type(e).__name__}: {e}"
+    detail = paths[0]
+    if status == 'generated' and len(refreshed) < len(SECTION_SOURCES):
+        detail += f" (refreshed: {', '.join(refreshed) or 'none'})"
+    return status, time.perf_counter() - started, detail
+
+def parse_month(value):
+    """YYYY-MM argument to (year, month)"""
+    parsed = datetime.strptime(value, '%Y-%m')
+    return parsed.year, parsed.month
+
+def month_span(first, last):
+    """Every (year, month) from first to last inclusive"""
+    months = []
+    index, last_index = first[0] * 12 + first[1] - 1, last[0] * 12 + last[1] - 1
+    while index <= last_index:
+        months.append((index // 12, index % 12 + 1))
+        index += 1
+    return months
+
+def all_branch_ids():
+    """Branch ids from the branches table"""
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT branch_id FROM branches ORDER BY branch_id")
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        connection.close()
+
+def run_batch(args):
+    """Generate every (month, branch) report concurrently with progress and per-report timing"""
+    months = month_span(args.start, args.end or args.start)
+    if args.branches == 'all':
+        branch_ids = all_branch_ids()
+    else:
+        branch_ids = [int(branch) for branch in args.branches.split(',') if branch.strip()]
+    scopes = ([] if args.no_consolidated else [None]) + branch_ids
+    jobs = [(year, month, branch_id) for year, month in months for branch_id in scopes]
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache_dir = None if args.no_cache else args.cache_dir
+    executor_class = ThreadPoolExecutor if args.pool == 'thread' else ProcessPoolExecutor
+    print(f"Generating {len(jobs)} reports ({len(months)} months x {len(scopes)} scopes) "
+          f"with {args.workers} {args.pool} workers...")
+    
+    counts = {'generated': 0, 'cached': 0, 'skipped': 0, 'failed': 0}
+    started = time.perf_counter()
+    with executor_class(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(run_report_job, year, month, branch_id, args.output_dir, args.force,
+                            cache_dir): (year, month, branch_id)
+            for year, month, branch_id in jobs
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            year, month, branch_id = futures[future]
+            status, seconds, detail = future.result()
+            counts[status] += 1
+            scope = f"branch {branch_id}" if branch_id else "all branches"
+            print(f"[{done:>{len(str(len(jobs)))}}/{len(jobs)}] {year}-{month:02d} {scope:<14} "
+                  f"{status:<9} {seconds:6.1f}s  {detail}")
+    
+    print()
+    print(f"Done in {time.perf_counter() - started:.1f}s: {counts['generated']} generated, "
+          f"{counts['cached']} from cache, {counts['skipped']} up to date, {counts['failed']} failed")
+    return 1 if counts['failed'] else 0
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Generate monthly hospital reports (interactive without arguments)")
+    parser.add_argument('--from', dest='start', type=parse_month, help="first month, YYYY-MM")
+    parser.add_argument('--to', dest='end', type=parse_month, help="last month, YYYY-MM (default: --from)")
+    parser.add_argument('--branches', default='all', help="comma-separated branch ids or 'all'")
+    parser.add_argument('--no-consolidated', action='store_true', help="skip the all-branches report")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--pool', choices=['process', 'thread'], default='process')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--force', action='store_true', help="regenerate reports that are up to date")
+    parser.add_argument('--cache-dir', default='report_cache', help="report cache directory")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write the report cache")
+    args = parser.parse_args()
+    
+    if args.start:
+        raise SystemExit(run_batch(args))
+    
     print("="*80)
     print("HOSPITAL MONTHLY REPORT GENERATOR")
     print("="*80)
@@ -433,25 +764,12 @@ def main():
     branch_id = int(branch_input) if branch_input else None
     print("\nGenerating report...")
     print()
-    # Generate report
-    generator = MonthlyReportGenerator(year, month, branch_id)
-    # Generate text report
-    text_report = generator.generate_text_report()
-    # Save to file
-    filename_base = f"hospital_report_{year}_{month:02d}"
-    if branch_id:
-        filename_base += f"_branch{branch_id}"
-    txt_filename = f"{filename_base}.txt"
-    csv_filename = f"{filename_base}_departments.csv"
-    json_filename = f"{filename_base}_data.json"
-    # Save text report
-    with open(txt_filename, 'w') as f:
-        f.write(text_report)
-    print(f"Text report saved to: {txt_filename}")
-    # Export CSV
-    generator.export_to_csv(csv_filename)
-    # Export JSON
-    generator.export_to_json(json_filename)
+    # Generate report (reusing cached sections that are still current)
+    status, paths, _ = write_report(year, month, branch_id, cache_dir=None if args.no_cache else args.cache_dir)
+    if status == 'skipped':
+        print(f"Report is up to date: {paths[0]}")
+    with open(paths[0]) as f:
+        text_report = f.read()
 
     print()
     print("Report generation complete!")
@@ -462,4 +780,4 @@ def main():
     print("\n... (see full report in file)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
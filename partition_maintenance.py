@@ -0,0 +1,298 @@
+"""
+Monthly Partition Maintenance for Hospital Analytics
+Migrates the high-volume fact tables to monthly RANGE partitions, keeps future
+partitions ahead of the data, detaches old months and verifies partition pruning
+"""
+
+import argparse
+import os
+from datetime import date, datetime
+
+import mysql.connector
+
+import analytics_queries
+from query_plan import start_plan
+
+# Database Configuration from Environment Variables (same variables as the API)
+DB_CONFIG = {
+    'host': os.getenv('MYSQLHOST', 'localhost'),
+    'port': int(os.getenv('MYSQLPORT', 3306)),
+    'database': os.getenv('MYSQLDATABASE', 'hospital_analytics'),
+    'user': os.getenv('MYSQLUSER', 'root'),
+    'password': os.getenv('MYSQLPASSWORD', ''),
+}
+
+# table -> (primary key column, partitioning date column)
+PARTITIONED_TABLES = {
+    'admissions': ('admission_id', 'admission_date'),
+    'patient_procedures': ('record_id', 'procedure_date'),
+    'outcomes': ('outcome_id', 'outcome_date'),
+    'bed_occupancy_daily': ('record_id', 'snapshot_date'),
+}
+
+FUTURE_PARTITION = 'p_future'
+DEFAULT_MONTHS_AHEAD = 3
+
+
+def get_db_connection():
+    """Create database connection"""
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+def first_of_month(value):
+    """First day of the month containing `value`"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """Shift a first-of-month date by `count` months"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    """Partition holding rows of `month`, e.g. p202401"""
+    return f"p{month.year}{month.month:02d}"
+
+
+def partition_definitions(first_month, last_month):
+    """Monthly partitions [first_month, last_month] plus the MAXVALUE catch-all"""
+    definitions = []
+    month = first_month
+    while month <= last_month:
+        upper = add_months(month, 1)
+        definitions.append(f"PARTITION {partition_name(month)} VALUES LESS THAN ('{upper.isoformat()}')")
+        month = upper
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return definitions
+
+
+def existing_partitions(cursor, table):
+    """Bounded partitions of `table` as [(name, upper_bound_date)], oldest first"""
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+        FROM INFORMATION_SCHEMA.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    partitions = []
+    for name, description in cursor.fetchall():
+        if description == 'MAXVALUE':
+            continue
+        partitions.append((name, datetime.strptime(description.strip("'")[:10], '%Y-%m-%d').date()))
+    return partitions
+
+
+# ============== MIGRATION ==============
+
+def migration_statements(cursor, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """
+    Statements converting the fact tables to monthly RANGE COLUMNS partitioning.
+    InnoDB partitioned tables cannot take part in foreign keys, and every unique
+    key must include the partitioning column, so the FKs touching these tables are
+    dropped and each primary key is widened to (id, date).
+    """
+    statements = []
+    tables = tuple(PARTITIONED_TABLES)
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(f"""
+        SELECT TABLE_NAME, CONSTRAINT_NAME
+        FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE()
+          AND (TABLE_NAME IN ({placeholders}) OR REFERENCED_TABLE_NAME IN ({placeholders}))
+        ORDER BY TABLE_NAME, CONSTRAINT_NAME
+    """, tables + tables)
+    for table, constraint in cursor.fetchall():
+        statements.append(f"ALTER TABLE {table} DROP FOREIGN KEY {constraint}")
+
+    last_month = add_months(first_of_month(date.today()), months_ahead)
+    for table, (id_column, date_column) in PARTITIONED_TABLES.items():
+        cursor.execute(f"SELECT MIN({date_column}) FROM {table}")
+        oldest = cursor.fetchone()[0] or date.today()
+        first_month = first_of_month(oldest)
+
+        statements.append(
+            f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY ({id_column}, {date_column})"
+        )
+        definitions = ',\n    '.join(partition_definitions(first_month, last_month))
+        statements.append(
+            f"ALTER TABLE {table}\nPARTITION BY RANGE COLUMNS({date_column}) (\n    {definitions}\n)"
+        )
+    return statements
+
+
+# ============== ROUTINE MAINTENANCE ==============
+
+def ensure_future_partitions(cursor, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """Split p_future so every table has partitions through `months_ahead` months from now"""
+    target = add_months(first_of_month(date.today()), months_ahead + 1)
+    created = []
+    for table in PARTITIONED_TABLES:
+        partitions = existing_partitions(cursor, table)
+        if not partitions:
+            continue
+        next_month = partitions[-1][1]
+        if next_month >= target:
+            continue
+        definitions = partition_definitions(next_month, add_months(target, -1))
+        cursor.execute(
+            f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(definitions)})"
+        )
+        created.extend(f"{table}.{definition.split()[1]}" for definition in definitions[:-1])
+    return created
+
+
+def detach_partitions(cursor, before_month, archive=True):
+    """
+    Remove partitions holding only rows older than `before_month`. With archive=True
+    each partition is swapped into a standalone <table>_<partition> table first
+    (EXCHANGE PARTITION is a metadata-only operation), otherwise it is dropped.
+    """
+    detached = []
+    for table in PARTITIONED_TABLES:
+        for name, upper_bound in existing_partitions(cursor, table):
+            if upper_bound > before_month:
+                break
+            if archive:
+                archive_table = f"{table}_{name}"
+                cursor.execute(f"CREATE TABLE {archive_table} LIKE {table}")
+                cursor.execute(f"ALTER TABLE {archive_table} REMOVE PARTITIONING")
+                cursor.execute(f"ALTER TABLE {table} EXCHANGE PARTITION {name} WITH TABLE {archive_table}")
+            cursor.execute(f"ALTER TABLE {table} DROP PARTITION {name}")
+            detached.append(f"{table}.{name}")
+    return detached
+
+
+# ============== PRUNING VERIFICATION ==============
+
+def explain_partitions(cursor, query, params=()):
+    """
+    Partitions each table in `query` would read, as {table_alias: [partition, ...]}.
+    MySQL 8 always reports the partitions column in EXPLAIN (the EXPLAIN PARTITIONS
+    keyword was removed), so plain EXPLAIN is used.
+    """
+    cursor.execute(f"EXPLAIN {query}", params)
+    columns = [column[0] for column in cursor.description]
+    accessed = {}
+    for row in cursor.fetchall():
+        row = dict(zip(columns, row))
+        if row.get('table') and row.get('partitions'):
+            accessed[row['table']] = row['partitions'].split(',')
+    return accessed
+
+
+def pruning_checks():
+    """
+    (label, plan, {table alias: oldest date in the window}) for API plans whose
+    queries are bounded by a date window. The plans build their windows from
+    today's date, like the endpoints serving them.
+    """
+    today = date.today()
+    month_start = first_of_month(today)
+    window_30 = date.fromordinal(today.toordinal() - 30)
+    window_90 = date.fromordinal(today.toordinal() - 90)
+    return [
+        ('admission trends (90 days)', analytics_queries.admission_trends({}),
+         {'admissions': window_90}),
+        ('bed occupancy trends (30 days)', analytics_queries.bed_occupancy_trends({}),
+         {'bed_occupancy_daily': window_30}),
+        ('outcomes summary (90 days)', analytics_queries.outcomes_summary({}),
+         {'o': window_90}),
+        ('doctor utilization (30 days)', analytics_queries.doctor_utilization({}),
+         {'a': window_30, 'pp': window_30}),
+        ('peak hours (90 days)', analytics_queries.peak_hours({}),
+         {'admissions': window_90}),
+        ('monthly report', analytics_queries.monthly_report({'month': month_start.strftime('%Y-%m')}),
+         {'a': month_start, 'pp': month_start}),
+    ]
+
+
+def explain_plan(cursor, plan):
+    """
+    Run a query plan, EXPLAINing each query before it executes; returns the
+    partitions read per table alias over all of the plan's queries
+    """
+    accessed = {}
+    query, _ = start_plan(plan)
+    try:
+        while query is not None:
+            for alias, partitions in explain_partitions(cursor, query.sql, query.params).items():
+                accessed.setdefault(alias, [])
+                accessed[alias] += [name for name in partitions if name not in accessed[alias]]
+            cursor.execute(query.sql, query.params)
+            query = plan.send(query.shape(cursor.description, cursor.fetchall()))
+    except StopIteration:
+        pass
+    return accessed
+
+
+def verify_pruning(cursor):
+    """Check that each windowed plan skips partitions older than its window"""
+    results = []
+    for label, plan, lower_bounds in pruning_checks():
+        accessed = explain_plan(cursor, plan)
+        ok = True
+        for alias, lower_bound in lower_bounds.items():
+            oldest_allowed = partition_name(first_of_month(lower_bound))
+            for name in accessed.get(alias, []):
+                if name != FUTURE_PARTITION and name < oldest_allowed:
+                    ok = False
+        results.append((label, ok, accessed))
+    return results
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Monthly partition maintenance for hospital_analytics")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate = commands.add_parser('migrate', help="partition the fact tables (prints SQL unless --apply)")
+    migrate.add_argument('--months-ahead', type=int, default=DEFAULT_MONTHS_AHEAD)
+    migrate.add_argument('--apply', action='store_true')
+
+    maintain = commands.add_parser('maintain', help="create upcoming monthly partitions")
+    maintain.add_argument('--months-ahead', type=int, default=DEFAULT_MONTHS_AHEAD)
+
+    detach = commands.add_parser('detach', help="detach partitions older than a month")
+    detach.add_argument('--before', required=True, help="YYYY-MM; partitions for earlier months are removed")
+    detach.add_argument('--drop', action='store_true', help="drop instead of archiving to standalone tables")
+
+    commands.add_parser('verify', help="EXPLAIN the windowed API plans and check pruning")
+
+    args = parser.parse_args()
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        if args.command == 'migrate':
+            statements = migration_statements(cursor, args.months_ahead)
+            for statement in statements:
+                print(statement + ";\n")
+                if args.apply:
+                    cursor.execute(statement)
+            if not args.apply:
+                print("-- Dry run only; re-run with --apply to execute")
+        elif args.command == 'maintain':
+            created = ensure_future_partitions(cursor, args.months_ahead)
+            print(f"Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+        elif args.command == 'detach':
+            before = datetime.strptime(args.before, '%Y-%m').date()
+            detached = detach_partitions(cursor, before, archive=not args.drop)
+            print(f"Detached {len(detached)} partitions" + (f": {', '.join(detached)}" if detached else ""))
+        elif args.command == 'verify':
+            failures = 0
+            for label, ok, accessed in verify_pruning(cursor):
+                status = "PRUNED" if ok else "NOT PRUNED"
+                failures += not ok
+                print(f"{status:<11} {label}")
+                for alias, partitions in accessed.items():
+                    print(f"            {alias}: {', '.join(partitions)}")
+            if failures:
+                raise SystemExit(1)
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Multi-Month Period Reports for Hospital Analytics
+monthly_partials keeps one row of mergeable aggregates per month, branch and
+department: counts, sums (stay days, revenue, occupancy) with their
+denominators, and the month's LOS sketch. Quarter, year-to-date and trailing
+12-month reports add those rows up and derive averages and quantiles only at
+the end, so a period costs one small row set per month instead of re-scanning
+admissions.
+
+    python period_reports.py refresh --from 2023-01 --to 2024-12
+"""
+
+import argparse
+import os
+from datetime import date, datetime
+
+import mysql.connector
+
+from los_sketch import LOSSketch
+from query_plan import ratio
+from result_mapping import ColumnTypes
+
+PERIODS = ('month', 'quarter', 'ytd', 'ttm')
+
+# Additive columns of monthly_partials, in storage order
+PARTIAL_COLUMNS = [
+    'admissions', 'discharges', 'emergency_admissions', 'los_days', 'revenue', 'billed_count',
+    'procedures', 'readmissions', 'occupancy_sum', 'occupancy_count',
+]
+
+PARTIAL_TYPES = ColumnTypes.floats('los_days', 'revenue', 'occupancy_sum')
+
+# Partials of a month range; `{branch_filter}` optionally narrows to one branch
+PERIOD_PARTIALS_SQL = f"""
+    SELECT
+        DATE_FORMAT(mp.summary_month, '%Y-%m') as month,
+        mp.dept_id,
+        d.dept_name,
+        {', '.join('mp.' + column for column in PARTIAL_COLUMNS)},
+        mp.los_buckets
+    FROM monthly_partials mp
+    JOIN departments d ON mp.dept_id = d.dept_id
+    WHERE mp.summary_month >= %s AND mp.summary_month <= %s {{branch_filter}}
+"""
+
+# Database Configuration from Environment Variables (same variables as the API)
+DB_CONFIG = {
+    'host': os.getenv('MYSQLHOST', 'localhost'),
+    'port': int(os.getenv('MYSQLPORT', 3306)),
+    'database': os.getenv('MYSQLDATABASE', 'hospital_analytics'),
+    'user': os.getenv('MYSQLUSER', 'root'),
+    'password': os.getenv('MYSQLPASSWORD', ''),
+}
+
+
+def add_months(month, count):
+    """Shift a first-of-month date by `count` months"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def period_bounds(period, month):
+    """First and last month (first-of-month dates) of a period ending in or containing `month`"""
+    month = date(month.year, month.month, 1)
+    if period == 'month':
+        return month, month
+    if period == 'quarter':
+        first = date(month.year, (month.month - 1) // 3 * 3 + 1, 1)
+        return first, add_months(first, 2)
+    if period == 'ytd':
+        return date(month.year, 1, 1), month
+    if period == 'ttm':
+        return add_months(month, -11), month
+    raise ValueError(f"period must be one of: {', '.join(PERIODS)}")
+
+
+def partial_query(first_month, last_month, branch_id=None):
+    """SQL and params loading the partials of [first_month, last_month]"""
+    sql = PERIOD_PARTIALS_SQL.format(branch_filter="AND mp.branch_id = %s" if branch_id else "")
+    params = [first_month, last_month] + ([branch_id] if branch_id else [])
+    return sql, params
+
+
+class PeriodTotals:
+    """Running sums of monthly partial rows"""
+
+    def __init__(self):
+        self.sums = dict.fromkeys(PARTIAL_COLUMNS, 0)
+        self.sketch = LOSSketch()
+
+    def add(self, row):
+        for column in PARTIAL_COLUMNS:
+            self.sums[column] += row[column] or 0
+        self.sketch.merge(LOSSketch.from_json(row['los_buckets']))
+
+    def metrics(self):
+        """Averages and rates derived from the merged sums"""
+        sums = self.sums
+        readmission_rate = ratio(sums['readmissions'] * 100, sums['discharges'])
+        emergency_percentage = ratio(sums['emergency_admissions'] * 100, sums['admissions'])
+        return {
+            'total_admissions': sums['admissions'],
+            'total_discharges': sums['discharges'],
+            'emergency_admissions': sums['emergency_admissions'],
+            'emergency_percentage': round(emergency_percentage or 0, 2),
+            'avg_los': ratio(sums['los_days'], sums['admissions']),
+            'total_revenue': sums['revenue'],
+            'avg_cost_per_patient': ratio(sums['revenue'], sums['billed_count']),
+            'total_procedures': sums['procedures'],
+            'readmissions': sums['readmissions'],
+            'readmission_rate': round(readmission_rate or 0, 2),
+            'avg_occupancy': ratio(sums['occupancy_sum'], sums['occupancy_count']),
+            'los_distribution': self.sketch.stats(),
+        }
+
+
+def assemble_period(rows, first_month, last_month):
+    """Period report from partial rows: totals, per-department and per-month breakdowns"""
+    total = PeriodTotals()
+    departments = {}
+    months = {}
+    for row in rows:
+        total.add(row)
+        if row['dept_id'] not in departments:
+            departments[row['dept_id']] = (row['dept_name'], PeriodTotals())
+        departments[row['dept_id']][1].add(row)
+        months.setdefault(row['month'], PeriodTotals()).add(row)
+
+    department_rows = [dict(dept_name=name, **totals.metrics()) for name, totals in departments.values()]
+    department_rows.sort(key=lambda row: row['total_admissions'], reverse=True)
+
+    return {
+        'first_month': first_month.strftime('%Y-%m'),
+        'last_month': last_month.strftime('%Y-%m'),
+        'months_covered': len(months),
+        'summary': total.metrics(),
+        'departments': department_rows,
+        'monthly': [dict(month=month, **months[month].metrics()) for month in sorted(months)],
+    }
+
+
+def refresh_month(cursor, month):
+    """Recompute the partials of one month for every branch and department"""
+    month_start = date(month.year, month.month, 1)
+    month_end = add_months(month_start, 1)
+    partials = {}
+
+    def partial(branch_id, dept_id):
+        key = (branch_id, dept_id)
+        if key not in partials:
+            partials[key] = dict.fromkeys(PARTIAL_COLUMNS, 0)
+            partials[key]['sketch'] = LOSSketch()
+        return partials[key]
+
+    # Admission-side counts and sums; billing and admission_gaps are one row per admission
+    cursor.execute("""
+        SELECT a.branch_id, a.dept_id,
+               COUNT(*),
+               SUM(a.status = 'Discharged'),
+               SUM(a.admission_type = 'Emergency'),
+               SUM(DATEDIFF(COALESCE(a.discharge_date, CURRENT_DATE), a.admission_date)),
+               COALESCE(SUM(b.total_amount), 0),
+               COUNT(b.total_amount),
+               SUM(COALESCE(g.readmitted_30d, 0))
+        FROM admissions a
+        LEFT JOIN billing b ON a.admission_id = b.admission_id
+        LEFT JOIN admission_gaps g ON a.admission_id = g.admission_id
+        WHERE a.admission_date >= %s AND a.admission_date < %s
+        GROUP BY a.branch_id, a.dept_id
+    """, (month_start, month_end))
+    columns = ['admissions', 'discharges', 'emergency_admissions', 'los_days', 'revenue',
+               'billed_count', 'readmissions']
+    for branch_id, dept_id, *values in cursor.fetchall():
+        partial(branch_id, dept_id).update(zip(columns, values))
+
+    cursor.execute("""
+        SELECT a.branch_id, a.dept_id, COUNT(*)
+        FROM patient_procedures pp
+        JOIN admissions a ON pp.admission_id = a.admission_id
+        WHERE a.admission_date >= %s AND a.admission_date < %s AND pp.procedure_date >= %s
+        GROUP BY a.branch_id, a.dept_id
+    """, (month_start, month_end, month_start))
+    for branch_id, dept_id, procedures in cursor.fetchall():
+        partial(branch_id, dept_id)['procedures'] = procedures
+
+    cursor.execute("""
+        SELECT branch_id, dept_id, SUM(occupancy_rate), COUNT(occupancy_rate)
+        FROM bed_occupancy_daily
+        WHERE snapshot_date >= %s AND snapshot_date < %s AND dept_id IS NOT NULL
+        GROUP BY branch_id, dept_id
+    """, (month_start, month_end))
+    for branch_id, dept_id, occupancy_sum, occupancy_count in cursor.fetchall():
+        partial(branch_id, dept_id).update(occupancy_sum=occupancy_sum or 0, occupancy_count=occupancy_count)
+
+    # Completed stays discharged in the month, from the daily LOS sketches
+    cursor.execute("""
+        SELECT branch_id, dept_id, bucket, SUM(stays)
+        FROM los_sketch_daily
+        WHERE discharge_day >= %s AND discharge_day < %s
+        GROUP BY branch_id, dept_id, bucket
+    """, (month_start, month_end))
+    for branch_id, dept_id, bucket, stays in cursor.fetchall():
+        partial(branch_id, dept_id)['sketch'].add_bucket(bucket, int(stays))
+
+    cursor.execute("DELETE FROM monthly_partials WHERE summary_month = %s", (month_start,))
+    cursor.executemany(f"""
+        INSERT INTO monthly_partials
+        (summary_month, branch_id, dept_id, {', '.join(PARTIAL_COLUMNS)}, los_buckets)
+        VALUES (%s, %s, %s, {', '.join(['%s'] * len(PARTIAL_COLUMNS))}, %s)
+    """, [
+        (month_start, branch_id, dept_id, *(values[column] for column in PARTIAL_COLUMNS),
+         values['sketch'].to_json())
+        for (branch_id, dept_id), values in partials.items()
+    ])
+    return len(partials)
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Maintain mergeable monthly report partials")
+    commands = parser.add_subparsers(dest='command', required=True)
+    refresh = commands.add_parser('refresh', help="recompute partials for a month range")
+    refresh.add_argument('--from', dest='start', required=True,
+                         type=lambda value: datetime.strptime(value, '%Y-%m').date(), help="YYYY-MM")
+    refresh.add_argument('--to', dest='end',
+                         type=lambda value: datetime.strptime(value, '%Y-%m').date(), help="YYYY-MM (default: --from)")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    try:
+        month = args.start
+        while month <= (args.end or args.start):
+            started = datetime.now()
+            rows = refresh_month(cursor, month)
+            conn.commit()
+            print(f"{month.strftime('%Y-%m')}: {rows} branch/department partials "
+                  f"in {(datetime.now() - started).total_seconds():.1f}s")
+            month = add_months(month, 1)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Driver-independent query plans for Hospital Analytics
+An endpoint is written once as a generator that yields Query objects and receives
+their rows; sync (mysql-connector) and async (aiomysql) drivers execute it
+"""
+
+
+from result_mapping import map_rows
+
+
+class Query:
+    """
+    One SQL statement issued by a plan. With `types` (a ColumnTypes) the plan
+    receives a typed ResultSet, otherwise a list of dicts; `one`
+    narrows either to the first row as a dict.
+    """
+    __slots__ = ('sql', 'params', 'one', 'types')
+
+    def __init__(self, sql, params=(), one=False, types=None):
+        self.sql = sql
+        self.params = tuple(params)
+        self.one = one
+        self.types = types
+
+    def shape(self, description, rows):
+        """Map fetched tuples to what the plan expects"""
+        result = map_rows(description, rows, self.types)
+        if not self.one:
+            return result
+        if self.types is not None:
+            return result.first()
+        return result[0] if result else None
+
+
+class BadRequest(Exception):
+    """Raised by a plan when request arguments are invalid (HTTP 400)"""
+
+
+class Scatter:
+    """
+    A cross-branch plan split for scatter-gather over branch shards: `partial`
+    is a plan returning mergeable aggregates (sums and counts, never averages),
+    `merge` combines a list of partials and `finish(partial, args)` shapes the
+    payload. Calling it builds the ordinary single-database plan.
+    """
+
+    def __init__(self, partial, merge, finish):
+        self.partial = partial
+        self.merge = merge
+        self.finish = finish
+
+    def __call__(self, args):
+        partial = yield from self.partial(args)
+        return self.finish(partial, args)
+
+
+def add(a, b):
+    """Sum two partial aggregates; SQL NULL (an empty SUM) is the identity"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a + b
+
+
+def ratio(total, count):
+    """Average from a merged (sum, count) pair; None when nothing was counted"""
+    return float(total) / count if count else None
+
+
+def merge_sums(partials):
+    """Merge dict partials key by key: numbers are added, nested dicts merged recursively"""
+    merged = {}
+    for partial in partials:
+        for key, value in partial.items():
+            if isinstance(value, dict):
+                merged[key] = merge_sums([merged.get(key, {}), value])
+            else:
+                merged[key] = add(merged.get(key), value)
+    return merged
+
+
+def concat_partials(partials):
+    """Merge list partials whose rows are combined later (e.g. sketch buckets) by concatenation"""
+    return [row for rows in partials for row in rows]
+
+
+def merge_rows(row_lists, key, keep=()):
+    """
+    Merge per-shard GROUP BY rows on `key`: columns listed in `keep` (names,
+    capacities) are taken from the first shard, every other column is summed
+    """
+    merged = {}
+    for rows in row_lists:
+        for row in rows:
+            target = merged.get(row[key])
+            if target is None:
+                merged[row[key]] = dict(row)
+                continue
+            for column, value in row.items():
+                if column != key and column not in keep:
+                    target[column] = add(target[column], value)
+    return list(merged.values())
+
+
+def start_plan(plan):
+    """
+    Advance a plan to its first query. Argument validation runs here, so callers
+    can reject bad requests before acquiring a database connection.
+    Returns (first_query, None) or (None, result) for plans that need no SQL.
+    """
+    try:
+        return next(plan), None
+    except StopIteration as stop:
+        return None, stop.value
+
+
+def run_plan(plan, cursor, query=None):
+    """Execute a plan on a mysql-connector (tuple) cursor"""
+    if query is None:
+        query, result = start_plan(plan)
+        if query is None:
+            return result
+    try:
+        while True:
+            cursor.execute(query.sql, query.params)
+            query = plan.send(query.shape(cursor.description, cursor.fetchall()))
+    except StopIteration as stop:
+        return stop.value
+
+
+def pyformat_sql(sql):
+    """
+    Adapt mysql-connector SQL for PyMySQL-based drivers, which apply Python
+    %-formatting to the whole statement: literal % (DATE_FORMAT patterns) must be doubled.
+    """
+    return sql.replace('%', '%%').replace('%%s', '%s')
+
+
+async def run_plan_async(plan, cursor, query=None):
+    """Execute a plan on an aiomysql (tuple) cursor"""
+    if query is None:
+        query, result = start_plan(plan)
+        if query is None:
+            return result
+    try:
+        while True:
+            if query.params:
+                await cursor.execute(pyformat_sql(query.sql), query.params)
+            else:
+                await cursor.execute(query.sql)
+            rows = await cursor.fetchall()
+            query = plan.send(query.shape(cursor.description, rows))
+    except StopIteration as stop:
+        return stop.value
@@ -0,0 +1,243 @@
+"""
+30-Day Readmission Engine for Hospital Analytics
+Derives readmissions from each patient's admission sequence instead of the
+readmission_within_30days flag. LEAD() over the (patient_id, admission_date)
+index pairs every admission with the patient's next one in a single ordered
+scan; the result is kept in admission_gaps and refreshed per patient as
+admissions and discharges arrive, so KPIs read one row per admission.
+
+With branches on several shards (SHARD_MAP, see shard_router.py) a patient's
+next admission may be on another shard, which a per-shard LEAD() cannot see.
+The commands then read the patients' admissions from every shard, pair them
+here and write each gap row to the shard holding its admission.
+
+    python readmissions.py migrate            # add the index and derived table to an existing database
+    python readmissions.py rebuild            # recompute every patient's sequence
+    python readmissions.py sync --since 2024-06-01
+    SHARD_MAP=... python readmissions.py rebuild   # every shard, pairing admissions across them
+"""
+
+import argparse
+import os
+from datetime import date, datetime, timedelta
+
+from shard_router import ShardRouter
+
+READMISSION_WINDOW_DAYS = 30
+REFRESH_BATCH_SIZE = 500    # patients per incremental refresh statement
+
+# Database Configuration from Environment Variables (same variables as the API)
+DB_CONFIG = {
+    'host': os.getenv('MYSQLHOST', 'localhost'),
+    'port': int(os.getenv('MYSQLPORT', 3306)),
+    'database': os.getenv('MYSQLDATABASE', 'hospital_analytics'),
+    'user': os.getenv('MYSQLUSER', 'root'),
+    'password': os.getenv('MYSQLPASSWORD', ''),
+}
+
+MIGRATION_STATEMENTS = [
+    "ALTER TABLE admissions ADD INDEX idx_patient_admission (patient_id, admission_date)",
+    """
+    CREATE TABLE IF NOT EXISTS admission_gaps (
+        admission_id INT PRIMARY KEY,
+        patient_id INT NOT NULL,
+        branch_id INT NOT NULL,
+        dept_id INT NOT NULL,
+        admission_date DATETIME NOT NULL,
+        discharge_date DATETIME,
+        next_admission_id INT,
+        next_admission_date DATETIME,
+        gap_days INT,
+        readmitted_30d BOOLEAN NOT NULL DEFAULT FALSE,
+        INDEX idx_gap_admission (admission_date, branch_id, dept_id),
+        INDEX idx_gap_discharge (discharge_date),
+        INDEX idx_gap_patient (patient_id)
+    )
+    """,
+]
+
+# Every admission with the patient's next admission; `{where}` narrows the patients
+SEQUENCE_SQL = f"""
+    INSERT INTO admission_gaps
+    (admission_id, patient_id, branch_id, dept_id, admission_date, discharge_date,
+     next_admission_id, next_admission_date, gap_days, readmitted_30d)
+    SELECT
+        admission_id, patient_id, branch_id, dept_id, admission_date, discharge_date,
+        next_admission_id, next_admission_date,
+        DATEDIFF(next_admission_date, discharge_date),
+        COALESCE(next_admission_date >= discharge_date
+                 AND next_admission_date < discharge_date + INTERVAL {READMISSION_WINDOW_DAYS} DAY, FALSE)
+    FROM (
+        SELECT
+            admission_id, patient_id, branch_id, dept_id, admission_date, discharge_date,
+            LEAD(admission_id) OVER seq as next_admission_id,
+            LEAD(admission_date) OVER seq as next_admission_date
+        FROM admissions
+        {{where}}
+        WINDOW seq AS (PARTITION BY patient_id ORDER BY admission_date, admission_id)
+    ) ordered
+"""
+
+# Admissions of a batch of patients on one shard, for the cross-shard sequence
+PATIENT_ADMISSIONS_SQL = """
+    SELECT admission_id, patient_id, branch_id, dept_id, admission_date, discharge_date
+    FROM admissions
+    WHERE patient_id IN ({placeholders})
+"""
+
+INSERT_GAP_SQL = """
+    INSERT INTO admission_gaps
+    (admission_id, patient_id, branch_id, dept_id, admission_date, discharge_date,
+     next_admission_id, next_admission_date, gap_days, readmitted_30d)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def refresh_patients(cursor, patient_ids):
+    """Recompute the admission gaps of the given patients (index seeks on patient_id)"""
+    patient_ids = sorted(set(patient_ids))
+    for i in range(0, len(patient_ids), REFRESH_BATCH_SIZE):
+        batch = patient_ids[i:i + REFRESH_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"DELETE FROM admission_gaps WHERE patient_id IN ({placeholders})", batch)
+        cursor.execute(SEQUENCE_SQL.format(where=f"WHERE patient_id IN ({placeholders})"), batch)
+    return len(patient_ids)
+
+
+def sequence_gaps(admissions):
+    """
+    admission_gaps rows for (shard, admission row) pairs read from any shards,
+    as (shard, gap row); the same pairing and 30-day test as SEQUENCE_SQL
+    """
+    ordered = sorted(admissions, key=lambda item: (item[1][1], item[1][4], item[1][0]))
+    gaps = []
+    for i, (shard, admission) in enumerate(ordered):
+        admission_id, patient_id, branch_id, dept_id, admission_date, discharge_date = admission
+        following = ordered[i + 1][1] if i + 1 < len(ordered) else None
+        if following is None or following[1] != patient_id:
+            next_id = next_date = None
+        else:
+            next_id, next_date = following[0], following[4]
+        gap_days = readmitted = None
+        if next_date is not None and discharge_date is not None:
+            gap_days = (next_date.date() - discharge_date.date()).days
+            readmitted = discharge_date <= next_date < discharge_date + timedelta(days=READMISSION_WINDOW_DAYS)
+        gaps.append((shard, (admission_id, patient_id, branch_id, dept_id, admission_date, discharge_date,
+                             next_id, next_date, gap_days, bool(readmitted))))
+    return gaps
+
+
+def refresh_patients_across(cursors, patient_ids):
+    """refresh_patients() over every shard: each patient's admissions are paired across shards"""
+    patient_ids = sorted(set(patient_ids))
+    for i in range(0, len(patient_ids), REFRESH_BATCH_SIZE):
+        batch = patient_ids[i:i + REFRESH_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch))
+        admissions = []
+        for shard, cursor in enumerate(cursors):
+            cursor.execute(PATIENT_ADMISSIONS_SQL.format(placeholders=placeholders), batch)
+            admissions.extend((shard, row) for row in cursor.fetchall())
+        rows = [[] for _ in cursors]
+        for shard, gap in sequence_gaps(admissions):
+            rows[shard].append(gap)
+        for cursor, shard_rows in zip(cursors, rows):
+            cursor.execute(f"DELETE FROM admission_gaps WHERE patient_id IN ({placeholders})", batch)
+            if shard_rows:
+                cursor.executemany(INSERT_GAP_SQL, shard_rows)
+    return len(patient_ids)
+
+
+def touched_patients(cursor, since):
+    """Patients with an admission or discharge on/after `since` on one shard"""
+    cursor.execute("""
+        SELECT patient_id FROM admissions WHERE admission_date >= %s
+        UNION
+        SELECT patient_id FROM admissions WHERE discharge_date >= %s
+    """, (since, since))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def rebuild(cursor):
+    """Recompute every patient's admission sequence in one ordered pass"""
+    cursor.execute("DELETE FROM admission_gaps")
+    cursor.execute(SEQUENCE_SQL.format(where=""))
+    return cursor.rowcount
+
+
+def rebuild_across(cursors):
+    """rebuild() over every shard, in patient batches of the cross-shard refresh"""
+    patient_ids = set()
+    for cursor in cursors:
+        cursor.execute("SELECT DISTINCT patient_id FROM admissions")
+        patient_ids.update(row[0] for row in cursor.fetchall())
+    for cursor in cursors:
+        cursor.execute("DELETE FROM admission_gaps")
+    return refresh_patients_across(cursors, patient_ids)
+
+
+def sync(cursor, since):
+    """Refresh patients with an admission or discharge on/after `since`"""
+    return refresh_patients(cursor, touched_patients(cursor, since))
+
+
+def sync_across(cursors, since):
+    """sync() over every shard; a patient touched on one shard is refreshed on all of them"""
+    patient_ids = set()
+    for cursor in cursors:
+        patient_ids.update(touched_patients(cursor, since))
+    return refresh_patients_across(cursors, patient_ids)
+
+
+def migrate(cursor):
+    """Add the patient sequence index and the derived table, skipping what already exists"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'admissions'
+          AND INDEX_NAME = 'idx_patient_admission'
+    """)
+    has_index = cursor.fetchone()[0] > 0
+    for statement in MIGRATION_STATEMENTS[1 if has_index else 0:]:
+        cursor.execute(statement)
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Maintain derived 30-day readmissions")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('migrate', help="create idx_patient_admission and admission_gaps")
+    commands.add_parser('rebuild', help="recompute admission gaps for all patients")
+    sync_parser = commands.add_parser('sync', help="refresh patients touched since a date")
+    sync_parser.add_argument('--since', type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+    args = parser.parse_args()
+
+    router = ShardRouter.from_env(DB_CONFIG)
+    connections = router.connect_all()
+    cursors = [conn.cursor() for conn in connections]
+    try:
+        started = datetime.now()
+        if args.command == 'migrate':
+            for cursor in cursors:
+                migrate(cursor)
+            print(f"Readmission index and admission_gaps table are in place on {len(cursors)} database(s)")
+        elif args.command == 'rebuild' and router.sharded:
+            patients = rebuild_across(cursors)
+            print(f"Rebuilt the admission gaps of {patients} patients across {len(cursors)} shards")
+        elif args.command == 'rebuild':
+            rows = rebuild(cursors[0])
+            print(f"Rebuilt {rows} admission gaps")
+        elif router.sharded:
+            patients = sync_across(cursors, args.since)
+            print(f"Refreshed {patients} patients touched since {args.since} across {len(cursors)} shards")
+        else:
+            patients = sync(cursors[0], args.since)
+            print(f"Refreshed {patients} patients touched since {args.since}")
+        for conn in connections:
+            conn.commit()
+        print(f"Done in {(datetime.now() - started).total_seconds():.1f}s")
+    finally:
+        for cursor, conn in zip(cursors, connections):
+            cursor.close()
+            conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+On-Disk Report Cache for Hospital Analytics
+Keeps each monthly report's section data and rendered artifacts (text, CSV,
+JSON), keyed by month and branch. Every section carries the watermark of the
+source rows it was computed from: when the month's watermark is unchanged the
+cached artifacts are reused as-is, and when late data arrives only the
+sections whose sources changed are queried again.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+ARTIFACT_SUFFIXES = {'txt': '.txt', 'csv': '_departments.csv', 'json': '_data.json'}
+
+
+def write_atomic(path, data):
+    """Write bytes via a temp file and rename, so readers never see partial files"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ReportCache:
+    """Section data and artifacts of generated reports under one directory"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(year, month, branch_id=None):
+        return f"{year}_{month:02d}_" + (f"branch{branch_id}" if branch_id else "all")
+
+    def path(self, key, suffix):
+        return os.path.join(self.root, key + suffix)
+
+    def load(self, key):
+        """Cache entry {'data_watermark', 'sections': {name: {'watermark', 'data'}}}, or None"""
+        try:
+            with open(self.path(key, '.sections.json')) as entry:
+                return json.load(entry)
+        except (OSError, ValueError):
+            return None
+
+    def sections(self, key):
+        entry = self.load(key)
+        return entry['sections'] if entry else {}
+
+    def has_artifacts(self, key, data_watermark):
+        """Artifacts exist and were rendered from data with this watermark"""
+        entry = self.load(key)
+        return (entry is not None and entry['data_watermark'] == data_watermark
+                and all(os.path.exists(self.path(key, suffix)) for suffix in ARTIFACT_SUFFIXES.values()))
+
+    def copy_artifacts(self, key, paths):
+        """Copy the cached text, CSV and JSON artifacts to the given output paths"""
+        for fmt, path in zip(ARTIFACT_SUFFIXES, paths):
+            shutil.copyfile(self.path(key, ARTIFACT_SUFFIXES[fmt]), path)
+
+    def save(self, key, dataset, artifacts):
+        """Store a report's sections with their watermarks and its rendered artifacts ({fmt: text})"""
+        for fmt, text in artifacts.items():
+            write_atomic(self.path(key, ARTIFACT_SUFFIXES[fmt]), text.encode('utf-8'))
+        # Written last: the entry only validates artifacts that are already in place
+        entry = {
+            'data_watermark': dataset['data_watermark'],
+            'sections': {
+                section: {'watermark': watermark, 'data': dataset[section]}
+                for section, watermark in dataset['section_watermarks'].items()
+            },
+        }
+        write_atomic(self.path(key, '.sections.json'), json.dumps(entry, default=str).encode('utf-8'))
@@ -0,0 +1,199 @@
+"""
+Asynchronous Report Jobs for Hospital Analytics
+Monthly reports are generated off the request path: a POST enqueues a job, a
+local worker pool runs MonthlyReportGenerator, and the text, CSV and JSON
+outputs land in a content-addressed store (files named by their SHA-256), so
+identical outputs are stored once. Job manifests are kept next to the objects,
+which lets any API process serve results of jobs that finished elsewhere.
+Requests for a report that is already queued or running, in any process
+sharing the store, join that job: a pending job holds a claim file per
+(month, branch) that is created with an exclusive link and removed when the
+job finishes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from monthly_report_generator import MonthlyReportGenerator
+from report_cache import write_atomic
+
+# Output format -> (file suffix, mimetype)
+REPORT_FORMATS = {
+    'json': ('json', 'application/json'),
+    'csv': ('csv', 'text/csv'),
+    'txt': ('txt', 'text/plain; charset=utf-8'),
+}
+
+PENDING_STATUSES = ('queued', 'running')
+CLAIM_STALE_SECONDS = 3600     # a claim this old belongs to a process that died mid-job
+
+
+class ResultStore:
+    """Content-addressed object store plus per-job manifests on local disk"""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects = os.path.join(root, 'objects')
+        self.jobs = os.path.join(root, 'jobs')
+        self.claims = os.path.join(root, 'pending')
+        os.makedirs(self.objects, exist_ok=True)
+        os.makedirs(self.jobs, exist_ok=True)
+        os.makedirs(self.claims, exist_ok=True)
+
+    def object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def put(self, data):
+        """Store bytes under their SHA-256 digest (a no-op if already present)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, data)
+        return digest
+
+    def save_job(self, job):
+        write_atomic(os.path.join(self.jobs, f"{job['job_id']}.json"),
+                     json.dumps(job, indent=2).encode())
+
+    def load_job(self, job_id):
+        """Manifest of a job, or None"""
+        try:
+            with open(os.path.join(self.jobs, f"{os.path.basename(job_id)}.json")) as manifest:
+                return json.load(manifest)
+        except (OSError, ValueError):
+            return None
+
+    def discard_job(self, job_id):
+        try:
+            os.unlink(os.path.join(self.jobs, f"{job_id}.json"))
+        except FileNotFoundError:
+            pass
+
+    def claim_path(self, key):
+        year, month, branch_id = key
+        return os.path.join(self.claims, f"{year}-{month:02d}_{'all' if branch_id is None else branch_id}")
+
+    def claim(self, key, job_id):
+        """
+        Claim (year, month, branch_id) for job_id across processes; returns None
+        when claimed, else the job id holding the claim. The claim is linked into
+        place complete, so a holder's id is never read half-written.
+        """
+        path = self.claim_path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.claims)
+        try:
+            with os.fdopen(fd, 'w') as tmp:
+                tmp.write(job_id)
+            os.link(tmp_path, path)
+            return None
+        except FileExistsError:
+            try:
+                with open(path) as holder:
+                    return holder.read()
+            except FileNotFoundError:    # released meanwhile: the caller retries
+                return ''
+        finally:
+            os.unlink(tmp_path)
+
+    def claim_age(self, key):
+        try:
+            return time.time() - os.stat(self.claim_path(key)).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def release(self, key, job_id):
+        """Remove the claim on (year, month, branch_id) if job_id still holds it"""
+        path = self.claim_path(key)
+        try:
+            with open(path) as holder:
+                if holder.read() != job_id:
+                    return
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class ReportJobQueue:
+    """Thread pool running report jobs; identical pending requests collapse into one job"""
+
+    def __init__(self, store, connection_factory, workers=2):
+        self.store = store
+        self.connection_factory = connection_factory    # branch_id -> DB connection
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-job')
+        self.lock = threading.Lock()
+        self.jobs = {}          # job_id -> manifest dict of jobs run by this process
+
+    def submit(self, year, month, branch_id=None):
+        """Enqueue a report; returns (job manifest, True if an identical pending job was joined)"""
+        key = (year, month, branch_id)
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'queued',
+            'month': f"{year}-{month:02d}",
+            'branch_id': branch_id,
+            'submitted_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'outputs': {},
+            'error': None,
+        }
+        # Saved before claiming, so a process joining the job can read its manifest
+        self.store.save_job(job)
+        for _ in range(3):
+            holder = self.store.claim(key, job['job_id'])
+            if holder is None:
+                break
+            pending = self.get(holder) if holder else None
+            if (pending is not None and pending['status'] in PENDING_STATUSES
+                    and (self.store.claim_age(key) or 0) < CLAIM_STALE_SECONDS):
+                self.store.discard_job(job['job_id'])
+                return pending, True
+            # Finished between its last update and its release, or left behind by a dead process
+            if holder:
+                self.store.release(key, holder)
+        with self.lock:
+            self.jobs[job['job_id']] = job
+        self.executor.submit(self._run, job['job_id'], key)
+        return dict(job), False
+
+    def get(self, job_id):
+        """Manifest of a job from this process, else from the store"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        return self.store.load_job(job_id)
+
+    def _update(self, job_id, **changes):
+        with self.lock:
+            job = self.jobs[job_id]
+            job.update(changes)
+            self.store.save_job(job)
+
+    def _run(self, job_id, key):
+        year, month, branch_id = key
+        self._update(job_id, status='running', started_at=datetime.now().isoformat())
+        try:
+            connection = self.connection_factory(branch_id)
+            if connection is None:
+                raise RuntimeError('Database connection failed')
+            generator = MonthlyReportGenerator(year, month, branch_id, connection=connection)
+            outputs = {
+                'txt': self.store.put(generator.generate_text_report().encode('utf-8')),
+                'csv': self.store.put(generator.render_csv().encode('utf-8')),
+                'json': self.store.put(generator.render_json().encode('utf-8')),
+            }
+            changes = {'status': 'done', 'outputs': outputs}
+        except Exception as e:  # surfaced to the client through the job status
+            print(f"Report job {job_id} failed: {e}")
+            changes = {'status': 'failed', 'error': str(e)}
+        self._update(job_id, finished_at=datetime.now().isoformat(), **changes)
+        self.store.release(key, job_id)
@@ -0,0 +1,117 @@
+"""
+Branch Shard Routing for Hospital Analytics
+Each branch's admissions and the fact tables hanging off them (procedures,
+billing, outcomes, bed occupancy) can live on their own MySQL instance.
+Reference tables (branches, departments, doctors, patients) are replicated to
+every shard so per-shard queries can still join them. Alert rules stay on the
+home database; alerts are stored on the shard of their branch.
+
+SHARD_MAP assigns branches to databases; `*` names the shard holding every
+branch that is not listed (the home database, DB_CONFIG, by default):
+
+    SHARD_MAP="1=db-north:3306,2=db-south:3306,*=db-main:3306"
+    SHARD_MAP="1=127.0.0.1:3306/hospital_b1,2=127.0.0.1:3306/hospital_b2"   # local testing
+
+Admission ids are only unique within a shard: each shard numbers its own
+admissions, so an admission is identified by (branch_id, admission_id). The
+ingest endpoints that take an admission_id require branch_id when sharded, and
+in-memory state (census_index.py) is keyed by both.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from query_plan import start_plan, run_plan
+
+
+def parse_shard_map(spec, base_config):
+    """Parse 'branch=host[:port][/database],...' into {branch_id or '*': connection config}"""
+    shards = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        branch, _, location = entry.partition('=')
+        address, _, database = location.strip().partition('/')
+        host, _, port = address.partition(':')
+        config = dict(base_config, host=host)
+        if port:
+            config['port'] = int(port)
+        if database:
+            config['database'] = database
+        branch = branch.strip()
+        shards[branch if branch == '*' else int(branch)] = config
+    return shards
+
+
+def shard_key(config):
+    """Identity of a database: branches mapped to the same one share a shard"""
+    return (config['host'], config.get('port'), config['database'])
+
+
+class ShardRouter:
+    """Routes branch-filtered work to the owning shard and fans cross-branch plans out to all of them"""
+
+    def __init__(self, base_config, shard_map=None):
+        shard_map = dict(shard_map or {})
+        self.default = shard_map.pop('*', base_config)
+        self.branches = shard_map   # branch_id -> connection config
+
+        configs = {}
+        for config in [self.default] + list(self.branches.values()):
+            configs.setdefault(shard_key(config), config)
+        self.configs = list(configs.values())
+        self.executor = ThreadPoolExecutor(max_workers=len(self.configs)) if len(self.configs) > 1 else None
+
+    @classmethod
+    def from_env(cls, base_config):
+        """Router for the SHARD_MAP environment variable (unsharded when unset)"""
+        return cls(base_config, parse_shard_map(os.getenv('SHARD_MAP', ''), base_config))
+
+    @property
+    def sharded(self):
+        return len(self.configs) > 1
+
+    def config_for(self, branch_id=None):
+        """Connection config of the shard owning `branch_id` (the default shard for None)"""
+        if branch_id in (None, ''):
+            return self.default
+        try:
+            return self.branches.get(int(branch_id), self.default)
+        except (TypeError, ValueError):
+            return self.default
+
+    def connect(self, branch_id=None):
+        """Open a mysql-connector connection to the shard owning `branch_id`"""
+        return mysql.connector.connect(**self.config_for(branch_id))
+
+    def connect_all(self):
+        """One connection per shard, default shard first"""
+        return [mysql.connector.connect(**config) for config in self.configs]
+
+    def scatter(self, partial, args, statement_ms=0):
+        """
+        Run the plan `partial(args)` on every shard in parallel and return the
+        per-shard results. Arguments are validated (BadRequest) before any
+        connection is opened; a failing shard fails the whole request.
+        statement_ms caps each shard query (MAX_EXECUTION_TIME).
+        """
+        plans = [partial(args) for _ in self.configs]
+        started = [start_plan(plan) for plan in plans]
+
+        def run(i):
+            query, result = started[i]
+            if query is None:
+                return result
+            conn = mysql.connector.connect(**self.configs[i])
+            cursor = conn.cursor()
+            try:
+                if statement_ms:
+                    cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (statement_ms,))
+                return run_plan(plans[i], cursor, query)
+            finally:
+                cursor.close()
+                conn.close()
+
+        if self.executor is None:
+            return [run(0)]
+        return list(self.executor.map(run, range(len(plans))))
@@ -0,0 +1,192 @@
+"""
+Cross-Worker Result Cache for the Hospital Analytics API
+Serialized JSON responses are kept in one memory-mapped file (on /dev/shm when
+available), shared by every gunicorn worker on the host. The file holds:
+
+- a header with the ring's write position and the data generation
+- a table of slots, each mapping a key digest to (position, length, expiry)
+- a data ring that response bodies are appended to
+
+Callers put the generation in their keys. invalidate() bumps it after a write to
+the database, so every worker stops finding entries computed before the write
+(they are overwritten as the ring moves on).
+
+Eviction is by size: new bodies overwrite the oldest. Entries in the oldest
+quarter of the ring count as evicted, so bytes a reader is still sending cannot
+be overwritten until a writer has appended at least a quarter of the ring.
+
+Reads take no lock. A slot is written under a seqlock (an odd sequence number
+means the write is in progress), and readers that see it change treat the
+lookup as a miss. Writers serialize on an flock of the file.
+
+A hit is returned as a file object positioned at the entry, so gunicorn sends
+it with sendfile() straight from shared memory without copying it through the
+worker.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+MAGIC = b'HRC2'
+HEADER = struct.Struct('<4sIQQQ')       # magic, slots, capacity, write position, generation
+HEADER_SIZE = 64
+SLOT = struct.Struct('<Q16sQIxxxxd')    # sequence, key digest, ring position, length, expires at
+PROBE = 4                               # slots examined per key
+
+Entry = namedtuple('Entry', 'offset length')
+
+
+def key_digest(key):
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+
+class CachedBody:
+    """A cached entry as a file: fileno() and offset for sendfile, bounded read() otherwise"""
+
+    def __init__(self, path, entry):
+        self.file = open(path, 'rb', buffering=0)
+        self.file.seek(entry.offset)
+        self.remaining = entry.length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class SharedResultCache:
+    """Size-bounded key -> bytes cache in a memory-mapped file shared across processes"""
+
+    def __init__(self, capacity=64 << 20, slots=4096, directory=None):
+        directory = directory or ('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+        # The geometry is part of the name, so a resized cache never remaps a file other workers use
+        self.path = os.path.join(directory, f"hospital-analytics-results-{slots}x{capacity}.cache")
+        self.capacity = capacity
+        self.slots = slots
+        self.max_entry = capacity // 8
+        self.safe_distance = capacity - capacity // 4
+        self.data_start = HEADER_SIZE + slots * SLOT.size
+        size = self.data_start + capacity
+
+        self.fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600)
+        with self._writer():
+            if os.fstat(self.fd).st_size != size or os.pread(self.fd, 4, 0) != MAGIC:
+                os.ftruncate(self.fd, 0)
+                os.ftruncate(self.fd, size)
+                os.pwrite(self.fd, HEADER.pack(MAGIC, slots, capacity, 0, 0), 0)
+        self.map = mmap.mmap(self.fd, size)
+
+    @contextmanager
+    def _writer(self):
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _write_position(self):
+        return HEADER.unpack_from(self.map, 0)[3]
+
+    def generation(self):
+        """Current data generation, to be made part of every key"""
+        return HEADER.unpack_from(self.map, 0)[4]
+
+    def invalidate(self):
+        """Start a new generation: entries keyed with an older one are never served again"""
+        with self._writer():
+            struct.pack_into('<Q', self.map, 24, self.generation() + 1)
+
+    def _slot_offsets(self, digest):
+        first = int.from_bytes(digest[:8], 'little') % self.slots
+        return [HEADER_SIZE + (first + i) % self.slots * SLOT.size for i in range(PROBE)]
+
+    def lookup(self, key):
+        """Entry (file offset, length) of a live key, or None"""
+        digest = key_digest(key)
+        now = time.time()
+        for offset in self._slot_offsets(digest):
+            sequence, slot_digest, position, length, expires = SLOT.unpack_from(self.map, offset)
+            if slot_digest != digest:
+                continue
+            if (sequence & 1 or not length or expires < now
+                    or self._write_position() - position > self.safe_distance
+                    or SLOT.unpack_from(self.map, offset)[0] != sequence):
+                return None
+            return Entry(self.data_start + position % self.capacity, length)
+        return None
+
+    def get(self, key):
+        """Cached bytes of a key, or None"""
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        data = bytes(self.map[entry.offset:entry.offset + entry.length])
+        # Re-check: the ring may have wrapped over the entry while it was copied
+        return data if self.lookup(key) == entry else None
+
+    def body(self, entry):
+        """File object of an entry for a WSGI file wrapper"""
+        return CachedBody(self.path, entry)
+
+    def put(self, key, data, ttl):
+        """Cache bytes for ttl seconds; False when they are empty or too large"""
+        length = len(data)
+        if not length or length > self.max_entry:
+            return False
+        digest = key_digest(key)
+        with self._writer():
+            now = time.time()
+            position = self._write_position()
+            if position % self.capacity + length > self.capacity:
+                position += self.capacity - position % self.capacity     # wrap to the ring start
+            # Advance the write position first, so entries about to be overwritten stop being served
+            struct.pack_into('<Q', self.map, 16, position + length)
+            start = self.data_start + position % self.capacity
+            self.map[start:start + length] = data
+
+            offset = self._victim(digest, now, position + length)
+            sequence = SLOT.unpack_from(self.map, offset)[0]
+            struct.pack_into('<Q', self.map, offset, sequence + 1)
+            SLOT.pack_into(self.map, offset, sequence + 1, digest, position, length, now + ttl)
+            struct.pack_into('<Q', self.map, offset, sequence + 2)
+        return True
+
+    def _victim(self, digest, now, write_position):
+        """Slot for a key: its own, else a free, expired or evicted one, else the oldest"""
+        offsets = self._slot_offsets(digest)
+        for offset in offsets:
+            if SLOT.unpack_from(self.map, offset)[1] == digest:
+                return offset
+        oldest = None
+        for offset in offsets:
+            _, _, position, length, expires = SLOT.unpack_from(self.map, offset)
+            if not length or expires < now or write_position - position > self.safe_distance:
+                return offset
+            if oldest is None or position < oldest[0]:
+                oldest = (position, offset)
+        return oldest[1]
+
+    def clear(self):
+        """Drop every entry (the ring position is kept)"""
+        with self._writer():
+            for index in range(self.slots):
+                offset = HEADER_SIZE + index * SLOT.size
+                sequence = SLOT.unpack_from(self.map, offset)[0]
+                struct.pack_into('<Q', self.map, offset, sequence + 1)
+                SLOT.pack_into(self.map, offset, sequence + 1, bytes(16), 0, 0, 0.0)
+                struct.pack_into('<Q', self.map, offset, sequence + 2)
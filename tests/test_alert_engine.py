@@ -0,0 +1,83 @@
+"""Alert transitions across worker processes sharing one resource_alerts table"""
+
+from mysql.connector import Error
+
+from alert_engine import AlertEngine
+
+
+class FakeAlertTable:
+    """resource_alerts as {alert_key: severity} of open alerts, behind a fake connection"""
+
+    def __init__(self):
+        self.open = {}
+        self.fail_writes = False
+
+    def connect(self, branch_id=None):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, table):
+        self.table = table
+        self.pending = dict(table.open)
+        self.rows = []
+
+    def cursor(self):
+        return self
+
+    def start_transaction(self):
+        pass
+
+    def execute(self, sql, params=()):
+        if 'SELECT open_alert_key' in sql:
+            self.rows = [(key, self.pending[key]) for key in params if key in self.pending]
+        elif 'INSERT INTO resource_alerts' in sql:
+            if self.table.fail_writes:
+                raise Error("write failed")
+            self.pending[params[6]] = params[3]
+        elif 'UPDATE resource_alerts' in sql:
+            self.pending.pop(params[1], None)
+        else:
+            self.rows = []
+
+    def fetchall(self):
+        return self.rows
+
+    def commit(self):
+        self.table.open = dict(self.pending)
+
+    def rollback(self):
+        self.pending = dict(self.table.open)
+
+    def close(self):
+        pass
+
+
+def worker(table):
+    engine = AlertEngine(table.connect, lambda: [table.connect()])
+    engine.load()
+    return engine
+
+
+def test_alert_raised_by_one_worker_is_resolved_by_another():
+    table = FakeAlertTable()
+    worker_a, worker_b = worker(table), worker(table)
+
+    assert worker_a.on_occupancy(1, 2, 99, 100)['raised'] == ['High_Occupancy:1:2']
+    # Still above the resolve margin: held open
+    assert worker_b.on_occupancy(1, 2, 89, 100) == {'raised': [], 'resolved': []}
+    assert worker_b.on_occupancy(1, 2, 50, 100)['resolved'] == ['High_Occupancy:1:2']
+    assert table.open == {}
+
+
+def test_failed_write_is_retried_by_the_next_event():
+    table = FakeAlertTable()
+    engine = worker(table)
+
+    table.fail_writes = True
+    assert engine.on_occupancy(1, 2, 99, 100) == {'raised': [], 'resolved': []}
+    assert engine.open_alerts == {}
+
+    table.fail_writes = False
+    assert engine.on_occupancy(1, 2, 99, 100)['raised'] == ['High_Occupancy:1:2']
+    assert table.open == {'High_Occupancy:1:2': 'Critical'}
@@ -0,0 +1,34 @@
+"""In-memory census: shard-local admission ids and NULL group_by values"""
+
+from datetime import datetime
+
+from census_index import CENSUS_COLUMNS, UNKNOWN, CensusIndex
+
+
+def census_row(branch_id, admission_id, bed_type):
+    row = dict.fromkeys(CENSUS_COLUMNS)
+    row.update(branch_id=branch_id, admission_id=admission_id, dept_id=1, doctor_id=1, bed_type=bed_type,
+               admission_date=datetime(2024, 1, 1))
+    return row
+
+
+def test_same_admission_id_on_two_shards_are_two_patients():
+    census = CensusIndex(lambda: [])
+    census.on_admission(census_row(1, 100, 'ICU'))
+    census.on_admission(census_row(2, 100, 'General'))
+    assert census.count() == 2
+
+    assert census.on_discharge(2, 100)
+    assert census.count() == 1
+    assert census.count(branch_id=1) == 1
+    assert not census.on_discharge(2, 100)
+
+
+def test_null_group_values_are_counted_as_unknown():
+    census = CensusIndex(lambda: [])
+    census.on_admission(census_row(1, 1, 'ICU'))
+    census.on_admission(census_row(1, 2, None))
+    census.on_admission(census_row(1, 3, None))
+
+    assert census.census(group_by='bed_type')['by_bed_type'] == {'ICU': 1, UNKNOWN: 2}
+    assert census.census({'branch_id': 1}, group_by='bed_type')['by_bed_type'] == {'ICU': 1, UNKNOWN: 2}
@@ -0,0 +1,36 @@
+"""Pruning checks EXPLAIN the queries the API plans actually issue"""
+
+import analytics_queries
+from partition_maintenance import explain_plan
+
+
+class ExplainCursor:
+    """Answers EXPLAIN with fixed partitions per table and every other query with no rows"""
+
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.explained = []
+        self.description = []
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        if sql.startswith('EXPLAIN'):
+            self.explained.append((sql[len('EXPLAIN '):], params))
+            self.description = [('table',), ('partitions',)]
+            self.rows = list(self.partitions.items())
+        else:
+            self.description = [('hour',), ('admission_count',)]
+            self.rows = []
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_explain_plan_covers_every_query_of_the_plan():
+    cursor = ExplainCursor({'admissions': 'p202401,p202402'})
+    accessed = explain_plan(cursor, analytics_queries.peak_hours({}))
+
+    assert accessed == {'admissions': ['p202401', 'p202402']}
+    # The hourly and the weekday query, with the plan's own window parameter
+    assert len(cursor.explained) == 2
+    assert all('admission_date >= %s' in sql and params for sql, params in cursor.explained)
@@ -0,0 +1,59 @@
+"""Readmissions paired across shards: a patient's next admission may be on another branch's shard"""
+
+from datetime import datetime
+
+from readmissions import refresh_patients_across, sequence_gaps
+
+
+def admission(admission_id, patient_id, branch_id, admitted, discharged=None):
+    return (admission_id, patient_id, branch_id, 1, admitted, discharged)
+
+
+def test_next_admission_on_another_shard_is_a_readmission():
+    first, second, other = sequence_gaps([
+        (1, admission(10, 7, 2, datetime(2024, 1, 20), datetime(2024, 1, 22))),
+        (1, admission(11, 8, 2, datetime(2024, 1, 2), datetime(2024, 1, 3))),
+        (0, admission(10, 7, 1, datetime(2024, 1, 1), datetime(2024, 1, 5))),
+    ])
+    assert first[0] == 0 and first[1][6:] == (10, datetime(2024, 1, 20), 15, True)
+    assert second[0] == 1 and second[1][6:] == (None, None, None, False)
+    # Another patient's admission is never the next one
+    assert other[0] == 1 and other[1][6:] == (None, None, None, False)
+
+
+def test_gap_outside_the_window_is_not_a_readmission():
+    (_, first), (_, last) = sequence_gaps([
+        (0, admission(1, 7, 1, datetime(2024, 1, 1), datetime(2024, 1, 5))),
+        (1, admission(2, 7, 2, datetime(2024, 3, 1))),
+    ])
+    assert first[8:] == (56, False)
+    assert last[6:] == (None, None, None, False)
+
+
+class FakeShard:
+    """Cursor over one shard's admissions, recording the admission_gaps rows written"""
+
+    def __init__(self, admissions):
+        self.admissions = admissions
+        self.gaps = []
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        if sql.lstrip().startswith('SELECT'):
+            self.rows = [row for row in self.admissions if row[1] in params]
+        elif sql.lstrip().startswith('DELETE'):
+            self.gaps = [row for row in self.gaps if row[1] not in params]
+
+    def executemany(self, sql, rows):
+        self.gaps.extend(rows)
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_gap_rows_are_written_to_the_shard_of_their_admission():
+    north = FakeShard([admission(10, 7, 1, datetime(2024, 1, 1), datetime(2024, 1, 5))])
+    south = FakeShard([admission(10, 7, 2, datetime(2024, 1, 20))])
+    assert refresh_patients_across([north, south], [7]) == 1
+    assert [row[:3] + row[-1:] for row in north.gaps] == [(10, 7, 1, True)]
+    assert [row[:3] + row[-1:] for row in south.gaps] == [(10, 7, 2, False)]
@@ -0,0 +1,46 @@
+"""Report job deduplication across API processes sharing one ResultStore"""
+
+import threading
+
+from report_jobs import ReportJobQueue, ResultStore
+
+
+def blocked_queue(store, release):
+    """A queue whose jobs wait for `release`, then fail without a database"""
+    def connection_factory(branch_id):
+        release.wait(5)
+        return None
+    return ReportJobQueue(store, connection_factory, workers=1)
+
+
+def test_identical_request_in_another_process_joins_the_pending_job(tmp_path):
+    release = threading.Event()
+    first = blocked_queue(ResultStore(str(tmp_path)), release)
+    second = blocked_queue(ResultStore(str(tmp_path)), release)
+
+    job, joined = first.submit(2024, 5, 1)
+    assert not joined
+    same, joined = second.submit(2024, 5, 1)
+    assert joined and same['job_id'] == job['job_id']
+    other, joined = second.submit(2024, 5, 2)
+    assert not joined and other['job_id'] != job['job_id']
+
+    release.set()
+    first.executor.shutdown(wait=True)
+    second.executor.shutdown(wait=True)
+    assert second.get(job['job_id'])['status'] == 'failed'
+    # The finished job released its claim, so the next request starts a new one
+    assert not ReportJobQueue(ResultStore(str(tmp_path)), lambda branch_id: None).submit(2024, 5, 1)[1]
+
+
+def test_claim_left_by_a_finished_job_is_taken_over(tmp_path):
+    store = ResultStore(str(tmp_path))
+    store.save_job({'job_id': 'old', 'status': 'done'})
+    assert store.claim((2024, 5, None), 'old') is None
+
+    release = threading.Event()
+    release.set()
+    queue = blocked_queue(store, release)
+    job, joined = queue.submit(2024, 5)
+    assert not joined and job['job_id'] != 'old'
+    queue.executor.shutdown(wait=True)
@@ -0,0 +1,220 @@
+"""Merge and finish functions of the scatter-gather plans, run on canned per-shard rows"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import analytics_queries
+from query_plan import merge_rows, merge_sums, ratio, start_plan
+
+
+def run_fake(plan, results):
+    """Run a plan on canned results: one (column names, row tuples) pair per query, in order"""
+    query, result = start_plan(plan)
+    if query is None:
+        return result
+    for names, rows in results:
+        try:
+            query = plan.send(query.shape([(name,) for name in names], rows))
+        except StopIteration as stop:
+            return stop.value
+    raise AssertionError("plan issued more queries than there are canned results")
+
+
+def gather(scatter, args, shards):
+    """Scatter-gather payload for canned results per shard"""
+    return scatter.finish(scatter.merge([run_fake(scatter.partial(args), shard) for shard in shards]), args)
+
+
+def single(scatter, args, results):
+    """Single-database payload (the plan serve_plan runs)"""
+    return run_fake(scatter(args), results)
+
+
+# ============== HELPERS ==============
+
+def test_merge_sums_adds_numbers_and_nested_dicts():
+    merged = merge_sums([
+        {'total': 3, 'types': {'Emergency': 1}, 'cost': None},
+        {'total': 4, 'types': {'Emergency': 2, 'Scheduled': 5}, 'cost': 10},
+    ])
+    assert merged == {'total': 7, 'types': {'Emergency': 3, 'Scheduled': 5}, 'cost': 10}
+
+
+def test_merge_rows_sums_by_key_and_keeps_labels():
+    merged = merge_rows([
+        [{'id': 1, 'name': 'North', 'beds': 100, 'count': 2}],
+        [{'id': 1, 'name': 'North', 'beds': 100, 'count': 3}, {'id': 2, 'name': 'South', 'beds': 50, 'count': 1}],
+    ], 'id', keep=('name', 'beds'))
+    assert sorted(merged, key=lambda row: row['id']) == [
+        {'id': 1, 'name': 'North', 'beds': 100, 'count': 5},
+        {'id': 2, 'name': 'South', 'beds': 50, 'count': 1},
+    ]
+
+
+def test_ratio_of_empty_count_is_none():
+    assert ratio(None, 0) is None
+    assert ratio(Decimal('7'), 2) == 3.5
+
+
+# ============== TRENDS ==============
+
+ADMISSION_COLUMNS = ('period', 'total_admissions', 'emergency_admissions', 'scheduled_admissions')
+OCCUPANCY_COLUMNS = ('date', 'occupancy_sum', 'occupancy_count', 'icu_sum', 'icu_count',
+                     'general_sum', 'general_count')
+TREND_ARGS = MultiDict({'start_date': '2024-01-01', 'end_date': '2024-01-03', 'granularity': 'day'})
+
+
+def test_admission_trends_add_periods_across_shards_in_order():
+    shards = [
+        [(ADMISSION_COLUMNS, [('2024-01-02', 5, Decimal(2), Decimal(3)), ('2024-01-01', 1, Decimal(1), Decimal(0))])],
+        [(ADMISSION_COLUMNS, [('2024-01-02', 4, Decimal(4), Decimal(0)), ('2024-01-03', 2, Decimal(0), Decimal(2))])],
+    ]
+    payload = gather(analytics_queries.admission_trends, TREND_ARGS, shards)
+    assert payload == [
+        {'period': '2024-01-01', 'total_admissions': 1, 'emergency_admissions': 1, 'scheduled_admissions': 0},
+        {'period': '2024-01-02', 'total_admissions': 9, 'emergency_admissions': 6, 'scheduled_admissions': 3},
+        {'period': '2024-01-03', 'total_admissions': 2, 'emergency_admissions': 0, 'scheduled_admissions': 2},
+    ]
+
+
+def test_bed_occupancy_trends_weight_averages_by_snapshot_count():
+    shards = [
+        [(OCCUPANCY_COLUMNS, [('2024-01-01', Decimal('180.00'), 2, Decimal(10), 2, Decimal(40), 2)])],
+        [(OCCUPANCY_COLUMNS, [('2024-01-01', Decimal('60.00'), 1, Decimal(2), 1, None, 0)])],
+    ]
+    payload = gather(analytics_queries.bed_occupancy_trends, TREND_ARGS, shards)
+    # (180 + 60) / 3 snapshots, not the mean of the shard averages (90 and 60)
+    assert payload == [
+        {'date': '2024-01-01', 'avg_occupancy': 80.0, 'avg_icu_occupied': 4.0, 'avg_general_occupied': 20.0},
+    ]
+
+
+def test_single_database_trends_match_the_old_payload():
+    payload = single(analytics_queries.bed_occupancy_trends, TREND_ARGS, [
+        (OCCUPANCY_COLUMNS, [('2024-01-02', Decimal('90.00'), 1, Decimal(3), 1, Decimal(20), 1),
+                             ('2024-01-01', Decimal('50.00'), 2, Decimal(4), 2, Decimal(10), 2)]),
+    ])
+    assert [row['date'] for row in payload] == ['2024-01-01', '2024-01-02']
+    assert payload[0]['avg_occupancy'] == 25.0
+
+
+# ============== COMPARISONS ==============
+
+DEPARTMENT_COLUMNS = ('dept_id', 'dept_name', 'total_admissions', 'los_days', 'los_count',
+                      'emergency_cases', 'cost_sum', 'cost_count')
+DOCTOR_COLUMNS = ('doctor_id', 'doctor_name', 'dept_name', 'working_hours_per_week',
+                  'patients_handled', 'duration_sum', 'duration_count')
+
+
+def test_department_comparison_merges_averages_and_distinct_procedures():
+    shards = [
+        [(DEPARTMENT_COLUMNS, [(1, 'Cardiology', 2, Decimal(10), 4, Decimal(1), Decimal('400.00'), 2),
+                               (2, 'Oncology', 0, None, 0, Decimal(0), None, 0)]),
+         (('dept_id', 'procedure_id'), [(1, 7), (1, 8)])],
+        [(DEPARTMENT_COLUMNS, [(1, 'Cardiology', 1, Decimal(2), 1, Decimal(1), Decimal('100.00'), 1),
+                               (2, 'Oncology', 3, Decimal(9), 3, Decimal(0), Decimal('900.00'), 3)]),
+         (('dept_id', 'procedure_id'), [(1, 8), (1, 9), (2, 7)])],
+    ]
+    payload = gather(analytics_queries.department_comparison, MultiDict(), shards)
+    assert payload == [
+        {'dept_name': 'Cardiology', 'total_admissions': 3, 'avg_los': 2.4, 'total_procedures': 3,
+         'emergency_cases': 2, 'avg_cost': pytest.approx(166.67, abs=0.01)},
+        {'dept_name': 'Oncology', 'total_admissions': 3, 'avg_los': 3.0, 'total_procedures': 1,
+         'emergency_cases': 0, 'avg_cost': 300.0},
+    ]
+
+
+def test_doctor_utilization_is_computed_after_the_merge():
+    shards = [
+        [(DOCTOR_COLUMNS, [(1, 'Dr. A', 'Cardiology', 40, 4, Decimal(60), 2),
+                           (2, 'Dr. B', 'Oncology', 20, 0, None, 0)]),
+         (('doctor_id', 'procedure_id'), [(1, 5)])],
+        [(DOCTOR_COLUMNS, [(1, 'Dr. A', 'Cardiology', 40, 6, Decimal(30), 1),
+                           (2, 'Dr. B', 'Oncology', 20, 1, None, 0)]),
+         (('doctor_id', 'procedure_id'), [(1, 5), (1, 6)])],
+    ]
+    payload = gather(analytics_queries.doctor_utilization, MultiDict(), shards)
+    doctor_a, doctor_b = payload
+    assert doctor_a['doctor_name'] == 'Dr. A'
+    assert doctor_a['patients_handled'] == 10
+    assert doctor_a['procedures_performed'] == 2
+    assert doctor_a['avg_procedure_duration'] == 30.0
+    assert doctor_a['utilization_percentage'] == 20.0        # (10 * 0.5 + 2 * 1.5) / 40 hours
+    assert doctor_b['avg_procedure_duration'] is None
+    assert doctor_b['utilization_percentage'] == 2.5
+
+
+def test_outcomes_summary_adds_counts_per_type():
+    shards = [
+        [(('outcome_type', 'count'), [('Recovered', 5), ('Transferred', 1)])],
+        [(('outcome_type', 'count'), [('Recovered', 2), ('Deceased', 3)])],
+    ]
+    payload = gather(analytics_queries.outcomes_summary, MultiDict(), shards)
+    assert payload == [
+        {'outcome_type': 'Recovered', 'count': 7},
+        {'outcome_type': 'Deceased', 'count': 3},
+        {'outcome_type': 'Transferred', 'count': 1},
+    ]
+
+
+# ============== STAFFING AND ALERTS ==============
+
+def test_peak_hours_pick_the_top_ten_of_the_merged_counts():
+    shard_hours = [(hour, 10 + hour) for hour in range(24)]
+    shards = [
+        [(('hour', 'admission_count'), shard_hours),
+         (('day_name', 'day_number', 'admission_count'), [('Monday', 2, 5), ('Sunday', 1, 9)])],
+        [(('hour', 'admission_count'), [(0, 100)]),
+         (('day_name', 'day_number', 'admission_count'), [('Monday', 2, 6)])],
+    ]
+    payload = gather(analytics_queries.peak_hours, MultiDict(), shards)
+    assert payload['peak_hours'][0] == {'hour': 0, 'admission_count': 110}
+    assert [row['hour'] for row in payload['peak_hours'][1:]] == list(range(23, 14, -1))
+    assert payload['peak_days'] == [
+        {'day_name': 'Monday', 'day_number': 2, 'admission_count': 11},
+        {'day_name': 'Sunday', 'day_number': 1, 'admission_count': 9},
+    ]
+
+
+def test_active_alerts_order_by_severity_then_date_and_keep_the_limit():
+    columns = ('alert_id', 'alert_type', 'severity', 'alert_message', 'alert_date', 'branch_name', 'dept_name')
+
+    def alert(alert_id, severity, day, branch):
+        return (alert_id, 'High_Occupancy', severity, '', datetime(2024, 1, day), branch, None)
+
+    shards = [
+        [(columns, [alert(1, 'Critical', 1, 'North'), alert(2, 'Low', 9, 'North')])],
+        [(columns, [alert(1, 'Critical', 5, 'South'), alert(3, 'High', 2, 'South')]
+                   + [alert(10 + i, 'Medium', 3, 'South') for i in range(60)])],
+    ]
+    payload = gather(analytics_queries.active_alerts, MultiDict(), shards)
+    assert len(payload) == analytics_queries.ACTIVE_ALERT_LIMIT
+    assert [(row['severity'], row['branch_name']) for row in payload[:3]] == [
+        ('Critical', 'South'), ('Critical', 'North'), ('High', 'South'),
+    ]
+    assert all(row['severity'] == 'Medium' for row in payload[3:])
+
+
+# ============== KPIS ==============
+
+def test_kpi_summary_returns_numbers_not_decimals():
+    shard = [
+        (('total_admissions', 'total_discharges', 'active_patients', 'los_days'),
+         [(4, Decimal(3), Decimal(1), Decimal(10))]),
+        (('occupancy_sum', 'occupancy_count'), [(Decimal('170.00'), 2)]),
+        (('discharged', 'readmissions'), [(3, Decimal(1))]),
+        (('procedure_volume',), [(2,)]),
+        (('admission_type', 'count'), [('Emergency', 3), ('Scheduled', 1)]),
+        (('cost_sum', 'cost_count'), [(Decimal('300.00'), 2)]),
+        (('register_index', 'max_rank'), []),
+    ]
+    payload = gather(analytics_queries.kpi_summary, MultiDict(), [shard, shard])
+    assert payload['total_discharges'] == 6 and type(payload['total_discharges']) is int
+    assert type(payload['active_patients']) is int
+    assert payload['alos'] == 2.5
+    assert payload['readmission_rate'] == 33.33 and type(payload['readmission_rate']) is float
+    assert payload['bed_occupancy_rate'] == 85.0
+    assert payload['avg_cost_per_patient'] == 150.0
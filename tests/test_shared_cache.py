@@ -0,0 +1,24 @@
+"""Shared result cache: lookups and generation-based invalidation"""
+
+from shared_cache import SharedResultCache
+
+
+def test_put_get_and_invalidate(tmp_path):
+    cache = SharedResultCache(capacity=1 << 16, slots=16, directory=str(tmp_path))
+    key = f"{cache.generation()}:/api/kpis/summary?"
+    assert cache.put(key, b'{"total": 1}', ttl=30)
+    assert cache.get(key) == b'{"total": 1}'
+
+    # Another process sees the same generation through the shared file
+    other = SharedResultCache(capacity=1 << 16, slots=16, directory=str(tmp_path))
+    assert other.get(key) == b'{"total": 1}'
+
+    other.invalidate()
+    assert cache.generation() == other.generation() == 1
+    assert cache.get(f"{cache.generation()}:/api/kpis/summary?") is None
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = SharedResultCache(capacity=1 << 16, slots=16, directory=str(tmp_path))
+    cache.put('0:/api/peak-hours?', b'[]', ttl=-1)
+    assert cache.get('0:/api/peak-hours?') is None
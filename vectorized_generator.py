@@ -0,0 +1,194 @@
+"""
+Vectorized Synthetic Admission Generator for Hospital Analytics
+Samples a whole shard of admissions at once with NumPy: departments, patients,
+doctors, admission types, LOS, procedure counts and billing amounts are drawn
+as arrays from the same distributions as generate_sample_data.generate_admission.
+The result is a ColumnarBatch (table -> column -> array, in FACT_COLUMNS order)
+that the bulk loader consumes. Money is computed in integer paise and emitted
+as two-decimal values.
+"""
+
+import numpy as np
+
+from generate_sample_data import (
+    ADMISSION_TYPES, ADMISSION_TYPE_WEIGHTS, BED_TYPES, BED_TYPE_WEIGHTS, DIAGNOSES,
+    FACT_COLUMNS, LOS_DAYS, LOS_WEIGHTS, OUTCOME_TYPES, OUTCOME_WEIGHTS, READMISSION_RATE,
+)
+
+
+class ColumnarBatch:
+    """Generated rows per table as equal-length column arrays"""
+
+    def __init__(self, tables=None):
+        self.tables = tables or {}     # table -> {column: ndarray}
+
+    def num_rows(self, table):
+        columns = self.tables.get(table)
+        return len(next(iter(columns.values()))) if columns else 0
+
+    def column(self, table, column):
+        return self.tables[table][column]
+
+    def rows(self, table):
+        """Row tuples of Python values in FACT_COLUMNS order (NaT becomes None)"""
+        columns = []
+        for column in FACT_COLUMNS[table]:
+            values = self.tables[table][column]
+            if np.issubdtype(values.dtype, np.datetime64):
+                values = values.astype('datetime64[us]')
+            columns.append(values.tolist())
+        return list(zip(*columns))
+
+
+def grouped(groups):
+    """Flatten per-key lists into (offsets, counts, values) arrays indexed like the keys"""
+    counts = np.array([len(group) for group in groups], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    values = [value for group in groups for value in group]
+    return offsets, counts, values
+
+
+def reference_arrays(reference):
+    """Array form of the generate_sample_data reference lookups"""
+    dept_ids = [dept_id for dept_id, _, _ in reference['departments']]
+    dept_types = [dept_type for _, dept_type, _ in reference['departments']]
+
+    doctor_offsets, doctor_counts, doctor_ids = grouped(
+        [reference['doctors_by_dept'].get(dept_id, [1]) for dept_id in dept_ids])
+    diagnosis_offsets, diagnosis_counts, diagnoses = grouped(
+        [DIAGNOSES.get(dept_type, ['General Condition']) for dept_type in dept_types])
+    procedure_offsets, procedure_counts, procedures = grouped(
+        [reference['procedures_by_dept'].get(dept_id, []) for dept_id in dept_ids])
+
+    patient_ids = reference['patient_ids']
+    return {
+        'dept_ids': np.array(dept_ids, dtype=np.int64),
+        'dept_branch': np.array([branch_id for _, _, branch_id in reference['departments']], dtype=np.int64),
+        'doctor_offsets': doctor_offsets, 'doctor_counts': doctor_counts,
+        'doctor_ids': np.array(doctor_ids, dtype=np.int64),
+        'diagnosis_offsets': diagnosis_offsets, 'diagnosis_counts': diagnosis_counts,
+        'diagnoses': np.array(diagnoses),
+        'procedure_offsets': procedure_offsets, 'procedure_counts': procedure_counts,
+        'procedure_ids': np.array([proc_id for proc_id, _, _ in procedures], dtype=np.int64),
+        'procedure_paise': np.array([int(round(cost * 100)) for _, cost, _ in procedures], dtype=np.int64),
+        'procedure_minutes': np.array([duration for _, _, duration in procedures], dtype=np.int64),
+        'patient_ids': np.array(patient_ids, dtype=np.int64),
+        'patient_self_pay': np.array([reference['insurance_by_patient'][patient_id] == 'Self-Pay'
+                                      for patient_id in patient_ids]),
+    }
+
+
+def weighted(rng, labels, weights, size):
+    """Sample labels with the given (unnormalised) weights"""
+    p = np.asarray(weights, dtype=np.float64)
+    return np.asarray(labels)[rng.choice(len(labels), size=size, p=p / p.sum())]
+
+
+def pick(rng, offsets, counts, values, keys):
+    """One uniformly chosen value per key from its group (groups must not be empty)"""
+    chosen = offsets[keys] + (rng.random(len(keys)) * counts[keys]).astype(np.int64)
+    return values[chosen]
+
+
+def money(paise):
+    return np.round(paise / 100, 2)
+
+
+def generate_admissions(rng, arrays, first_admission_id, day_starts, daily_counts, as_of):
+    """
+    Admissions of consecutive days with their procedures, bills and outcomes.
+    `day_starts` are the days' start datetimes and `daily_counts` their volumes;
+    ids are assigned from first_admission_id as in generate_sample_data.
+    """
+    daily_counts = np.asarray(daily_counts, dtype=np.int64)
+    n = int(daily_counts.sum())
+    admission_id = first_admission_id + np.arange(n, dtype=np.int64)
+    day = np.repeat(np.asarray(day_starts, dtype='datetime64[s]'), daily_counts)
+
+    dept = rng.integers(0, len(arrays['dept_ids']), n)
+    patient = rng.integers(0, len(arrays['patient_ids']), n)
+    doctor_id = pick(rng, arrays['doctor_offsets'], arrays['doctor_counts'], arrays['doctor_ids'], dept)
+    diagnosis = pick(rng, arrays['diagnosis_offsets'], arrays['diagnosis_counts'], arrays['diagnoses'], dept)
+
+    admission_date = day + (rng.integers(0, 24, n) * 60 + rng.integers(0, 60, n)).astype('timedelta64[m]')
+    los = weighted(rng, LOS_DAYS, LOS_WEIGHTS, n).astype(np.int64)
+    discharge = admission_date + los.astype('timedelta64[D]')
+    discharged = discharge <= np.datetime64(as_of, 's')
+
+    admissions = {
+        'admission_id': admission_id,
+        'patient_id': arrays['patient_ids'][patient],
+        'branch_id': arrays['dept_branch'][dept],
+        'dept_id': arrays['dept_ids'][dept],
+        'doctor_id': doctor_id,
+        'admission_date': admission_date,
+        'discharge_date': np.where(discharged, discharge, np.datetime64('NaT', 's')),
+        'admission_type': weighted(rng, ADMISSION_TYPES, ADMISSION_TYPE_WEIGHTS, n),
+        'diagnosis_category': diagnosis,
+        'bed_type': weighted(rng, BED_TYPES, BED_TYPE_WEIGHTS, n),
+        'bed_number': np.char.add('B-', rng.integers(101, 500, n).astype(str)),
+        'status': np.where(discharged, 'Discharged', 'Active'),
+    }
+
+    # Procedures: 1-3 per admission in departments with a catalog, within the first 3 days
+    num_procedures = np.where(arrays['procedure_counts'][dept] > 0, rng.integers(1, 4, n), 0)
+    owner = np.repeat(np.arange(n), num_procedures)
+    sequence = np.arange(len(owner)) - np.repeat(np.cumsum(num_procedures) - num_procedures, num_procedures)
+    procedure = (arrays['procedure_offsets'][dept[owner]]
+                 + (rng.random(len(owner)) * arrays['procedure_counts'][dept[owner]]).astype(np.int64))
+    offset_days = (rng.random(len(owner)) * (np.minimum(los[owner], 3) + 1)).astype(np.int64)
+    cost = np.rint(arrays['procedure_paise'][procedure] * rng.uniform(0.9, 1.2, len(owner))).astype(np.int64)
+    procedures = {
+        'record_id': admission_id[owner] * 3 + sequence,
+        'admission_id': admission_id[owner],
+        'procedure_id': arrays['procedure_ids'][procedure],
+        'procedure_date': admission_date[owner] + offset_days.astype('timedelta64[D]'),
+        'doctor_id': doctor_id[owner],
+        'duration_minutes': arrays['procedure_minutes'][procedure],
+        'cost': money(cost),
+        'status': np.full(len(owner), 'Completed'),
+    }
+
+    # Billing, in paise
+    procedure_charges = np.bincount(owner, weights=cost, minlength=n).astype(np.int64)
+    room_charges = los * rng.integers(2000, 8001, n) * 100
+    medicine_charges = los * rng.integers(1000, 3001, n) * 100
+    lab_charges = rng.integers(2000, 10001, n) * 100
+    other_charges = rng.integers(1000, 5001, n) * 100
+    total = room_charges + procedure_charges + medicine_charges + lab_charges + other_charges
+    discount = np.rint(total * rng.uniform(0.9, 1.2, n)).astype(np.int64)
+    insurance = np.where(arrays['patient_self_pay'][patient], 0,
+                         np.rint(total * rng.uniform(0.5, 0.8, n))).astype(np.int64)
+    paid = np.where(discharged, total - discount, np.rint(total * rng.uniform(0.3, 0.7, n))).astype(np.int64)
+    billing = {
+        'bill_id': admission_id,
+        'admission_id': admission_id,
+        'total_amount': money(total),
+        'room_charges': money(room_charges),
+        'procedure_charges': money(procedure_charges),
+        'medicine_charges': money(medicine_charges),
+        'lab_charges': money(lab_charges),
+        'other_charges': money(other_charges),
+        'discount': money(discount),
+        'insurance_coverage': money(insurance),
+        'amount_paid': money(paid),
+        'payment_status': np.where(paid >= total - discount - insurance, 'Paid', 'Partial'),
+    }
+
+    closed = np.flatnonzero(discharged)
+    readmitted = rng.random(len(closed)) < READMISSION_RATE
+    outcomes = {
+        'outcome_id': admission_id[closed],
+        'admission_id': admission_id[closed],
+        'outcome_type': weighted(rng, OUTCOME_TYPES, OUTCOME_WEIGHTS, len(closed)),
+        'outcome_date': discharge[closed],
+        'readmission_flag': readmitted,
+        'readmission_within_30days': readmitted,
+    }
+
+    return ColumnarBatch({
+        'admissions': admissions,
+        'patient_procedures': procedures,
+        'billing': billing,
+        'outcomes': outcomes,
+    })